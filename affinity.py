@@ -0,0 +1,159 @@
+import argparse
+import numpy as np
+from artist_matching import load_library
+from compact_library import ID_TYPECODE
+from lineup_model import CompiledLineup, format_minutes
+from cli import add_match_arguments, write_text
+from artist_resolver import load_act_ids
+
+AFFINITY_FILE = 'festival_affinity.txt'
+
+# How much each playlist's play shares count towards an act's score
+WEIGHTINGS = {
+    'equal': lambda totals: np.ones_like(totals),
+    'log': np.log1p,
+    'size': lambda totals: totals
+}
+
+def library_columns(library):
+    """Every playlist entry as flat (row, artist id, count) NumPy columns
+
+    The CompactLibrary arrays are read through the buffer protocol, so the
+    only per-playlist Python work is one concatenate input each.
+    """
+    dtype = np.dtype(ID_TYPECODE)
+    lengths = np.fromiter((len(ids) for _, ids, _ in library.playlists), dtype=np.intp,
+                          count=len(library.playlists))
+    rows = np.repeat(np.arange(len(library.playlists)), lengths)
+    if not len(rows):
+        return rows, np.zeros(0, dtype), np.zeros(0, dtype)
+    ids = np.concatenate([np.frombuffer(ids, dtype) for _, ids, _ in library.playlists])
+    counts = np.concatenate([np.frombuffer(counts, dtype) for _, _, counts in library.playlists])
+    return rows, ids, counts
+
+def act_columns(library, matched):
+    """(acts, artist -> act column, artist confidence) for library.match results
+
+    `matched` is {artist id: slots} or {artist id: (slots, score)} as
+    returned by CompactLibrary.match and fuzzy_match. Artists off the
+    lineup get column -1; an artist matching several acts counts for the
+    first, like the matchers' 'lineup_artist'.
+    """
+    acts = []
+    act_column = {}
+    columns = np.full(len(library), -1, dtype=np.intp)
+    confidence = np.ones(len(library))
+    for artist_id, value in matched.items():
+        slots, score = value if isinstance(value, tuple) else (value, None)
+        act = slots[0]['artist']
+        if act not in act_column:
+            act_column[act] = len(acts)
+            acts.append(act)
+        columns[artist_id] = act_column[act]
+        if score is not None:
+            confidence[artist_id] = score
+    return acts, columns, confidence
+
+def affinity_matrix(library, matched):
+    """(acts, playlist x act play-share matrix, playlist track totals)
+
+    Entry [p, a] is the share of playlist p's tracks by artists matched to
+    act a. Built with bincount over the flat library columns, so there is
+    no per-artist Python loop.
+    """
+    acts, columns, confidence = act_columns(library, matched)
+    rows, ids, counts = library_columns(library)
+    playlists = len(library.playlists)
+    totals = np.bincount(rows, weights=counts, minlength=playlists)
+
+    cols = columns[ids]
+    on_lineup = cols >= 0
+    rows, cols = rows[on_lineup], cols[on_lineup]
+    share = counts[on_lineup] * confidence[ids[on_lineup]] / totals[rows]
+
+    matrix = np.bincount(rows * len(acts) + cols, weights=share,
+                         minlength=playlists * len(acts)).reshape(playlists, len(acts))
+    return acts, matrix, totals
+
+def score_acts(matrix, totals, weighting='equal'):
+    """(score per act, strongest playlist row per act)
+
+    An act's score is its play share averaged over all playlists with the
+    chosen WEIGHTINGS, so scores sum to at most 1.
+    """
+    weights = WEIGHTINGS[weighting](totals)
+    weighted = matrix * weights[:, None]
+    total_weight = weights.sum()
+    scores = weighted.sum(axis=0) / total_weight if total_weight else weighted.sum(axis=0)
+    top_playlists = weighted.argmax(axis=0) if len(weighted) else np.zeros(matrix.shape[1], np.intp)
+    return scores, top_playlists
+
+def rank_acts(lineup, acts, scores):
+    """{(day, stage): [(score, slot)]} best first, in day and stage order"""
+    act_scores = dict(zip(acts, scores.tolist()))
+    rankings = {}
+    for slot in sorted(lineup.slots, key=lambda slot: (slot['day_index'], slot['order'])):
+        if slot['artist'] in act_scores:
+            rankings.setdefault((slot['day'], slot['stage']), []).append((act_scores[slot['artist']], slot))
+    for ranked in rankings.values():
+        ranked.sort(key=lambda entry: (-entry[0], entry[1]['start']))
+    return rankings
+
+def render_rankings(rankings, top_playlist, top=None):
+    """The affinity file as a single string"""
+    lines = ["GLASTONBURY 2025 - YOUR ACTS BY AFFINITY", "=" * 50]
+
+    current_day = None
+    for (day, stage), ranked in rankings.items():
+        if day != current_day:
+            lines.append("")
+            lines.append(day.upper())
+            lines.append("-" * len(day))
+            current_day = day
+        lines.append(f"{stage}:")
+        for rank, (score, slot) in enumerate(ranked[:top], 1):
+            lines.append(f"  {rank:>2}. {score:7.3%}  {slot['artist']} "
+                         f"({format_minutes(slot['start'])}, mostly from '{top_playlist[slot['artist']]}')")
+
+    return "\n".join(lines) + "\n"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rank lineup acts by how much of your listening they account for")
+    parser.add_argument('--weighting', choices=sorted(WEIGHTINGS), default='equal',
+                        help="how playlists count: equally, by log of their size, or by size (default: equal)")
+    parser.add_argument('--top', type=int, help="only list the best N acts per stage and day")
+    add_match_arguments(parser, fuzzy_help="also match name variants, weighted by match confidence")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=== GLASTONBURY 2025 - AFFINITY RANKING ===\n")
+
+    library = load_library()
+    lineup = CompiledLineup.load()
+    act_ids = {} if args.no_ids else load_act_ids()
+    spotify_index = lineup.spotify_index(act_ids) if act_ids else None
+
+    if args.fuzzy:
+        matched = library.fuzzy_match(lineup.fuzzy_index, args.threshold, spotify_index)
+    else:
+        matched = library.match(lineup.index, spotify_index)
+    if not matched:
+        print("No matches found, nothing to rank.")
+        return
+
+    acts, matrix, totals = affinity_matrix(library, matched)
+    scores, top_playlists = score_acts(matrix, totals, args.weighting)
+    top_playlist = {act: library.playlists[row][0] for act, row in zip(acts, top_playlists.tolist())}
+    rankings = rank_acts(lineup, acts, scores)
+
+    print(f"Scored {len(acts)} acts across {len(library.playlists)} playlists ({args.weighting} weighting)\n")
+    for score, act in sorted(zip(scores.tolist(), acts), reverse=True)[:10]:
+        print(f"* {score:7.3%}  {act} (mostly from '{top_playlist[act]}')")
+
+    write_text(AFFINITY_FILE, render_rankings(rankings, top_playlist, args.top))
+    print(f"\nRanking by stage and day saved to: {AFFINITY_FILE}")
+
+if __name__ == "__main__":
+    main()
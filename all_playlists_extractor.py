@@ -1,87 +1,287 @@
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import json
+import os
+import argparse
 from collections import Counter
-from secrets import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from spotify_paging import iter_playlist_artists, user_playlist_items, PAGE_WORKERS
+from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session, report_stats
+from artist_store import ArtistStore
+from artist_matching import LIBRARY_FILE
+from compact_library import CompactLibrary
 
 SCOPE = "playlist-read-private playlist-read-collaborative"
+CACHE_FILE = 'playlist_cache.json'
 
-def setup_spotify_client():
-    """Initialize Spotify client with authentication"""
+def setup_spotify_client(scheduler=None):
+    """Initialize Spotify client with authentication
+    
+    Every call goes through a RequestScheduler, so 429s are retried after
+    Retry-After with a shared backoff instead of aborting the run.
+    """
+    # Imported here so the module can be used (e.g. by benchmarks against
+    # a stub API) without credentials
+    from secrets import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+    
     auth_manager = SpotifyOAuth(
         client_id=CLIENT_ID,
         client_secret=CLIENT_SECRET,
         redirect_uri=REDIRECT_URI,
         scope=SCOPE
     )
-    return spotipy.Spotify(auth_manager=auth_manager)
+    sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=build_requests_session())
+    return ScheduledClient(sp, scheduler or RequestScheduler())
+
+def iter_artist_names(sp, playlist_id, page_workers=PAGE_WORKERS):
+    """Stream the artist name of every artist credit in a playlist"""
+    for track_name, artist in iter_playlist_artists(sp, playlist_id, page_workers):
+        yield artist['name']
 
-def extract_artists_from_playlist(sp, playlist_id):
+def extract_artists_from_playlist(sp, playlist_id, page_workers=PAGE_WORKERS):
     """Extract all artists from a specific playlist"""
-    artists = []
-    results = sp.playlist_tracks(playlist_id)
-    tracks = results['items']
+    return list(iter_artist_names(sp, playlist_id, page_workers))
+
+def get_own_playlists(sp):
+    """List the current user's own playlists, fetching their identity once"""
+    user_id = sp.me()['id']
+    playlists = []
     
-    while results['next']:
-        results = sp.next(results)
-        tracks.extend(results['items'])
+    for playlist in user_playlist_items(sp):
+        if playlist['owner']['id'] == user_id:  # Only user's own playlists
+            playlists.append(playlist)
     
-    for item in tracks:
-        if item['track'] and item['track']['artists']:
-            for artist in item['track']['artists']:
-                artists.append(artist['name'])
+    return playlists
+
+def load_extraction_cache(path=CACHE_FILE):
+    """Load cached artist counts keyed by playlist id (empty if missing)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {path}: {e}")
+        return {}
+
+def save_extraction_cache(cache, path=CACHE_FILE):
+    """Save the extraction cache"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def summarize_playlist(playlist, artist_counts):
+    """Build the saved summary for one playlist from its artist counts"""
+    unique_artists = sorted(artist_counts)
     
-    return artists
+    return {
+        'playlist_name': playlist['name'],
+        'total_tracks': sum(artist_counts.values()),
+        'unique_artists': len(unique_artists),
+        'artist_counts': dict(artist_counts),
+        'all_artists': unique_artists
+    }
 
-def get_all_playlists_artists(sp):
-    """Get artists from all user playlists"""
-    all_data = {}
+def count_playlist_artists(sp, playlist):
+    """(artist name -> track count, artist name -> Spotify id) for one playlist"""
+    print(f"Processing playlist: '{playlist['name']}'...")
+    artist_counts = Counter()
+    artist_ids = {}
+    for track_name, artist in iter_playlist_artists(sp, playlist['id']):
+        artist_counts[artist['name']] += 1
+        if artist.get('id'):
+            artist_ids.setdefault(artist['name'], artist['id'])
+    return artist_counts, artist_ids
+
+@metrics.timed('fetch playlists')
+def get_all_playlists_artists(sp, workers=1, cache=None, store=None, spotify_ids=None):
+    """Get artists from all user playlists
     
-    results = sp.current_user_playlists(limit=50)
-    
-    while results:
-        for playlist in results['items']:
-            if playlist['owner']['id'] == sp.me()['id']:  # Only user's own playlists
-                print(f"Processing playlist: '{playlist['name']}'...")
-                
-                artists = extract_artists_from_playlist(sp, playlist['id'])
-                unique_artists = sorted(set(artists))
-                artist_counts = Counter(artists)
-                
-                all_data[playlist['name']] = {
-                    'playlist_name': playlist['name'],
-                    'total_tracks': len(artists),
-                    'unique_artists': len(unique_artists),
-                    'artist_counts': dict(artist_counts),
-                    'all_artists': unique_artists
-                }
-        
-        if results['next']:
-            results = sp.next(results)
+    With workers > 1 the playlists' tracks are fetched concurrently on a
+    bounded thread pool. Results are still assembled in playlist order, so
+    the output matches a serial run.
+    
+    If a cache dict is given, playlists whose snapshot_id is unchanged are
+    reused from it without fetching any tracks. The cache is updated in
+    place: changed playlists are refreshed and deleted ones are pruned.
+    
+    If an ArtistStore is given, each fetched playlist is upserted into it as
+    soon as its tracks are counted, and the store is pruned the same way.
+    
+    If a spotify_ids dict is given, it is filled with artist name -> Spotify
+    artist id for every artist seen (see CompactLibrary).
+    """
+    playlists = get_own_playlists(sp)
+    if cache is None:
+        cache = {}
+    
+    to_fetch = []
+    for playlist in playlists:
+        cached = cache.get(playlist['id'])
+        if cached and cached['snapshot_id'] == playlist['snapshot_id']:
+            print(f"Unchanged playlist: '{playlist['name']}' (cached)")
+            metrics.count('playlist_cache.hits')
         else:
-            break
+            to_fetch.append(playlist)
+            metrics.count('playlist_cache.misses')
+    
+    def fetch(playlist):
+        return count_playlist_artists(sp, playlist)
+    
+    positions = {playlist['id']: position for position, playlist in enumerate(playlists)}
+    
+    def store_counts(playlist, fetched):
+        artist_counts, artist_ids = fetched
+        cache[playlist['id']] = {
+            'snapshot_id': playlist['snapshot_id'],
+            'artist_counts': dict(artist_counts),
+            'artist_ids': artist_ids
+        }
+        if store is not None:
+            store.upsert_playlist(playlist['id'], playlist['name'], artist_counts,
+                                  playlist['snapshot_id'], positions[playlist['id']])
+    
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for playlist, fetched in zip(to_fetch, pool.map(fetch, to_fetch)):
+                store_counts(playlist, fetched)
+    else:
+        for playlist in to_fetch:
+            store_counts(playlist, fetch(playlist))
+    
+    current_ids = {playlist['id'] for playlist in playlists}
+    for playlist_id in list(cache):
+        if playlist_id not in current_ids:
+            del cache[playlist_id]
+    
+    if store is not None:
+        # Cached playlists only need writing if the store missed them
+        for playlist in playlists:
+            if store.snapshot_id(playlist['id']) != playlist['snapshot_id']:
+                store.upsert_playlist(playlist['id'], playlist['name'], cache[playlist['id']]['artist_counts'],
+                                      playlist['snapshot_id'], positions[playlist['id']])
+        store.set_positions(playlist['id'] for playlist in playlists)
+        store.remove_playlists_except(current_ids)
+    
+    all_data = {}
+    for playlist in playlists:
+        artist_counts = Counter(cache[playlist['id']]['artist_counts'])
+        all_data[playlist['name']] = summarize_playlist(playlist, artist_counts)
+        if spotify_ids is not None:
+            # Caches written before ids were kept have none
+            for name, artist_id in cache[playlist['id']].get('artist_ids', {}).items():
+                spotify_ids.setdefault(name, artist_id)
     
     return all_data
 
-def main():
-    try:
-        sp = setup_spotify_client()
-        
-        print("Extracting artists from all your playlists...")
-        all_playlists_data = get_all_playlists_artists(sp)
-        
-        # Save to JSON file
-        with open('all_playlists_artists.json', 'w', encoding='utf-8') as f:
+@metrics.timed('fetch playlists')
+def stream_playlists_to_store(sp, store, workers=1):
+    """Upsert every user playlist into an ArtistStore as its tracks come in
+    
+    Nothing is collected in memory: each playlist's counts go to the store
+    as soon as they are complete and are then dropped. The store's own
+    snapshot ids stand in for the extraction cache, so unchanged playlists
+    are not fetched. Playlists no longer on the account are removed.
+    Returns the number of playlists, fetched or not.
+    """
+    playlists = get_own_playlists(sp)
+    
+    to_fetch = []
+    for position, playlist in enumerate(playlists):
+        if store.snapshot_id(playlist['id']) == playlist['snapshot_id']:
+            print(f"Unchanged playlist: '{playlist['name']}' (in store)")
+            metrics.count('playlist_cache.hits')
+        else:
+            to_fetch.append((position, playlist))
+            metrics.count('playlist_cache.misses')
+    
+    def fetch(item):
+        position, playlist = item
+        return count_playlist_artists(sp, playlist)[0]
+    
+    def upsert(item, artist_counts):
+        position, playlist = item
+        store.upsert_playlist(playlist['id'], playlist['name'], artist_counts, playlist['snapshot_id'], position)
+        print(f"  - {playlist['name']}: {len(artist_counts)} unique artists")
+    
+    if workers > 1:
+        # SQLite writes stay on this thread, in playlist order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for item, artist_counts in zip(to_fetch, pool.map(fetch, to_fetch)):
+                upsert(item, artist_counts)
+    else:
+        for item in to_fetch:
+            upsert(item, fetch(item))
+    
+    store.set_positions(playlist['id'] for playlist in playlists)
+    store.remove_playlists_except(playlist['id'] for playlist in playlists)
+    return len(playlists)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract artists from all your Spotify playlists")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of playlists to fetch concurrently (default: 1)")
+    parser.add_argument('--cache-file', default=CACHE_FILE,
+                        help=f"snapshot cache used to skip unchanged playlists (default: {CACHE_FILE})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-download every playlist and leave the cache untouched")
+    parser.add_argument('--store', metavar='DB',
+                        help=f"upsert each playlist into an SQLite store (see artist_store.py) as it is fetched, "
+                             f"instead of writing {LIBRARY_FILE}; the store's snapshot ids replace the cache")
+    parser.add_argument('--compact', action='store_true',
+                        help=f"write {LIBRARY_FILE} in the compact format: each artist stored once, "
+                             "with Spotify ids, and playlists as id/count columns")
+    metrics.add_arguments(parser)
+    return parser.parse_args()
+
+def extract_library(sp, args):
+    """Extract every playlist into LIBRARY_FILE, reusing the snapshot cache"""
+    cache = None if args.no_cache else load_extraction_cache(args.cache_file)
+    spotify_ids = {} if args.compact else None
+    
+    print("Extracting artists from all your playlists...")
+    all_playlists_data = get_all_playlists_artists(sp, workers=args.workers, cache=cache, spotify_ids=spotify_ids)
+    
+    if cache is not None:
+        save_extraction_cache(cache, args.cache_file)
+    
+    # Save to JSON file
+    if args.compact:
+        CompactLibrary.from_playlists_data(all_playlists_data, spotify_ids).save(LIBRARY_FILE)
+    else:
+        with open(LIBRARY_FILE, 'w', encoding='utf-8') as f:
             json.dump(all_playlists_data, f, indent=2, ensure_ascii=False)
+    
+    print(f"\nProcessed {len(all_playlists_data)} playlists:")
+    for name, data in all_playlists_data.items():
+        print(f"  - {name}: {data['unique_artists']} unique artists")
+    
+    print(f"\nData saved to: {LIBRARY_FILE}")
+
+def run(args):
+    """Extract every playlist and save the library"""
+    try:
+        scheduler = RequestScheduler()
+        sp = setup_spotify_client(scheduler)
         
-        print(f"\nProcessed {len(all_playlists_data)} playlists:")
-        for name, data in all_playlists_data.items():
-            print(f"  - {name}: {data['unique_artists']} unique artists")
+        if args.store:
+            print(f"Extracting artists from all your playlists into {args.store}...")
+            with ArtistStore(args.store) as store:
+                playlist_count = stream_playlists_to_store(sp, store, args.workers)
+            print(f"\nProcessed {playlist_count} playlists")
+            print(f"\nData saved to: {args.store}")
+        else:
+            extract_library(sp, args)
         
-        print(f"\nData saved to: all_playlists_artists.json")
+        report_stats(scheduler)
         
     except Exception as e:
         print(f"Error: {e}")
 
+def main():
+    args = parse_args()
+    with metrics.collect('all_playlists_extractor', args):
+        run(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
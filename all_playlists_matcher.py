@@ -1,84 +1,155 @@
-import json
+import os
+import argparse
+import metrics
+from artist_matching import load_library
+from lineup_model import CompiledLineup
+from fuzzy_matching import DEFAULT_THRESHOLD
+from cli import add_match_arguments
+from artist_store import ArtistStore
+from artist_resolver import load_act_ids
+from schedule_export import PlaylistTextWriter, add_export_argument, export_schedule, export_targets
 
-def load_all_playlists():
-    """Load all playlist data"""
-    with open('all_playlists_artists.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+SCHEDULE_FILE = 'all_playlists_glastonbury_schedule.txt'
+EXPORT_NAME = 'all_playlists_schedule'
+EXPORT_TITLE = 'GLASTONBURY 2025 - ALL PLAYLISTS SCHEDULE'
 
-def load_glastonbury_lineup():
-    """Load Glastonbury lineup from JSON file"""
-    with open('glastonbury_2025_lineup.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+@metrics.timed('match')
+def find_library_matches(library, lineup_index, fuzzy_index=None, threshold=DEFAULT_THRESHOLD, spotify_index=None):
+    """{playlist name: [match]} for the playlists of a CompactLibrary with any match
     
-    all_artists = []
-    for stage, days in data.items():
-        for day, artists in days.items():
-            for artist_info in artists:
-                all_artists.append(artist_info['artist'])
+    Each distinct artist is matched once by id; playlists then only test
+    their integer id columns against the matched ids.
+    """
+    if fuzzy_index is not None:
+        matched = library.fuzzy_match(fuzzy_index, threshold, spotify_index)
+    else:
+        matched = {artist_id: (slots, None) for artist_id, slots in library.match(lineup_index, spotify_index).items()}
     
-    return all_artists, data
-
-def normalize_name(name):
-    """Simple normalization - just lowercase and remove 'the' prefix"""
-    name = name.lower().strip()
-    if name.startswith('the '):
-        name = name[4:]
-    return name
+    all_matches = {}
+    for playlist_name, artist_ids in library.playlist_matches(matched):
+        matches = []
+        for artist_id in artist_ids:
+            slots, score = matched[artist_id]
+            match = {
+                'playlist_artist': library.names[artist_id],
+                'lineup_artist': slots[0]['artist']
+            }
+            if fuzzy_index is not None:
+                match['score'] = score
+            matches.append(match)
+        all_matches[playlist_name] = matches
+    
+    return all_matches
 
-def find_exact_matches(playlists_data, lineup_artists, lineup_data):
-    """Find exact matches across all playlists"""
+@metrics.timed('match')
+def find_store_matches(store, lineup, fuzzy_index=None, threshold=DEFAULT_THRESHOLD):
+    """find_library_matches over an ArtistStore, with exact matching as one indexed join"""
+    store.sync_lineup(lineup)
     all_matches = {}
     
-    for playlist_name, playlist_data in playlists_data.items():
-        matches = []
-        
-        for playlist_artist in playlist_data['all_artists']:
-            norm_playlist = normalize_name(playlist_artist)
-            
-            for lineup_artist in lineup_artists:
-                norm_lineup = normalize_name(lineup_artist)
-                
-                if norm_playlist == norm_lineup:
-                    matches.append({
-                        'playlist_artist': playlist_artist,
-                        'lineup_artist': lineup_artist
-                    })
-                    break
-        
-        if matches:
-            all_matches[playlist_name] = matches
+    if fuzzy_index is not None:
+        fuzzy_matches = {playlist_artist: (slots, score) for playlist_artist, slots, score
+                         in fuzzy_index.match_artists(store.iter_artist_names(), threshold)}
+        for playlist_name, playlist_artist in store.iter_playlist_artists():
+            if playlist_artist in fuzzy_matches:
+                slots, score = fuzzy_matches[playlist_artist]
+                all_matches.setdefault(playlist_name, []).append({
+                    'playlist_artist': playlist_artist,
+                    'lineup_artist': slots[0]['artist'],
+                    'score': score
+                })
+    else:
+        for playlist_name, playlist_artist, lineup_artist in store.playlist_matches():
+            all_matches.setdefault(playlist_name, []).append({
+                'playlist_artist': playlist_artist,
+                'lineup_artist': lineup_artist
+            })
     
     return all_matches
 
-def main():
+def schedule_entries(all_matches, lineup):
+    """Every set of every playlist's matches in schedule order, for schedule_export
+    
+    Entries look like broadcast_matcher's matches plus the 'playlist' they
+    came from. Sets at the same time keep lineup order.
+    """
+    entries = []
+    for playlist_name, matches in all_matches.items():
+        for match in matches:
+            for slot in lineup.slots_for(match['lineup_artist']):
+                entries.append((slot['sort_key'], {
+                    'playlist': playlist_name,
+                    'playlist_artist': match['playlist_artist'],
+                    'lineup_artist': slot['artist'],
+                    'stage': slot['stage'].replace(' (broadcast)', ''),
+                    'day': slot['day'],
+                    'time': slot['time'],
+                    'broadcast': slot['broadcast'],
+                    'day_index': slot['day_index'],
+                    'start': slot['start'],
+                    'end': slot['end']
+                }))
+    entries.sort(key=lambda entry: entry[0])
+    return [entry for sort_key, entry in entries]
+
+def write_schedules(entries, out_dir='', export=()):
+    """Write the all-playlists schedule and each export format in one pass
+    
+    entries come from schedule_entries, already sorted. Returns the paths
+    written.
+    """
+    targets = [(PlaylistTextWriter, os.path.join(out_dir, SCHEDULE_FILE))]
+    targets += export_targets(os.path.join(out_dir, EXPORT_NAME), export)
+    return export_schedule(entries, targets, EXPORT_TITLE, ordered=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match all your playlists against the Glastonbury lineup")
+    add_match_arguments(parser)
+    parser.add_argument('--store', metavar='DB',
+                        help="match from an SQLite store (see artist_store.py) instead of all_playlists_artists.json")
+    add_export_argument(parser, EXPORT_NAME)
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Match each playlist and write the per-playlist schedule"""
     print("=== GLASTONBURY 2025 - ALL PLAYLISTS MATCHER ===\n")
     
     # Load data
-    playlists_data = load_all_playlists()
-    glastonbury_artists, lineup_data = load_glastonbury_lineup()
+    lineup = CompiledLineup.load()
+    fuzzy_index = lineup.fuzzy_index if args.fuzzy else None
+    # The artist store keeps names only, so ids can't help it
+    act_ids = {} if args.no_ids or args.store else load_act_ids()
+    spotify_index = lineup.spotify_index(act_ids) if act_ids else None
+    if spotify_index:
+        print(f"Matching {len(act_ids)} acts by Spotify id, the rest by name\n")
     
     # Find matches
-    all_matches = find_exact_matches(playlists_data, glastonbury_artists, lineup_data)
+    if args.store:
+        with ArtistStore(args.store) as store:
+            all_matches = find_store_matches(store, lineup, fuzzy_index, args.threshold)
+            playlist_count = store.playlist_count()
+    else:
+        library = load_library()
+        all_matches = find_library_matches(library, lineup.index, fuzzy_index, args.threshold, spotify_index)
+        playlist_count = len(library.playlists)
     
     total_matches = sum(len(matches) for matches in all_matches.values())
     
-    print(f"Checked {len(playlists_data)} playlists against Glastonbury 2025")
-    print(f"Found {total_matches} total exact matches!\n")
+    print(f"Checked {playlist_count} playlists against Glastonbury 2025")
+    print(f"Found {total_matches} total {'fuzzy' if args.fuzzy else 'exact'} matches!\n")
     
     if all_matches:
         for playlist_name, matches in all_matches.items():
             print(f"=== {playlist_name.upper()} ({len(matches)} matches) ===")
             
             for match in matches:
-                print(f"* {match['playlist_artist']} -> {match['lineup_artist']}")
+                confidence = f" ({match['score']:.0%} match)" if match.get('score', 1.0) < 1.0 else ""
+                print(f"* {match['playlist_artist']} -> {match['lineup_artist']}{confidence}")
                 
                 # Find stage and day info
-                for stage, days in lineup_data.items():
-                    for day, artists in days.items():
-                        for artist_info in artists:
-                            if artist_info['artist'] == match['lineup_artist']:
-                                print(f"   {stage} - {day} at {artist_info['time']}")
-                                break
+                for slot in lineup.slots_for(match['lineup_artist']):
+                    print(f"   {slot['stage']} - {slot['day']} at {slot['time']}")
                 print()
             print()
     else:
@@ -86,41 +157,15 @@ def main():
     
     # Create summary schedule
     if all_matches:
-        with open('all_playlists_glastonbury_schedule.txt', 'w', encoding='utf-8') as f:
-            f.write("GLASTONBURY 2025 - ALL PLAYLISTS SCHEDULE\n")
-            f.write("=" * 50 + "\n\n")
-            
-            # Collect all matches with schedule info
-            schedule_matches = []
-            for playlist_name, matches in all_matches.items():
-                for match in matches:
-                    for stage, days in lineup_data.items():
-                        for day, artists in days.items():
-                            for artist_info in artists:
-                                if artist_info['artist'] == match['lineup_artist']:
-                                    schedule_matches.append({
-                                        'day': day,
-                                        'time': artist_info['time'].split(' - ')[0],
-                                        'artist': match['lineup_artist'],
-                                        'stage': stage,
-                                        'playlist': playlist_name
-                                    })
-                                    break
-            
-            # Sort by day and time
-            day_order = ['Friday 27 June', 'Saturday 28 June', 'Sunday 29 June']
-            schedule_matches.sort(key=lambda x: (day_order.index(x['day']), x['time']))
-            
-            current_day = None
-            for match in schedule_matches:
-                if match['day'] != current_day:
-                    f.write(f"\n{match['day'].upper()}\n")
-                    f.write("-" * len(match['day']) + "\n")
-                    current_day = match['day']
-                
-                f.write(f"{match['time']} - {match['artist']} @ {match['stage']} (from '{match['playlist']}')\n")
-        
-        print(f"Complete schedule saved to: all_playlists_glastonbury_schedule.txt")
+        schedule_file, *exported = write_schedules(schedule_entries(all_matches, lineup), export=args.export)
+        print(f"Complete schedule saved to: {schedule_file}")
+        for path in exported:
+            print(f"Schedule exported to: {path}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('all_playlists_matcher', args):
+        run(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,287 @@
+import json
+import os
+import time
+import argparse
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from artist_matching import load_library
+from lineup_model import CompiledLineup, format_minutes
+from request_scheduler import RequestScheduler, report_stats
+from artist_resolver import RESOLVER_CACHE_FILE, load_act_ids
+from cli import write_text
+
+GRAPH_CACHE_FILE = 'related_artists.json'
+DISCOVERY_FILE = 'festival_discoveries.txt'
+
+# How long an artist's related artists are trusted before fetching again
+CACHE_TTL = 30 * 24 * 60 * 60
+
+# Related-artist requests in flight at once (the RequestScheduler still applies)
+CRAWL_WORKERS = 4
+
+# Crawl limits: hops out from your artists, and artists expanded in total
+MAX_DEPTH = 2
+MAX_ARTISTS = 5000
+
+# Personalized PageRank: chance of following an edge rather than jumping
+# back to your artists, and when to stop iterating
+DAMPING = 0.85
+ITERATIONS = 100
+TOLERANCE = 1e-9
+
+def load_graph_cache(path=GRAPH_CACHE_FILE):
+    """Load the artist id -> related artists cache (empty if missing)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {path}: {e}")
+        return {}
+
+def save_graph_cache(cache, path=GRAPH_CACHE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+
+class RelatedArtistGraph:
+    """Spotify's related-artists graph, crawled once and kept on disk
+
+    The cache dict maps an artist id to {'related': [[id, name], ...],
+    'fetched_at'}; entries younger than `ttl` are reused, so a repeat crawl
+    over the same artists makes no API calls. Missing or stale artists are
+    fetched on at most `workers` threads.
+    """
+
+    def __init__(self, sp, cache=None, ttl=CACHE_TTL, workers=CRAWL_WORKERS):
+        self.sp = sp
+        self.cache = {} if cache is None else cache
+        self.ttl = ttl
+        self.workers = workers
+        self.names = {}
+        self.fetched = 0
+        self.failed = 0
+
+    def is_fresh(self, artist_id, now):
+        entry = self.cache.get(artist_id)
+        return entry is not None and now - entry.get('fetched_at', 0) < self.ttl
+
+    def fetch(self, artist_id):
+        try:
+            result = self.sp.artist_related_artists(artist_id)
+            return artist_id, [[artist['id'], artist['name']] for artist in result['artists']], None
+        except Exception as e:
+            return artist_id, None, e
+
+    def related(self, artist_id):
+        """Related artist ids from the cache (none if never fetched)"""
+        entry = self.cache.get(artist_id)
+        return [related_id for related_id, name in entry['related']] if entry else []
+
+    @metrics.timed('crawl related artists')
+    def crawl(self, seeds, depth=MAX_DEPTH, max_artists=MAX_ARTISTS):
+        """Breadth-first crawl out from seed artist ids
+
+        Seeds are expanded in the order given, so pass your most important
+        artists first if max_artists may cut the crawl short. Returns
+        ({artist id: (hops, parent id)} for every artist reached, the
+        expanded ids); seeds have no parent.
+        """
+        now = time.time()
+        frontier = list(dict.fromkeys(seeds))
+        reached = {artist_id: (0, None) for artist_id in frontier}
+        expanded = []
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            for hops in range(depth):
+                frontier = frontier[:max(0, max_artists - len(expanded))]
+                if not frontier:
+                    break
+
+                stale = [artist_id for artist_id in frontier if not self.is_fresh(artist_id, now)]
+                metrics.count('graph_cache.hits', len(frontier) - len(stale))
+                metrics.count('graph_cache.misses', len(stale))
+                for artist_id, related, error in pool.map(self.fetch, stale):
+                    self.fetched += 1
+                    if error is not None:
+                        # Keep whatever was cached before; try again next run
+                        self.failed += 1
+                        print(f"Could not fetch artists related to {artist_id}: {error}")
+                        continue
+                    self.cache[artist_id] = {'related': related, 'fetched_at': now}
+
+                next_frontier = []
+                for artist_id in frontier:
+                    expanded.append(artist_id)
+                    for related_id, name in self.cache.get(artist_id, {}).get('related', ()):
+                        self.names.setdefault(related_id, name)
+                        if related_id not in reached:
+                            reached[related_id] = (hops + 1, artist_id)
+                            next_frontier.append(related_id)
+                frontier = next_frontier
+
+        return reached, expanded
+
+    def adjacency(self, artist_ids):
+        """{artist id: related ids} for the given (expanded) artists"""
+        return {artist_id: self.related(artist_id) for artist_id in artist_ids}
+
+@metrics.timed('pagerank')
+def personalized_pagerank(edges, personalization, damping=DAMPING, iterations=ITERATIONS, tolerance=TOLERANCE):
+    """PageRank over {node: [neighbours]} that always restarts at your artists
+
+    `personalization` is {node: weight}. A random walk follows an edge with
+    probability `damping` and otherwise jumps back to a node picked by
+    weight; walks reaching a node with no known edges jump back too. The
+    result is {node: probability}, summing to 1, so acts near many of your
+    heavily played artists score highest.
+    """
+    total = sum(personalization.values())
+    restart = {node: weight / total for node, weight in personalization.items()}
+    rank = dict(restart)
+
+    for _ in range(iterations):
+        new_rank = {node: (1 - damping) * p for node, p in restart.items()}
+        dangling = 0.0
+        for node, r in rank.items():
+            neighbours = edges.get(node)
+            if neighbours:
+                share = damping * r / len(neighbours)
+                for neighbour in neighbours:
+                    new_rank[neighbour] = new_rank.get(neighbour, 0.0) + share
+            else:
+                dangling += damping * r
+        for node, p in restart.items():
+            new_rank[node] += dangling * p
+
+        delta = sum(abs(r - rank.get(node, 0.0)) for node, r in new_rank.items())
+        rank = new_rank
+        if delta < tolerance:
+            break
+    return rank
+
+def seed_weights(library):
+    """{Spotify id: total track count} for library artists with an id"""
+    weights = {}
+    for name, ids, counts in library.playlists:
+        for artist_id, count in zip(ids, counts):
+            spotify_id = library.spotify_ids[artist_id]
+            if spotify_id:
+                weights[spotify_id] = weights.get(spotify_id, 0) + count
+    return weights
+
+def unmatched_acts(library, lineup, act_ids):
+    """{act: Spotify id} for resolved lineup acts your library does not match"""
+    spotify_index = lineup.spotify_index(act_ids)
+    matched = {slot['artist'] for slots in library.match(lineup.index, spotify_index).values() for slot in slots}
+    return {act: spotify_id for act, spotify_id in act_ids.items()
+            if act not in matched and lineup.slots_for(act)}
+
+def discover(library, lineup, act_ids, graph, depth=MAX_DEPTH, max_artists=MAX_ARTISTS, damping=DAMPING):
+    """Unmatched lineup acts scored by personalized PageRank from your artists
+
+    Returns [(score, act, path)] best first, where path is the chain of
+    artist names the crawl followed, from the act back to your artist.
+    """
+    seeds = seed_weights(library)
+    if not seeds:
+        return []
+    names = {spotify_id: library.names[i] for i, spotify_id in enumerate(library.spotify_ids) if spotify_id}
+
+    reached, expanded = graph.crawl(sorted(seeds, key=lambda s: (-seeds[s], s)), depth, max_artists)
+    rank = personalized_pagerank(graph.adjacency(expanded), seeds, damping)
+
+    discoveries = []
+    for act, spotify_id in unmatched_acts(library, lineup, act_ids).items():
+        score = rank.get(spotify_id, 0.0)
+        if spotify_id not in reached or score <= 0:
+            continue
+        path = []
+        node = spotify_id
+        while node is not None:
+            path.append(names.get(node) or graph.names.get(node, node))
+            node = reached[node][1]
+        path[0] = act
+        discoveries.append((score, act, path))
+
+    discoveries.sort(key=lambda entry: (-entry[0], entry[1]))
+    return discoveries
+
+def render_discoveries(discoveries, lineup, top=None):
+    """The discoveries file as a single string"""
+    lines = ["GLASTONBURY 2025 - ACTS YOU MIGHT LIKE", "=" * 50, ""]
+
+    for rank, (score, act, path) in enumerate(discoveries[:top], 1):
+        lines.append(f"{rank:>3}. {act} ({score:.3%})")
+        lines.append(f"     {' -> '.join(reversed(path))}")
+        for slot in lineup.slots_for(act):
+            lines.append(f"     {slot['day']} {format_minutes(slot['start'])} @ {slot['stage']}")
+
+    return "\n".join(lines) + "\n"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find lineup acts related to the artists you listen to")
+    parser.add_argument('--depth', type=int, default=MAX_DEPTH,
+                        help=f"related-artist hops out from your artists (default: {MAX_DEPTH})")
+    parser.add_argument('--max-artists', type=int, default=MAX_ARTISTS,
+                        help=f"artists to expand at most, most played first (default: {MAX_ARTISTS})")
+    parser.add_argument('--workers', type=int, default=CRAWL_WORKERS,
+                        help=f"requests in flight at once (default: {CRAWL_WORKERS})")
+    parser.add_argument('--damping', type=float, default=DAMPING,
+                        help=f"PageRank damping, lower stays closer to your artists (default: {DAMPING})")
+    parser.add_argument('--cache-file', default=GRAPH_CACHE_FILE,
+                        help=f"related-artist cache (default: {GRAPH_CACHE_FILE})")
+    parser.add_argument('--ttl-days', type=float, default=CACHE_TTL / 86400,
+                        help=f"days before an artist's related artists are fetched again (default: {CACHE_TTL // 86400})")
+    parser.add_argument('--top', type=int, default=50, help="acts to list (default: 50)")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Crawl related artists and write the discoveries"""
+    print("=== GLASTONBURY 2025 - DISCOVERY ===\n")
+
+    try:
+        library = load_library()
+        lineup = CompiledLineup.load()
+        act_ids = load_act_ids()
+        if not act_ids:
+            print(f"No resolved lineup acts in {RESOLVER_CACHE_FILE}; run artist_resolver.py first.")
+            return
+        if not any(library.spotify_ids):
+            print("Your library has no Spotify artist ids; re-run all_playlists_extractor.py --compact.")
+            return
+
+        # Same authenticated, rate-limited client as the extractors
+        from all_playlists_extractor import setup_spotify_client
+        scheduler = RequestScheduler()
+        graph = RelatedArtistGraph(setup_spotify_client(scheduler), load_graph_cache(args.cache_file),
+                                   args.ttl_days * 86400, args.workers)
+
+        print("Crawling related artists...")
+        discoveries = discover(library, lineup, act_ids, graph, args.depth, args.max_artists, args.damping)
+        save_graph_cache(graph.cache, args.cache_file)
+
+        print(f"Fetched {graph.fetched} artists ({graph.failed} failed), {len(graph.cache)} in {args.cache_file}")
+        report_stats(scheduler)
+        print()
+
+        if not discoveries:
+            print("No unmatched lineup acts are related to your artists.")
+            return
+        for score, act, path in discoveries[:10]:
+            print(f"* {act} ({score:.3%}), via {path[-1]}")
+
+        write_text(DISCOVERY_FILE, render_discoveries(discoveries, lineup, args.top))
+        print(f"\nDiscoveries saved to: {DISCOVERY_FILE}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('artist_graph', args):
+        run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import json
+import metrics
+from data_cache import load_cached
+
+LIBRARY_FILE = 'all_playlists_artists.json'
+
+def normalize_name(name):
+    """Simple normalization - just lowercase and remove 'the' prefix"""
+    name = name.lower().strip()
+    if name.startswith('the '):
+        name = name[4:]
+    return name
+
+def iter_lineup_slots(lineup_data):
+    """Yield every stage/day/artist slot in lineup order"""
+    order = 0
+    for stage, days in lineup_data.items():
+        is_broadcast = "(broadcast)" in stage
+
+        for day, artists in days.items():
+            for artist_info in artists:
+                yield {
+                    'artist': artist_info['artist'],
+                    'time': artist_info['time'],
+                    'stage': stage,
+                    'day': day,
+                    'broadcast': is_broadcast,
+                    'order': order
+                }
+                order += 1
+
+def match_artists(artist_names, lineup_index, normalized=None):
+    """Match each artist name with a single index lookup
+
+    `normalized` optionally maps names to their already normalized form.
+    Returns a list of (artist_name, slots) pairs in input order, skipping
+    artists that are not on the lineup.
+    """
+    if normalized is None:
+        normalized = {}
+
+    matches = []
+    for artist_name in artist_names:
+        key = normalized.get(artist_name)
+        if key is None:
+            key = normalize_name(artist_name)
+        slots = lineup_index.get(key)
+        if slots:
+            matches.append((artist_name, slots))
+    return matches
+
+def compile_library(data):
+    """A CompactLibrary from either extractor file format"""
+    # Imported here: compact_library itself builds on normalize_name
+    from compact_library import CompactLibrary
+    return CompactLibrary.from_json(data)
+
+@metrics.timed('load library')
+def load_library(path=LIBRARY_FILE, use_cache=True):
+    """Load the extractor output as a CompactLibrary, cached next to the JSON"""
+    if use_cache:
+        return load_cached(path, compile_library)
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile_library(json.load(f))
\ No newline at end of file
@@ -0,0 +1,168 @@
+import json
+import os
+import time
+import argparse
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from fuzzy_matching import PARENTHETICAL, fold, clean_name
+from lineup_model import CompiledLineup, LINEUP_FILE
+from request_scheduler import RequestScheduler, report_stats
+
+RESOLVER_CACHE_FILE = 'lineup_artist_ids.json'
+
+# How long a resolved id is trusted, and how soon an act that could not be
+# found is searched for again
+CACHE_TTL = 30 * 24 * 60 * 60
+MISS_TTL = 24 * 60 * 60
+
+# Search requests in flight at once (the RequestScheduler still applies)
+RESOLVE_WORKERS = 4
+SEARCH_LIMIT = 10
+
+def search_key(name):
+    """Compare names the way fuzzy matching cleans them"""
+    return clean_name(fold(name))
+
+def pick_artist(act, candidates):
+    """The search result whose cleaned name equals the act's, if any
+
+    Results come back in Spotify's relevance order; among equal names the
+    most popular wins, so a famous act beats a namesake bedroom project.
+    """
+    key = search_key(act)
+    same_name = [artist for artist in candidates if artist and search_key(artist['name']) == key]
+    if not same_name:
+        return None
+    return max(same_name, key=lambda artist: artist.get('popularity') or 0)
+
+def search_artist(sp, act):
+    """Search Spotify for a lineup act; the matching artist object or None"""
+    query = PARENTHETICAL.sub('', act).strip()
+    results = sp.search(q=f'artist:"{query}"', type='artist', limit=SEARCH_LIMIT)
+    return pick_artist(query, results['artists']['items'])
+
+def load_resolver_cache(path=RESOLVER_CACHE_FILE):
+    """Load the act -> Spotify id cache (empty if missing)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {path}: {e}")
+        return {}
+
+def save_resolver_cache(cache, path=RESOLVER_CACHE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+
+def load_act_ids(path=RESOLVER_CACHE_FILE):
+    """{act: Spotify id} for every resolved act in a cache, ignoring expiry
+
+    The matchers run offline, so a stale id is still better than none;
+    refresh the cache with artist_resolver.py.
+    """
+    return {act: entry['id'] for act, entry in load_resolver_cache(path).items() if entry.get('id')}
+
+class ArtistResolver:
+    """Resolve lineup act names to Spotify artist ids, once
+
+    Results, including acts with no matching artist, are kept in a cache
+    dict ({act: {'id', 'name', 'resolved_at'}}) and reused until they are
+    older than `ttl` (or `miss_ttl` for misses). Only expired or unknown
+    acts are searched, on at most `workers` threads.
+    """
+
+    def __init__(self, sp, cache=None, ttl=CACHE_TTL, miss_ttl=MISS_TTL, workers=RESOLVE_WORKERS):
+        self.sp = sp
+        self.cache = {} if cache is None else cache
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.workers = workers
+        self.searched = 0
+        self.failed = 0
+
+    def is_fresh(self, entry, now):
+        ttl = self.ttl if entry.get('id') else self.miss_ttl
+        return now - entry.get('resolved_at', 0) < ttl
+
+    def search(self, act):
+        try:
+            return act, search_artist(self.sp, act), None
+        except Exception as e:
+            return act, None, e
+
+    @metrics.timed('resolve acts')
+    def resolve(self, acts):
+        """{act: Spotify id} for the acts that have one"""
+        acts = list(dict.fromkeys(acts))
+        now = time.time()
+        stale = [act for act in acts if act not in self.cache or not self.is_fresh(self.cache[act], now)]
+        metrics.count('resolver_cache.hits', len(acts) - len(stale))
+        metrics.count('resolver_cache.misses', len(stale))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                for act, artist, error in pool.map(self.search, stale):
+                    self.searched += 1
+                    if error is not None:
+                        # Keep whatever was cached before; try again next run
+                        self.failed += 1
+                        print(f"Could not resolve '{act}': {error}")
+                        continue
+                    self.cache[act] = {
+                        'id': artist['id'] if artist else None,
+                        'name': artist['name'] if artist else None,
+                        'resolved_at': now
+                    }
+
+        return {act: self.cache[act]['id'] for act in acts
+                if act in self.cache and self.cache[act].get('id')}
+
+def resolve_lineup(sp, lineup, cache_path=RESOLVER_CACHE_FILE, ttl=CACHE_TTL, workers=RESOLVE_WORKERS):
+    """Resolve every act of a CompiledLineup, updating the cache file"""
+    resolver = ArtistResolver(sp, load_resolver_cache(cache_path), ttl, workers=workers)
+    act_ids = resolver.resolve(lineup.artists)
+    save_resolver_cache(resolver.cache, cache_path)
+    return act_ids, resolver
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve Glastonbury lineup acts to Spotify artist ids")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    parser.add_argument('--cache-file', default=RESOLVER_CACHE_FILE,
+                        help=f"act -> Spotify id cache (default: {RESOLVER_CACHE_FILE})")
+    parser.add_argument('--ttl-days', type=float, default=CACHE_TTL / 86400,
+                        help=f"days before a resolved id is looked up again (default: {CACHE_TTL // 86400})")
+    parser.add_argument('--workers', type=int, default=RESOLVE_WORKERS,
+                        help=f"searches in flight at once (default: {RESOLVE_WORKERS})")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Resolve the lineup and update the id cache"""
+    try:
+        # Same authenticated, rate-limited client as the extractors
+        from all_playlists_extractor import setup_spotify_client
+        scheduler = RequestScheduler()
+        sp = setup_spotify_client(scheduler)
+        lineup = CompiledLineup.load(args.lineup)
+
+        print("Resolving lineup acts to Spotify artist ids...")
+        act_ids, resolver = resolve_lineup(sp, lineup, args.cache_file, args.ttl_days * 86400, args.workers)
+
+        acts = len(set(lineup.artists))
+        print(f"\nResolved {len(act_ids)} of {acts} acts "
+              f"({resolver.searched} searched, {acts - resolver.searched} from cache, {resolver.failed} failed)")
+        print(f"Ids saved to: {args.cache_file}")
+        report_stats(scheduler)
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('artist_resolver', args):
+        run(args)
+
+if __name__ == "__main__":
+    main()
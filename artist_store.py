@@ -0,0 +1,237 @@
+import sqlite3
+import argparse
+from artist_matching import LIBRARY_FILE, normalize_name, load_library
+from lineup_model import CompiledLineup, LINEUP_FILE
+
+STORE_FILE = 'glastonbury.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    playlist_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    snapshot_id TEXT,
+    position INTEGER NOT NULL DEFAULT 0,
+    total_tracks INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS artists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    normalized TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artists_normalized ON artists (normalized);
+CREATE TABLE IF NOT EXISTS playlist_artists (
+    playlist_id INTEGER NOT NULL REFERENCES playlists (id) ON DELETE CASCADE,
+    artist_id INTEGER NOT NULL REFERENCES artists (id),
+    track_count INTEGER NOT NULL,
+    PRIMARY KEY (playlist_id, artist_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS playlist_artists_artist ON playlist_artists (artist_id);
+CREATE TABLE IF NOT EXISTS lineup_slots (
+    slot_order INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    day TEXT NOT NULL,
+    day_index INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL,
+    broadcast INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lineup_slots_normalized ON lineup_slots (normalized);
+CREATE INDEX IF NOT EXISTS lineup_slots_stage_day ON lineup_slots (stage, day);
+CREATE INDEX IF NOT EXISTS lineup_slots_day_start ON lineup_slots (day_index, start);
+"""
+
+class ArtistStore:
+    """SQLite store for extracted playlists and the parsed lineup
+
+    Playlists are upserted one at a time, so a library can be written as it
+    is extracted and never has to be held in memory at once. Artist names
+    are stored once with their normalize_name() form, which is indexed
+    along with the lineup's normalized names, stages and days, so matching
+    is an indexed join rather than a scan of every playlist.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def snapshot_id(self, playlist_key):
+        """Stored snapshot_id of a playlist (None if missing)"""
+        row = self.conn.execute("SELECT snapshot_id FROM playlists WHERE playlist_key = ?",
+                                (playlist_key,)).fetchone()
+        return row[0] if row else None
+
+    def upsert_playlist(self, playlist_key, name, artist_counts, snapshot_id=None, position=0):
+        """Insert or replace one playlist and its artist counts
+
+        playlist_key is the Spotify playlist id (or the name for libraries
+        imported from JSON). Playlists are listed by position, so they can
+        be upserted in any order.
+        """
+        with self.conn:
+            playlist_id = self.conn.execute(
+                """INSERT INTO playlists (playlist_key, name, snapshot_id, position, total_tracks)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (playlist_key) DO UPDATE SET
+                       name = excluded.name,
+                       snapshot_id = excluded.snapshot_id,
+                       position = excluded.position,
+                       total_tracks = excluded.total_tracks
+                   RETURNING id""",
+                (playlist_key, name, snapshot_id, position, sum(artist_counts.values()))).fetchone()[0]
+
+            self.conn.executemany(
+                "INSERT INTO artists (name, normalized) VALUES (?, ?) ON CONFLICT (name) DO NOTHING",
+                ((artist, normalize_name(artist)) for artist in artist_counts))
+            self.conn.execute("DELETE FROM playlist_artists WHERE playlist_id = ?", (playlist_id,))
+            self.conn.executemany(
+                """INSERT INTO playlist_artists (playlist_id, artist_id, track_count)
+                   SELECT ?, id, ? FROM artists WHERE name = ?""",
+                ((playlist_id, count, artist) for artist, count in artist_counts.items()))
+
+    def set_positions(self, playlist_keys):
+        """Reorder stored playlists to follow playlist_keys"""
+        with self.conn:
+            self.conn.executemany("UPDATE playlists SET position = ? WHERE playlist_key = ?",
+                                  enumerate(playlist_keys))
+
+    def remove_playlists_except(self, playlist_keys):
+        """Delete stored playlists whose key is not in playlist_keys"""
+        keep = set(playlist_keys)
+        with self.conn:
+            stale = [(key,) for (key,) in self.conn.execute("SELECT playlist_key FROM playlists")
+                     if key not in keep]
+            self.conn.executemany("DELETE FROM playlists WHERE playlist_key = ?", stale)
+        return len(stale)
+
+    def import_library(self, library):
+        """Upsert every playlist of a CompactLibrary (see artist_matching.load_library)"""
+        for position, (playlist_name, artist_counts) in enumerate(library.iter_artist_counts()):
+            self.upsert_playlist(playlist_name, playlist_name, artist_counts, position=position)
+
+    def sync_lineup(self, lineup):
+        """Replace the stored lineup slots with a CompiledLineup's"""
+        with self.conn:
+            self.conn.execute("DELETE FROM lineup_slots")
+            self.conn.executemany(
+                """INSERT INTO lineup_slots (slot_order, artist, normalized, stage, day, day_index,
+                                             time, start, "end", broadcast)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                ((slot['order'], slot['artist'], normalize_name(slot['artist']), slot['stage'], slot['day'],
+                  slot['day_index'], slot['time'], slot['start'], slot['end'], slot['broadcast'])
+                 for slot in lineup.slots))
+
+    def playlist_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM playlists").fetchone()[0]
+
+    def iter_playlist_artists(self):
+        """(playlist name, artist) for every stored pair, in playlist then artist order"""
+        return self.conn.execute(
+            """SELECT p.name, a.name FROM playlists p
+               JOIN playlist_artists pa ON pa.playlist_id = p.id
+               JOIN artists a ON a.id = pa.artist_id
+               ORDER BY p.position, p.id, a.name""")
+
+    def iter_artist_names(self):
+        """Every distinct stored artist name"""
+        for (name,) in self.conn.execute("SELECT name FROM artists WHERE id IN (SELECT artist_id FROM playlist_artists)"):
+            yield name
+
+    def matched_slots(self):
+        """(slot order, playlist artist) for every lineup slot with a match
+
+        Like broadcast_matcher.find_library_matches, the first matching
+        artist in sorted order wins a slot.
+        """
+        return self.conn.execute(
+            """SELECT s.slot_order, MIN(a.name)
+               FROM lineup_slots s
+               JOIN artists a ON a.normalized = s.normalized
+               WHERE EXISTS (SELECT 1 FROM playlist_artists pa WHERE pa.artist_id = a.id)
+               GROUP BY s.slot_order
+               ORDER BY s.slot_order""").fetchall()
+
+    def playlist_matches(self):
+        """(playlist name, playlist artist, lineup act) in playlist then artist order
+
+        The lineup act is the first slot's act for the artist's normalized
+        name, as in all_playlists_matcher.find_library_matches.
+        """
+        return self.conn.execute(
+            """SELECT p.name, a.name,
+                      (SELECT s.artist FROM lineup_slots s WHERE s.normalized = a.normalized
+                       ORDER BY s.slot_order LIMIT 1)
+               FROM playlists p
+               JOIN playlist_artists pa ON pa.playlist_id = p.id
+               JOIN artists a ON a.id = pa.artist_id
+               WHERE a.normalized IN (SELECT normalized FROM lineup_slots)
+               ORDER BY p.position, p.id, a.name""").fetchall()
+
+    def playlists_with_acts(self, stage=None, day=None):
+        """(playlist, playlist artist, act, stage, day, time) for acts on a stage and/or day"""
+        query = """SELECT p.name, a.name, s.artist, s.stage, s.day, s.time
+                   FROM lineup_slots s
+                   JOIN artists a ON a.normalized = s.normalized
+                   JOIN playlist_artists pa ON pa.artist_id = a.id
+                   JOIN playlists p ON p.id = pa.playlist_id"""
+        conditions, params = [], []
+        if stage is not None:
+            conditions.append("s.stage = ?")
+            params.append(stage)
+        if day is not None:
+            conditions.append("s.day = ?")
+            params.append(day)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY s.day_index, s.start, s.\"end\", p.position, p.id, a.name"
+        return self.conn.execute(query, params).fetchall()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load playlists and the lineup into SQLite and query them")
+    parser.add_argument('--db', default=STORE_FILE, help=f"SQLite database (default: {STORE_FILE})")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('import', help="import an extractor JSON file")
+    load.add_argument('library', nargs='?', default=LIBRARY_FILE)
+
+    query = commands.add_parser('query', help="playlists containing acts on a stage and/or day")
+    query.add_argument('--stage')
+    query.add_argument('--day')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with ArtistStore(args.db) as store:
+        store.sync_lineup(CompiledLineup.load(args.lineup))
+
+        if args.command == 'import':
+            library = load_library(args.library, use_cache=False)
+            store.import_library(library)
+            print(f"Imported {len(library.playlists)} playlists into {args.db}")
+            return
+
+        rows = store.playlists_with_acts(args.stage, args.day)
+        for playlist_name, playlist_artist, act, stage, day, time in rows:
+            print(f"{day} {time} - {act} @ {stage} (from '{playlist_name}')")
+        print(f"\n{len(rows)} matches")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import argparse
+import metrics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from artist_matching import LIBRARY_FILE, load_library
+from lineup_model import CompiledLineup, LINEUP_FILE
+from fuzzy_matching import DEFAULT_THRESHOLD
+from cli import add_match_arguments
+from artist_resolver import load_act_ids
+from schedule_export import SCHEDULE_TITLE, add_export_argument, export_schedule, export_targets
+import broadcast_matcher
+
+# Subdirectory of the output directory for the --export schedules, kept
+# apart so no user's export can share a name with another user's results
+EXPORT_DIR = 'schedules'
+
+# Lineup shared by every job in a worker process, set once by init_worker
+_lineup = None
+_fuzzy_index = None
+_spotify_index = None
+
+def find_user_libraries(source):
+    """(user, library path) pairs from a directory or a manifest file
+
+    A directory may hold one `<user>.json` library per user or one
+    `<user>/all_playlists_artists.json` per user. A manifest lists one
+    library path per line, relative to the manifest, optionally as
+    `user<TAB>path`; blank lines and lines starting with '#' are skipped.
+    Raises ValueError if a user name is unsafe or taken twice (see
+    check_user_names).
+    """
+    users = []
+    if os.path.isdir(source):
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            if entry.is_file() and entry.name.endswith('.json'):
+                users.append((entry.name[:-len('.json')], entry.path))
+            elif entry.is_dir():
+                path = os.path.join(entry.path, LIBRARY_FILE)
+                if os.path.isfile(path):
+                    users.append((entry.name, path))
+        return check_user_names(users)
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '\t' in line:
+                user, path = (part.strip() for part in line.split('\t', 1))
+            else:
+                path = line
+                user = os.path.splitext(os.path.basename(path))[0]
+                if user == os.path.splitext(LIBRARY_FILE)[0]:
+                    user = os.path.basename(os.path.dirname(path)) or user
+            users.append((user, os.path.join(base, path)))
+    return check_user_names(users)
+
+def check_user_names(users):
+    """users, if every name is a plain file name and no two are the same
+
+    Names become `<out_dir>/<user>.json`, so one with a path separator (or
+    '.' / '..') could write outside out_dir, and two users with the same
+    name, ignoring case, would overwrite each other's results. Raises
+    ValueError naming the offenders otherwise.
+    """
+    unsafe = [user for user, path in users
+              if user in ('', '.', '..') or '\0' in user or os.path.basename(user) != user
+              or (os.altsep and os.altsep in user)]
+    if unsafe:
+        raise ValueError(f"unsafe user name(s): {', '.join(map(repr, unsafe))}")
+
+    seen = {}
+    duplicates = []
+    for user, path in users:
+        key = user.casefold()
+        if key in seen:
+            duplicates.append(f"{user!r} ({seen[key]}, {path})")
+        seen[key] = path
+    if duplicates:
+        raise ValueError(f"duplicate user name(s): {'; '.join(duplicates)}")
+    return users
+
+def init_worker(lineup, fuzzy_index, spotify_index=None):
+    """Keep the compiled lineup for every job this worker process runs"""
+    global _lineup, _fuzzy_index, _spotify_index
+    _lineup = lineup
+    _fuzzy_index = fuzzy_index
+    _spotify_index = spotify_index
+
+def match_user(user, path, out_dir, threshold=DEFAULT_THRESHOLD, use_cache=False, export=()):
+    """Match one user's library and write `<out_dir>/<user>.json`
+
+    With export formats (see schedule_export), the user's schedule is also
+    written to `<out_dir>/schedules/<user>.<format>` for each.
+
+    Returns a summary dict; errors are reported in it rather than raised
+    so one bad library does not stop the batch.
+    """
+    summary = {'user': user, 'artists': 0, 'broadcast': 0, 'non_broadcast': 0, 'error': None}
+    try:
+        library = load_library(path, use_cache)
+        broadcast_matches, non_broadcast_matches = broadcast_matcher.find_library_matches(
+            library, _lineup.index, _fuzzy_index, threshold, _spotify_index)
+        # Sorted once, for the JSON and every export format
+        matches = broadcast_matcher.sort_by_time(broadcast_matches + non_broadcast_matches)
+        broadcast_matches = [match for match in matches if match['broadcast']]
+        non_broadcast_matches = [match for match in matches if not match['broadcast']]
+
+        with open(os.path.join(out_dir, f"{user}.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                'user': user,
+                'library': path,
+                'broadcast': broadcast_matches,
+                'non_broadcast': non_broadcast_matches
+            }, f, indent=2, ensure_ascii=False)
+
+        if export:
+            export_schedule(matches, export_targets(os.path.join(out_dir, EXPORT_DIR, user), export),
+                            f"{SCHEDULE_TITLE} ({user})", ordered=True)
+
+        summary['artists'] = len(library)
+        summary['broadcast'] = len(broadcast_matches)
+        summary['non_broadcast'] = len(non_broadcast_matches)
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+    return summary
+
+def report_progress(done, total, artists, started):
+    elapsed = time.perf_counter() - started
+    users_rate = done / elapsed if elapsed else 0.0
+    artists_rate = artists / elapsed if elapsed else 0.0
+    print(f"[{done}/{total}] {elapsed:.1f}s, {users_rate:,.1f} users/s, {artists_rate:,.0f} artists/s")
+
+@metrics.timed('match users')
+def run_batch(users, out_dir, lineup, workers=None, fuzzy=False, threshold=DEFAULT_THRESHOLD,
+              use_cache=False, progress_every=2.0, act_ids=None, export=()):
+    """Match every (user, path) in a process pool sharing one compiled lineup
+
+    The lineup (and fuzzy index) is built once here and handed to each
+    worker process when it starts, so per-user work is only loading that
+    user's library, matching and writing results. With act_ids (see
+    artist_resolver) artists also match on Spotify id, and with export
+    formats each user's schedule is exported too. Returns the per-user
+    summaries in completion order. Raises ValueError for unsafe or
+    duplicate user names (see check_user_names).
+    """
+    check_user_names(users)
+    os.makedirs(os.path.join(out_dir, EXPORT_DIR) if export else out_dir, exist_ok=True)
+    fuzzy_index = lineup.fuzzy_index if fuzzy else None
+    spotify_index = lineup.spotify_index(act_ids) if act_ids else None
+    workers = workers or os.cpu_count() or 1
+
+    summaries = []
+    artists = 0
+    started = time.perf_counter()
+    last_report = started
+
+    if workers == 1:
+        # No pool, no pickling; same code path as a worker process
+        init_worker(lineup, fuzzy_index, spotify_index)
+        results = (match_user(user, path, out_dir, threshold, use_cache, export) for user, path in users)
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=init_worker,
+                                       initargs=(lineup, fuzzy_index, spotify_index))
+        futures = [executor.submit(match_user, user, path, out_dir, threshold, use_cache, export)
+                   for user, path in users]
+        results = (future.result() for future in as_completed(futures))
+
+    try:
+        for summary in results:
+            summaries.append(summary)
+            artists += summary['artists']
+            if summary['error']:
+                print(f"Error matching {summary['user']}: {summary['error']}")
+
+            now = time.perf_counter()
+            if progress_every and now - last_report >= progress_every:
+                report_progress(len(summaries), len(users), artists, started)
+                last_report = now
+    finally:
+        if workers != 1:
+            executor.shutdown(cancel_futures=True)
+
+    report_progress(len(summaries), len(users), artists, started)
+    return summaries
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match many users' playlist libraries against the Glastonbury lineup")
+    parser.add_argument('source', help="directory of user libraries, or a manifest file listing them")
+    parser.add_argument('--out', default='batch_results', help="directory for the per-user results (default: batch_results)")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    add_match_arguments(parser)
+    parser.add_argument('--cache', action='store_true',
+                        help="keep a binary cache of each user library for repeat runs")
+    add_export_argument(parser, f"<out>/{EXPORT_DIR}/<user>")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Match every user's library found under the source"""
+    print("=== GLASTONBURY 2025 - BATCH MATCHER ===\n")
+
+    try:
+        users = find_user_libraries(args.source)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not users:
+        print(f"No user libraries found in {args.source}")
+        return 1
+
+    lineup = CompiledLineup.load(args.lineup)
+    print(f"Matching {len(users)} users against {len(lineup.slots)} sets "
+          f"with {args.workers or os.cpu_count() or 1} workers\n")
+
+    act_ids = None if args.no_ids else load_act_ids()
+    summaries = run_batch(users, args.out, lineup, args.workers, args.fuzzy, args.threshold, args.cache,
+                          act_ids=act_ids, export=args.export or ())
+
+    failed = sum(1 for s in summaries if s['error'])
+    broadcast = sum(s['broadcast'] for s in summaries)
+    non_broadcast = sum(s['non_broadcast'] for s in summaries)
+    print(f"\nMatched {len(summaries) - failed} users ({failed} failed)")
+    print(f"  - {broadcast} broadcast and {non_broadcast} non-broadcast matches in total")
+    print(f"Results saved to: {args.out}/")
+    return 1 if failed else 0
+
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('batch_matcher', args):
+        return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
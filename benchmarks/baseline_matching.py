@@ -0,0 +1,33 @@
+"""Dict-based exact matchers, the baseline the benchmarks compare against.
+
+These match the extractor's all_playlists_artists.json structure
+directly, name by name, as the matchers did before CompactLibrary. The
+matchers themselves use find_library_matches.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artist_matching import match_artists
+from broadcast_matcher import split_by_broadcast
+
+def broadcast_matches(playlists_data, lineup_index):
+    """broadcast_matcher.find_library_matches over playlists data"""
+    all_your_artists = set()
+    for playlist_data in playlists_data.values():
+        all_your_artists.update(playlist_data['all_artists'])
+
+    # The first artist in sorted order wins a slot
+    matched = [(artist, slots, 1.0) for artist, slots in match_artists(sorted(all_your_artists), lineup_index)]
+    return split_by_broadcast(matched)
+
+def playlist_matches(playlists_data, lineup_index):
+    """all_playlists_matcher.find_library_matches over playlists data"""
+    all_matches = {}
+    for playlist_name, playlist_data in playlists_data.items():
+        matches = [{'playlist_artist': playlist_artist, 'lineup_artist': slots[0]['artist']}
+                   for playlist_artist, slots in match_artists(playlist_data['all_artists'], lineup_index)]
+        if matches:
+            all_matches[playlist_name] = matches
+    return all_matches
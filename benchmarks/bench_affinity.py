@@ -0,0 +1,58 @@
+"""Affinity scoring: Python dict loop vs the NumPy playlist x act matrix.
+
+Run from the repository root:
+
+    python benchmarks/bench_affinity.py --artists 1000000 --playlists 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from affinity import affinity_matrix, score_acts
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {time.perf_counter() - start:8.4f}s")
+    return result
+
+def dict_scores(library, matched):
+    """The same equal-weight scores with a loop over {artist: count} dicts"""
+    scores = {}
+    for name, artist_counts in library.iter_artist_counts():
+        total = sum(artist_counts.values())
+        for artist, count in artist_counts.items():
+            slots = matched.get(library.artist_id(artist))
+            if slots:
+                act = slots[0]['artist']
+                scores[act] = scores.get(act, 0) + count / total
+    return {act: score / len(library.playlists) for act, score in scores.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=300000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=3000)
+    args = parser.parse_args()
+
+    lineup_data = make_lineup()
+    lineup = CompiledLineup(lineup_data)
+    library = CompactLibrary.from_playlists_data(make_library(lineup_data, args.artists, args.playlists))
+    matched = library.match(lineup.index)
+    print(f"{len(library)} distinct artists in {len(library.playlists)} playlists, "
+          f"{len(matched)} on the lineup\n")
+
+    expected = timed("dict loop", lambda: dict_scores(library, matched))
+    acts, matrix, totals = timed("NumPy matrix build", lambda: affinity_matrix(library, matched))
+    scores, _ = timed("NumPy scoring", lambda: score_acts(matrix, totals))
+
+    worst = max(abs(expected.get(act, 0) - score) for act, score in zip(acts, scores.tolist()))
+    print(f"\nscores agree: {set(expected) == set(acts) and worst < 1e-12} (max difference {worst:.1e})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Batch matcher throughput for many synthetic users at several pool sizes.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch.py --users 500 --artists 5000 --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_matcher import find_user_libraries, run_batch
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library, write_json
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--artists', type=int, default=5000, help="playlist/artist entries per user")
+    parser.add_argument('--playlists', type=int, default=50, help="playlists per user")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--fuzzy', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        users_dir = os.path.join(workdir, 'users')
+        os.makedirs(users_dir)
+        lineup_data = make_lineup()
+        for n in range(args.users):
+            write_json(make_library(lineup_data, args.artists, args.playlists, seed=n),
+                       os.path.join(users_dir, f"user{n:05d}.json"))
+
+        lineup = CompiledLineup(lineup_data)
+        users = find_user_libraries(users_dir)
+        print(f"{len(users)} users x {args.artists} entries, {os.cpu_count()} CPUs\n")
+
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            out_dir = os.path.join(workdir, f"out{workers}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                run_batch(users, out_dir, lineup, workers, args.fuzzy, progress_every=0)
+                elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>3} workers {elapsed:9.3f}s  {len(users) / elapsed:9.1f} users/s  "
+                  f"{baseline / elapsed:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cold vs warm start of the matcher inputs with the binary data cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_cache.py --artists 1000000 --playlists 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artist_matching import compile_library, load_library
+from data_cache import CACHE_DIR_ENV, cache_path
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library, write_json
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {time.perf_counter() - start:8.4f}s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=200000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ[CACHE_DIR_ENV] = os.path.join(workdir, 'cache')
+        library_file = os.path.join(workdir, 'all_playlists_artists.json')
+        lineup_file = os.path.join(workdir, 'glastonbury_2025_lineup.json')
+        lineup = make_lineup()
+        write_json(lineup, lineup_file)
+        write_json(make_library(lineup, args.artists, args.playlists), library_file)
+
+        def uncached():
+            with open(library_file, 'r', encoding='utf-8') as f:
+                compile_library(json.load(f))
+            with open(lineup_file, 'r', encoding='utf-8') as f:
+                CompiledLineup(json.load(f))
+
+        def cached():
+            load_library(library_file)
+            CompiledLineup.load(lineup_file)
+
+        timed("no cache (JSON decode + normalize)", uncached)
+        timed("cold start (build + write cache)", cached)
+        timed("warm start (cache hit)", cached)
+        os.utime(library_file)
+        timed("touched source (hash check)", cached)
+        timed("warm start again", cached)
+
+        print(f"\n{os.path.getsize(library_file) / 1e6:.1f} MB JSON, "
+              f"{os.path.getsize(cache_path(library_file)) / 1e6:.1f} MB cache")
+
+if __name__ == "__main__":
+    main()
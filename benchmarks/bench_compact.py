@@ -0,0 +1,78 @@
+"""File size, resident memory and match time: extractor JSON vs compact library.
+
+Run from the repository root:
+
+    python benchmarks/bench_compact.py --artists 1000000 --playlists 1000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import all_playlists_matcher
+import broadcast_matcher
+from baseline_matching import broadcast_matches, playlist_matches
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library, write_json
+
+def resident(load):
+    """(value, bytes still allocated once load() returns)"""
+    gc.collect()
+    tracemalloc.start()
+    value = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=200000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        lineup_data = make_lineup()
+        lineup = CompiledLineup(lineup_data)
+        legacy_file = os.path.join(workdir, 'legacy.json')
+        compact_file = os.path.join(workdir, 'compact.json')
+        write_json(make_library(lineup_data, args.artists, args.playlists), legacy_file)
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            CompactLibrary.from_json(json.load(f)).save(compact_file)
+
+        def load_legacy():
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        def load_compact():
+            with open(compact_file, 'r', encoding='utf-8') as f:
+                return CompactLibrary.from_json(json.load(f))
+
+        legacy, legacy_memory = resident(load_legacy)
+        compact, compact_memory = resident(load_compact)
+
+        legacy_match = timed(lambda: (broadcast_matches(legacy, lineup.index),
+                                      playlist_matches(legacy, lineup.index)))
+        compact_match = timed(lambda: (broadcast_matcher.find_library_matches(compact, lineup.index),
+                                       all_playlists_matcher.find_library_matches(compact, lineup.index)))
+
+        print(f"{len(compact)} distinct artists in {len(compact.playlists)} playlists\n")
+        print(f"{'':<16} {'file':>10} {'resident':>10} {'match':>9}")
+        print(f"{'extractor JSON':<16} {os.path.getsize(legacy_file) / 1e6:8.1f}MB "
+              f"{legacy_memory / 1e6:8.1f}MB {legacy_match:8.4f}s")
+        print(f"{'compact':<16} {os.path.getsize(compact_file) / 1e6:8.1f}MB "
+              f"{compact_memory / 1e6:8.1f}MB {compact_match:8.4f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Lineup converter throughput and peak memory over an archive of markdown lineups.
+
+Run from the repository root:
+
+    python benchmarks/bench_converter.py --files 100 --stages 60
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lineup_converter
+from synthetic_data import make_lineup
+
+def write_markdown(lineup, path, en_dash):
+    """A lineup in the converter's input format, hyphen or en-dash style"""
+    dash = '–' if en_dash else ' - '
+    with open(path, 'w', encoding='utf-8') as f:
+        for stage, days in lineup.items():
+            for day, acts in days.items():
+                f.write(f"## {stage} - {day}\n\n")
+                for act in acts:
+                    start, end = act['time'].split('–')
+                    f.write(f"- {act['artist']}: {start}{dash}{end}\n")
+                f.write("\n")
+
+def measure(label, func, sets, size):
+    """Time a run, then repeat it under tracemalloc for its peak memory"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.3f}s  {sets / elapsed:>10,.0f} sets/s  "
+          f"{size / elapsed / 1e6:6.1f} MB/s  peak {peak / 1e6:6.2f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20, help="lineup files in the archive")
+    parser.add_argument('--stages', type=int, default=60)
+    parser.add_argument('--slots', type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sources = []
+        for n in range(args.files):
+            path = os.path.join(workdir, f"lineup{n}.md")
+            write_markdown(make_lineup(args.stages, 5, args.slots, seed=n), path, en_dash=n % 2)
+            sources.append(path)
+        size = sum(os.path.getsize(path) for path in sources)
+        sets = args.files * args.stages * 5 * args.slots
+        print(f"{args.files} files, {sets} sets, {size / 1e6:.1f} MB of markdown\n")
+
+        out_dir = os.path.join(workdir, 'json')
+        measure("one JSON file per lineup",
+                lambda: lineup_converter.main(sources + ['--out-dir', out_dir]), sets, size)
+        measure("streamed to JSON Lines",
+                lambda: lineup_converter.main(sources + ['--jsonl', os.path.join(workdir, 'all.jsonl')]),
+                sets, size)
+
+if __name__ == "__main__":
+    main()
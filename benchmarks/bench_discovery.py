@@ -0,0 +1,70 @@
+"""Related-artist discovery against the local Spotify stub: cold vs cached crawl.
+
+Lineup acts are placed among a synthetic related-artists graph; the library
+plays a fraction of the graph's artists. Run from the repository root:
+
+    python benchmarks/bench_discovery.py --artists 5000 --seeds 200 --workers 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artist_graph import RelatedArtistGraph, discover, load_graph_cache, save_graph_cache
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session
+from spotify_stub import SpotifyStub
+from synthetic_data import make_lineup, make_name, make_related, lineup_artists
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=5000, help="artists in the related-artists graph")
+    parser.add_argument('--seeds', type=int, default=200, help="of those, artists in your library")
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help="stub seconds per request")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    lineup_data = make_lineup()
+    lineup = CompiledLineup(lineup_data)
+    acts = list(dict.fromkeys(lineup_artists(lineup_data)))
+
+    artists = [{'id': f"artist{i}", 'name': make_name(rnd)} for i in range(args.artists)]
+    artists += [{'id': f"act{i}", 'name': act} for i, act in enumerate(acts)]
+    ids = [artist['id'] for artist in artists]
+    rnd.shuffle(ids)
+    act_ids = {act: f"act{i}" for i, act in enumerate(acts)}
+
+    library = CompactLibrary()
+    played = rnd.sample(artists[:args.artists], args.seeds)
+    library.add_playlist("Everything", {a['name']: rnd.randint(1, 20) for a in played},
+                         {a['name']: a['id'] for a in played})
+
+    stub_library = {'playlists': [], 'artists': artists, 'related': make_related(ids)}
+    with tempfile.TemporaryDirectory() as workdir, SpotifyStub(stub_library, latency=args.latency) as stub:
+        cache_file = os.path.join(workdir, 'related_artists.json')
+        sp = ScheduledClient(stub.client(requests_session=build_requests_session()),
+                             RequestScheduler(rate=1000, burst=100, concurrency=32, max_concurrency=64))
+        print(f"{len(ids)} artists in the graph, {args.seeds} in your library, {len(acts)} lineup acts\n")
+
+        for label in ("cold crawl", "cached crawl"):
+            graph = RelatedArtistGraph(sp, load_graph_cache(cache_file), workers=args.workers)
+            before = stub.related
+            start = time.perf_counter()
+            discoveries = discover(library, lineup, act_ids, graph, args.depth)
+            elapsed = time.perf_counter() - start
+            save_graph_cache(graph.cache, cache_file)
+            print(f"{label:<14} {elapsed:8.4f}s  {stub.related - before:>6} API calls  "
+                  f"{len(discoveries)} acts scored")
+
+        for score, act, path in discoveries[:5]:
+            print(f"  {score:.4%}  {act} ({len(path) - 1} hop(s) away)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Exporting per-user schedules to every format: one pass vs one traversal per format.
+
+Run from the repository root:
+
+    python benchmarks/bench_export.py --users 1000 --stages 60
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import broadcast_matcher
+from lineup_model import CompiledLineup
+from schedule_export import EXPORT_FORMATS, export_schedule, export_targets
+from synthetic_data import make_lineup
+
+def user_matches(lineup, count, rnd):
+    """A user's matches: `count` random sets, in lineup order like the matchers'"""
+    slots = sorted(rnd.sample(lineup.slots, min(count, len(lineup.slots))), key=lambda slot: slot['order'])
+    return broadcast_matcher.split_by_broadcast([(slot['artist'], [slot], 1.0) for slot in slots])
+
+def run(label, users, out_dir, export):
+    start = time.perf_counter()
+    for user, matches in users:
+        export(matches, os.path.join(out_dir, f"{user}_schedule"))
+    elapsed = time.perf_counter() - start
+    size = sum(entry.stat().st_size for entry in os.scandir(out_dir))
+    sets = sum(len(matches) for user, matches in users) * len(EXPORT_FORMATS)
+    print(f"{label:<28} {elapsed:8.3f}s  {len(users) / elapsed:>8,.0f} users/s  "
+          f"{sets / elapsed:>10,.0f} sets/s  {size / elapsed / 1e6:6.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--matches', type=int, default=80, help="matched sets per user")
+    parser.add_argument('--stages', type=int, default=60)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    lineup = CompiledLineup(make_lineup(args.stages, 5, 12))
+    users = []
+    for n in range(args.users):
+        broadcast_matches, non_broadcast_matches = user_matches(lineup, args.matches, rnd)
+        users.append((f"user{n}", broadcast_matches + non_broadcast_matches))
+    formats = list(EXPORT_FORMATS)
+    print(f"{args.users} users x {args.matches} sets, formats: {', '.join(formats)}\n")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, export in (
+                ("one traversal per format",
+                 lambda matches, base: [export_schedule(matches, export_targets(base, [name])) for name in formats]),
+                ("one pass, all formats",
+                 lambda matches, base: export_schedule(matches, export_targets(base, formats)))):
+            out_dir = os.path.join(workdir, label.replace(' ', '_').replace(',', ''))
+            os.makedirs(out_dir)
+            run(label, users, out_dir, export)
+
+if __name__ == "__main__":
+    main()
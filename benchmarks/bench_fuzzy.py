@@ -0,0 +1,77 @@
+"""Fuzzy matching noisy playlist artist names against a lineup.
+
+Names are lineup acts with typos, case changes, 'The' prefixes, live
+labels and collaborators, mixed with unrelated names made from the
+lineup's words and synthetic ones. Run from the repository root:
+
+    python benchmarks/bench_fuzzy.py --names 100000
+    python benchmarks/bench_fuzzy.py --names 100000 --stages 60
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy_matching import FuzzyIndex
+from lineup_model import CompiledLineup, LINEUP_FILE
+from synthetic_data import make_lineup, make_name
+
+def typo(name, rnd):
+    """name with one letter dropped, added or replaced"""
+    i = rnd.randrange(len(name))
+    letter = rnd.choice(string.ascii_lowercase)
+    return rnd.choice([name[:i] + name[i + 1:], name[:i] + letter + name[i:], name[:i] + letter + name[i + 1:]])
+
+def noisy_names(acts, count, near_share=0.05, seed=0):
+    """count distinct names, about near_share of them variants of lineup acts"""
+    rnd = random.Random(seed)
+    words = [word for act in acts for word in act.split()]
+    names = set()
+    while len(names) < count:
+        roll = rnd.random()
+        if roll < near_share:
+            act = rnd.choice(acts)
+            names.add(rnd.choice([typo(act, rnd), act.upper(), 'The ' + act, act + ' (Live)',
+                                  f"{act} feat. {make_name(rnd)}"]))
+        elif roll < 0.5:
+            name = ' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 3)))
+            names.add(name + rnd.choice(['', '', f" & {make_name(rnd)}"]))
+        else:
+            names.add(make_name(rnd) + rnd.choice(['', '', '', f" feat. {make_name(rnd)}", f" & {make_name(rnd)}"]))
+    return sorted(names)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--stages', type=int, default=None,
+                        help=f"use a synthetic lineup of this many stages instead of {LINEUP_FILE}")
+    parser.add_argument('--repeat', type=int, default=3, help="runs to take the best of")
+    args = parser.parse_args()
+
+    if args.stages:
+        lineup = CompiledLineup(make_lineup(args.stages, 3, 8))
+    else:
+        lineup = CompiledLineup.load(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                  LINEUP_FILE))
+    acts = sorted(lineup.fuzzy_index.act_slots)
+    names = noisy_names(acts, args.names)
+
+    start = time.perf_counter()
+    fuzzy_index = FuzzyIndex(lineup.slots)
+    print(f"{len(acts)} acts, {len(fuzzy_index.variants)} indexed variants "
+          f"(built in {time.perf_counter() - start:.3f}s), {len(names)} names\n")
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        matches = fuzzy_index.match_artists(names)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{'match_artists':<24} {best:8.3f}s  {len(names) / best:>10,.0f} names/s  {len(matches)} matched")
+
+if __name__ == "__main__":
+    main()
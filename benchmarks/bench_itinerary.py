@@ -0,0 +1,61 @@
+"""Clash detection and itinerary planning on a whole-festival lineup.
+
+Every set is treated as a match, so this is the worst case for the
+scheduler. Run from the repository root:
+
+    python benchmarks/bench_itinerary.py --stages 120 --days 5 --slots 12
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import broadcast_matcher
+from compact_library import CompactLibrary
+from itinerary import best_itinerary, find_clashes
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, lineup_artists
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {time.perf_counter() - start:8.4f}s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', type=int, default=120)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--slots', type=int, default=12, help="acts per stage per day")
+    parser.add_argument('--walk', type=int, default=15)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    lineup_data = make_lineup(args.stages, args.days, args.slots)
+    lineup = CompiledLineup(lineup_data)
+    library = CompactLibrary()
+    library.add_playlist("Everything", {act: rnd.randint(1, 50) for act in lineup_artists(lineup_data)})
+    broadcast, non_broadcast = broadcast_matcher.find_library_matches(library, lineup.index)
+    matches = broadcast + non_broadcast
+    totals = dict(zip(library.names, library.playlists[0][2]))
+    weight = lambda match: totals[match['playlist_artist']]
+
+    stages = sorted({match['stage'] for match in matches})
+    walk_times = {(a, b): rnd.randint(5, 30) for a in stages for b in stages if a != b}
+    print(f"{len(matches)} matched sets on {len(stages)} stages\n")
+
+    clashes = timed("sweep-line clashes", lambda: find_clashes(matches))
+    for label, walk_table in (("itinerary, no walking", None), (f"itinerary, {args.walk} min walks", None),
+                              ("itinerary, per-pair walk times", walk_times)):
+        walk = 0 if label.endswith("no walking") else args.walk
+        total, plan = timed(label, lambda: best_itinerary(matches, weight, walk, walk_table))
+        print(f"{'':<36} {len(plan)} sets, weight {total}")
+    pairs = sum(len(others) for match, others in clashes)
+    print(f"\n{pairs} clashing pairs, at most {max((len(others) for match, others in clashes), default=0)} "
+          f"sets under way at a set's start")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Time the extract -> match -> render pipeline on synthetic data.
+
+Each stage is timed once, then run again under tracemalloc for its peak
+memory. Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --artists 100000 --playlists 500
+    python benchmarks/bench_pipeline.py --fetch --fetch-playlists 40
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import all_playlists_matcher
+import broadcast_matcher
+from baseline_matching import broadcast_matches, playlist_matches
+from fuzzy_matching import FuzzyIndex
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library, make_spotify_library, lineup_artists
+
+def measure(label, func, items):
+    """Time func(), then rerun it under tracemalloc, and print one report line"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    rate = items / elapsed if elapsed else float('inf')
+    print(f"{label:<32} {elapsed:9.4f}s  {rate:14,.0f} items/s  {peak / 1e6:9.2f} MB peak")
+    return result
+
+def bench_fetch(args):
+    """Fetch a synthetic library from the local Spotify stub"""
+    import all_playlists_extractor
+    from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session
+    from spotify_stub import SpotifyStub
+
+    library = make_spotify_library(args.fetch_playlists, args.fetch_tracks)
+    tracks = sum(len(p['items']) for p in library['playlists'])
+    with SpotifyStub(library, latency=args.fetch_latency) as stub:
+        sp = ScheduledClient(stub.client(requests_session=build_requests_session()),
+                             RequestScheduler(rate=1000, burst=100, concurrency=32, max_concurrency=64))
+        for workers in (1, args.workers):
+            measure(f"fetch ({workers} workers)",
+                    lambda: all_playlists_extractor.get_all_playlists_artists(sp, workers=workers),
+                    tracks)
+    print(f"{'':<32} {tracks} tracks, {stub.bytes_sent / 1e6:.2f} MB served\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=10000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=100)
+    parser.add_argument('--stages', type=int, default=9)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--slots', type=int, default=8)
+    parser.add_argument('--fetch', action='store_true', help="also benchmark fetching from a local stub API")
+    parser.add_argument('--fetch-playlists', type=int, default=40)
+    parser.add_argument('--fetch-tracks', type=int, default=600)
+    parser.add_argument('--fetch-latency', type=float, default=0.05, help="simulated seconds per API call")
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.fetch:
+        bench_fetch(args)
+
+    lineup = make_lineup(args.stages, args.days, args.slots)
+    library = make_library(lineup, args.artists, args.playlists)
+    acts = lineup_artists(lineup)
+    entries = sum(p['unique_artists'] for p in library.values())
+    print(f"{entries} playlist artist entries in {len(library)} playlists, {len(acts)} lineup acts\n")
+
+    measure("all_playlists_matcher match",
+            lambda: playlist_matches(library, CompiledLineup(lineup).index), entries)
+    measure("broadcast_matcher match",
+            lambda: broadcast_matches(library, CompiledLineup(lineup).index), entries)
+
+    fuzzy_index = FuzzyIndex(CompiledLineup(lineup).slots)
+    unique_artists = {artist for p in library.values() for artist in p['all_artists']}
+    measure("fuzzy match (distinct artists)",
+            lambda: fuzzy_index.match_artists(unique_artists), len(unique_artists))
+
+    # The full scripts read and write fixed file names in the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            with open('glastonbury_2025_lineup.json', 'w', encoding='utf-8') as f:
+                json.dump(lineup, f, indent=2, ensure_ascii=False)
+            with open('all_playlists_artists.json', 'w', encoding='utf-8') as f:
+                json.dump(library, f, indent=2, ensure_ascii=False)
+
+            measure("all_playlists_matcher main", lambda: all_playlists_matcher.main([]), entries)
+            measure("broadcast_matcher main", lambda: broadcast_matcher.main([]), entries)
+            output = sum(os.path.getsize(name) for name in os.listdir(workdir) if name.endswith('.txt'))
+            print(f"{'':<32} {output / 1e3:.1f} kB of schedule files written")
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Fetch a synthetic library from a rate-limited local stub, with and without
+the request scheduler.
+
+Run from the repository root:
+
+    python benchmarks/bench_rate_limits.py --playlists 40 --rate-limit 50
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session
+from spotify_paging import iter_playlist_artists, user_playlist_items
+from spotify_stub import SpotifyStub
+from synthetic_data import make_spotify_library
+
+def fetch_library(sp, workers):
+    """Fetch every playlist's artist counts the way the extractor does"""
+    playlists = list(user_playlist_items(sp))
+
+    def fetch(playlist):
+        return Counter(artist['name'] for track, artist in iter_playlist_artists(sp, playlist['id']))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, playlists))
+
+def run(label, stub, sp, workers, scheduler=None):
+    stub.requests = stub.throttled = 0
+    start = time.perf_counter()
+    try:
+        result = fetch_library(sp, workers)
+        outcome = 'ok'
+    except Exception as e:
+        result, outcome = None, f"failed: {str(e).splitlines()[0]}"
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:7.2f}s  {stub.requests:5d} requests  {stub.throttled:4d} x 429  {outcome}")
+    if scheduler:
+        print(f"{'':<12} scheduler: {scheduler.stats()}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--playlists', type=int, default=40)
+    parser.add_argument('--tracks', type=int, default=600)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate-limit', type=int, default=50, help="stub requests per second")
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    args = parser.parse_args()
+
+    # spotipy logs every HTTP error; the counts below are enough
+    logging.getLogger('spotipy').setLevel(logging.CRITICAL)
+
+    library = make_spotify_library(args.playlists, args.tracks)
+    with SpotifyStub(library) as stub:
+        expected = run('unlimited', stub, stub.client(), args.workers)
+
+        stub.rate_limit, stub.retry_after = args.rate_limit, args.retry_after
+        # spotipy's default per-connection retries, no shared backoff
+        run('unscheduled', stub, stub.client(), args.workers)
+
+        scheduler = RequestScheduler(rate=args.rate_limit, burst=args.workers, concurrency=args.workers)
+        sp = ScheduledClient(stub.client(requests_session=build_requests_session()), scheduler)
+        scheduled = run('scheduled', stub, sp, args.workers, scheduler)
+
+    assert scheduled == expected, "scheduled results differ"
+
+if __name__ == "__main__":
+    main()
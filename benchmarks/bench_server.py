@@ -0,0 +1,55 @@
+"""Schedule server query latency on a whole-festival lineup, every set matched.
+
+Queries go straight to ScheduleService.handle, without HTTP. Run from the
+repository root:
+
+    python benchmarks/bench_server.py --stages 120 --days 5 --slots 12
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup, format_minutes
+from schedule_server import ScheduleService
+from watch_matcher import LiveSchedule
+from synthetic_data import DAYS, make_lineup, lineup_artists
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', type=int, default=120)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--slots', type=int, default=12, help="acts per stage per day")
+    parser.add_argument('--queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    lineup_data = make_lineup(args.stages, args.days, args.slots)
+    library = CompactLibrary()
+    library.add_playlist("Everything", {act: 1 for act in lineup_artists(lineup_data)})
+
+    start = time.perf_counter()
+    service = ScheduleService(LiveSchedule(library, CompiledLineup(lineup_data)))
+    print(f"{service.status({})['sets']} sets indexed in {(time.perf_counter() - start) * 1000:.1f}ms\n")
+
+    rnd = random.Random(0)
+    days = DAYS[-args.days:]
+    queries = {
+        "now playing (mine)": lambda day, clock: ('/now', {'day': day, 'time': clock}),
+        "next 5 broadcast sets": lambda day, clock: ('/next', {'day': day, 'time': clock, 'broadcast': '1'}),
+        "free slots 15:00-18:00": lambda day, clock: ('/free', {'day': day, 'from': '15:00', 'to': '18:00'})
+    }
+    for label, make_query in queries.items():
+        requests = [make_query(rnd.choice(days), format_minutes(rnd.randrange(11 * 60, 26 * 60)))
+                    for _ in range(args.queries)]
+        start = time.perf_counter()
+        for path, query in requests:
+            status, body = service.handle(path, query)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<28} {elapsed / args.queries * 1e6:8.1f}us per query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""JSON scan vs SQLite store for matching and a stage/day query.
+
+Run from the repository root:
+
+    python benchmarks/bench_store.py --artists 1000000 --playlists 1000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import broadcast_matcher
+from artist_matching import load_library
+from artist_store import ArtistStore
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from synthetic_data import make_lineup, make_library, write_json
+
+def timed(label, func):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.4f}s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=200000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        library_file = os.path.join(workdir, 'all_playlists_artists.json')
+        lineup_data = make_lineup()
+        library = make_library(lineup_data, args.artists, args.playlists)
+        write_json(library, library_file)
+        lineup = CompiledLineup(lineup_data)
+        stage, day = next(iter(lineup_data.items()))[0], 'Sunday'
+
+        def json_scan():
+            loaded = load_library(library_file, use_cache=False)
+            return broadcast_matcher.find_library_matches(loaded, lineup.index)
+
+        def json_query():
+            loaded = load_library(library_file, use_cache=False)
+            hits = []
+            for playlist_name, artist_counts in loaded.iter_artist_counts():
+                for artist in artist_counts:
+                    for slot in lineup.lookup(artist):
+                        if slot['stage'] == stage and slot['day'] == day:
+                            hits.append((playlist_name, artist, slot['artist']))
+            return hits
+
+        with ArtistStore(os.path.join(workdir, 'glastonbury.db')) as store:
+            timed("store import (one-off)", lambda: store.import_library(CompactLibrary.from_playlists_data(library)))
+            timed("store lineup sync", lambda: store.sync_lineup(lineup))
+            json_matches = timed("broadcast match: JSON load + scan", json_scan)
+            store_matches = timed("broadcast match: store join",
+                                  lambda: broadcast_matcher.find_store_matches(store, lineup))
+            json_hits = timed("stage/day query: JSON load + scan", json_query)
+            store_hits = timed("stage/day query: store",
+                               lambda: store.playlists_with_acts(stage, day))
+
+        print(f"\nmatches agree: {json_matches == store_matches}, "
+              f"query rows: {len(json_hits)} JSON / {len(store_hits)} store")
+
+if __name__ == "__main__":
+    main()
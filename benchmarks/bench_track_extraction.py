@@ -0,0 +1,130 @@
+"""Compare the legacy full-object track extraction with the projected,
+streaming path in spotify_paging.
+
+Run from the repository root:
+
+    python benchmarks/bench_track_extraction.py --tracks 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_paging import iter_playlist_artists, TRACK_FIELDS
+from spotify_stub import parse_fields, project
+
+def make_track(rnd, n):
+    """A track object shaped like the API's full playlist track item"""
+    artists = [{
+        'external_urls': {'spotify': f"https://open.spotify.com/artist/{n}{i}"},
+        'href': f"https://api.spotify.com/v1/artists/{n}{i}",
+        'id': f"artist{rnd.randint(0, 5000)}",
+        'name': f"Artist {rnd.randint(0, 5000)}",
+        'type': 'artist',
+        'uri': f"spotify:artist:{n}{i}"
+    } for i in range(rnd.randint(1, 3))]
+    return {
+        'added_at': '2025-01-01T00:00:00Z',
+        'added_by': {'id': 'me', 'type': 'user', 'uri': 'spotify:user:me'},
+        'is_local': False,
+        'track': {
+            'album': {
+                'album_type': 'album',
+                'artists': artists[:1],
+                'available_markets': ['GB', 'US', 'DE', 'FR', 'ES', 'IT', 'NL', 'SE'] * 10,
+                'images': [{'height': h, 'width': h, 'url': f"https://i.scdn.co/image/{n}-{h}"}
+                           for h in (640, 300, 64)],
+                'name': f"Album {n}",
+                'release_date': '2024-05-01'
+            },
+            'artists': artists,
+            'available_markets': ['GB', 'US', 'DE', 'FR', 'ES', 'IT', 'NL', 'SE'] * 10,
+            'duration_ms': 200000,
+            'explicit': False,
+            'external_ids': {'isrc': f"GB{n:010d}"},
+            'id': f"track{n}",
+            'name': f"Track {n}",
+            'popularity': 50,
+            'preview_url': None,
+            'uri': f"spotify:track:{n}"
+        }
+    }
+
+class FakeSpotify:
+    """Serves one synthetic playlist, counting bytes as if over the wire"""
+
+    def __init__(self, total_tracks, seed=0):
+        rnd = random.Random(seed)
+        self.items = [make_track(rnd, n) for n in range(total_tracks)]
+        self.bytes_received = 0
+
+    def playlist_tracks(self, playlist_id, fields=None, limit=100, offset=0):
+        page = {
+            'items': self.items[offset:offset + limit],
+            'total': len(self.items),
+            'limit': limit,
+            'offset': offset,
+            'next': offset + limit if offset + limit < len(self.items) else None
+        }
+        if fields:
+            page = project(page, parse_fields(fields))
+        body = json.dumps(page)
+        self.bytes_received += len(body)
+        return json.loads(body)
+
+    def next(self, results):
+        return self.playlist_tracks(None, limit=results['limit'], offset=results['next'])
+
+def legacy_extract(sp, playlist_id):
+    """The extractor as it was before field projection and streaming"""
+    artists = []
+    results = sp.playlist_tracks(playlist_id)
+    tracks = results['items']
+
+    while results['next']:
+        results = sp.next(results)
+        tracks.extend(results['items'])
+
+    for item in tracks:
+        if item['track'] and item['track']['artists']:
+            for artist in item['track']['artists']:
+                artists.append(artist['name'])
+
+    return artists
+
+def streaming_extract(sp, playlist_id):
+    return [artist['name'] for track_name, artist in iter_playlist_artists(sp, playlist_id)]
+
+def measure(label, extract, sp):
+    sp.bytes_received = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    artists = extract(sp, 'playlist')
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:8.3f}s  {sp.bytes_received / 1e6:9.2f} MB received  "
+          f"{peak / 1e6:8.2f} MB peak  {len(artists)} artist credits")
+    return artists, sp.bytes_received, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=10000)
+    args = parser.parse_args()
+
+    sp = FakeSpotify(args.tracks)
+    print(f"Playlist with {args.tracks} tracks (fields={TRACK_FIELDS})\n")
+    legacy, legacy_bytes, legacy_peak = measure('legacy', legacy_extract, sp)
+    streamed, streamed_bytes, streamed_peak = measure('streaming', streaming_extract, sp)
+
+    assert legacy == streamed, "extraction results differ"
+    print(f"\nPayload reduced {legacy_bytes / streamed_bytes:.1f}x, "
+          f"peak memory reduced {legacy_peak / streamed_peak:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Applying a lineup change: full re-match vs the watch mode's incremental update.
+
+Run from the repository root:
+
+    python benchmarks/bench_watch.py --artists 1000000 --playlists 1000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import broadcast_matcher
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from watch_matcher import LiveSchedule
+from synthetic_data import make_lineup, make_library
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:8.2f}ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=300000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=500)
+    args = parser.parse_args()
+
+    lineup_data = make_lineup()
+    library = CompactLibrary.from_playlists_data(make_library(lineup_data, args.artists, args.playlists))
+    live = LiveSchedule(library, CompiledLineup(lineup_data))
+    print(f"{len(library)} distinct artists, {len(live.matches)} matches\n")
+
+    # A secret set by an artist in the library, as added during the festival
+    changed = copy.deepcopy(lineup_data)
+    stage = next(iter(changed))
+    day = next(iter(changed[stage]))
+    changed[stage][day].append({'artist': library.names[0] + ' (secret set)', 'time': '23:50–00:30'})
+    changed[stage][day].append({'artist': library.names[1], 'time': '00:40–01:20'})
+    lineup = timed("compile changed lineup", lambda: CompiledLineup(changed))
+
+    def full():
+        broadcast_matches, non_broadcast_matches = broadcast_matcher.find_library_matches(library, lineup.index)
+        return broadcast_matcher.sort_by_time(broadcast_matches + non_broadcast_matches)
+
+    expected = timed("full re-match", full)
+    removed, added = timed("incremental update", lambda: live.update_lineup(lineup))
+    print(f"\n{len(removed)} removed, {len(added)} added; matches agree: {live.matches == expected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""A local stand-in for the Spotify Web API endpoints the extractors use.
+
+Serves a synthetic library over real HTTP so spotipy, the paginator and the
+request scheduler can be exercised without a network or an account. An
+optional server-side rate limit answers excess requests with 429 and a
+Retry-After header, like the real API does.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import spotipy
+
+def parse_fields(fields):
+    """Parse an API fields filter such as 'items(track(name)),total'"""
+    tree, stack, name = {}, [], ''
+    node = tree
+    for char in fields + ',':
+        if char in ',()':
+            if name:
+                node[name] = {}
+            if char == '(':
+                stack.append(node)
+                node = node[name]
+            elif char == ')':
+                node = stack.pop()
+            name = ''
+        else:
+            name += char
+    return tree
+
+def project(value, tree):
+    """Apply a parsed fields filter to a JSON value"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: project(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+class SpotifyStub:
+    """Serve `library` ({'playlists': [...]}) on a local port
+
+    Each playlist is a dict with 'id', 'name', 'snapshot_id', 'owner' and
+    'items' (playlist track items). `rate_limit` caps requests per second;
+    anything over it gets a 429 with `retry_after` seconds. `latency` adds a
+    fixed delay to every response.
+
+    GET /v1/search?type=artist searches every artist credited in the library
+    plus any in library['artists'] (dicts with 'id', 'name' and optionally
+    'popularity'), matching names that contain the query, case-insensitively.
+
+    GET /v1/artists/{id}/related-artists answers from library['related'], a
+    {artist id: [related artist ids]} mapping.
+    """
+
+    def __init__(self, library, user_id='me', rate_limit=None, retry_after=1, latency=0.0):
+        self.library = library
+        self.user_id = user_id
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.latency = latency
+
+        self.artists = {}
+        for artist in library.get('artists', []):
+            self.artists[artist['id']] = artist
+        for playlist in library['playlists']:
+            for item in playlist['items']:
+                for artist in item['track']['artists']:
+                    if artist.get('id'):
+                        self.artists.setdefault(artist['id'], artist)
+
+        self.requests = 0
+        self.searches = 0
+        self.related = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **kwargs):
+        """A spotipy client pointed at this stub"""
+        sp = spotipy.Spotify(auth='stub-token', **kwargs)
+        sp.prefix = self.url
+        return sp
+
+    def over_limit(self):
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self.recent.append(now)
+            return False
+
+    def handle(self, request):
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.over_limit():
+            self.send(request, 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                      {'Retry-After': str(self.retry_after)})
+            return
+
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        body = self.route(url.path, query)
+        if body is None:
+            self.send(request, 404, {'error': {'status': 404, 'message': 'Not found'}})
+            return
+        if query.get('fields'):
+            body = project(body, parse_fields(query['fields']))
+        self.send(request, 200, body)
+
+    def route(self, path, query):
+        if path.rstrip('/') == '/v1/me':
+            return {'id': self.user_id, 'display_name': self.user_id}
+
+        if path == '/v1/me/playlists':
+            playlists = [self.playlist_summary(p) for p in self.library['playlists']]
+            return self.page(path, playlists, query, 50)
+
+        if path == '/v1/search':
+            return self.search(path, query)
+
+        match = re.fullmatch(r'/v1/artists/(\w+)/related-artists', path)
+        if match:
+            return self.related_artists(match.group(1))
+
+        match = re.fullmatch(r'/v1/playlists/(\w+)(/items|/tracks)?', path)
+        if match:
+            playlist = self.find_playlist(match.group(1))
+            if playlist is None:
+                return None
+            if match.group(2):
+                return self.page(path, playlist['items'], query, 100)
+            return self.playlist_summary(playlist)
+
+        return None
+
+    def search(self, path, query):
+        if 'artist' not in query.get('type', '').split(','):
+            return {}
+        with self.lock:
+            self.searches += 1
+        # Field filters like artist:"name" narrow the real search; here the
+        # quoted text is simply the substring to look for
+        text = re.sub(r'^\w+:', '', query.get('q', '')).strip().strip('"').lower()
+        found = [{'id': artist['id'], 'name': artist['name'], 'type': 'artist',
+                  'popularity': artist.get('popularity', 0)}
+                 for artist in self.artists.values() if text and text in artist['name'].lower()]
+        found.sort(key=lambda artist: (artist['name'].lower() != text, -artist['popularity']))
+        return {'artists': self.page(path, found, query, 50)}
+
+    def related_artists(self, artist_id):
+        if artist_id not in self.artists:
+            return None
+        with self.lock:
+            self.related += 1
+        related = self.library.get('related', {}).get(artist_id, [])
+        return {'artists': [{'id': self.artists[i]['id'], 'name': self.artists[i]['name'], 'type': 'artist'}
+                            for i in related if i in self.artists]}
+
+    def find_playlist(self, playlist_id):
+        for playlist in self.library['playlists']:
+            if playlist['id'] == playlist_id:
+                return playlist
+        return None
+
+    def playlist_summary(self, playlist):
+        summary = {k: v for k, v in playlist.items() if k != 'items'}
+        summary['tracks'] = {'total': len(playlist['items'])}
+        return summary
+
+    def page(self, path, items, query, max_limit):
+        limit = min(int(query.get('limit', max_limit)), max_limit)
+        offset = int(query.get('offset', 0))
+        next_url = None
+        if offset + limit < len(items):
+            next_url = f"{self.url.rstrip('/')}{path[len('/v1'):]}?offset={offset + limit}&limit={limit}"
+        return {
+            'href': path,
+            'items': items[offset:offset + limit],
+            'limit': limit,
+            'offset': offset,
+            'total': len(items),
+            'next': next_url,
+            'previous': None
+        }
+
+    def send(self, request, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        with self.lock:
+            self.bytes_sent += len(data)
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
@@ -0,0 +1,150 @@
+"""Generate synthetic playlist libraries and festival lineups.
+
+The outputs use the same shapes as all_playlists_artists.json and
+glastonbury_2025_lineup.json, so they can be fed straight to the matchers.
+Write a set of files with:
+
+    python benchmarks/synthetic_data.py --out /tmp/synthetic --artists 100000
+"""
+import argparse
+import json
+import os
+import random
+from collections import Counter
+
+DAYS = ['Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ven', 'tor', 'sa', 'el', 'dri', 'mon',
+             'ze', 'phi', 'gus', 'an', 'bel', 'ox', 'ty', 'ru', 'nox', 'qua']
+
+def make_name(rnd):
+    """A random, pronounceable act name"""
+    words = []
+    for _ in range(rnd.randint(1, 3)):
+        words.append(''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))).capitalize())
+    name = ' '.join(words)
+    if rnd.random() < 0.1:
+        name = 'The ' + name
+    return name
+
+def make_time(start_minutes, length):
+    """Format a slot like the lineup file does, wrapping past midnight"""
+    end_minutes = start_minutes + length
+    return (f"{start_minutes // 60 % 24:02d}:{start_minutes % 60:02d}"
+            f"–{end_minutes // 60 % 24:02d}:{end_minutes % 60:02d}")
+
+def make_lineup(stages=9, days=3, slots=8, broadcast_share=0.5, seed=0):
+    """A lineup dict: stage -> day -> [{'artist', 'time'}]"""
+    rnd = random.Random(seed)
+    lineup = {}
+    for s in range(stages):
+        stage = f"Stage {s + 1}"
+        if s < stages * broadcast_share:
+            stage += " (broadcast)"
+        lineup[stage] = {}
+        for day in DAYS[-days:]:
+            start = 11 * 60 + rnd.randrange(0, 60, 5)
+            acts = []
+            for _ in range(slots):
+                length = rnd.choice([30, 45, 60, 75, 90])
+                acts.append({'artist': make_name(rnd), 'time': make_time(start, length)})
+                start += length + rnd.choice([15, 30, 45])
+            lineup[stage][day] = acts
+    return lineup
+
+def lineup_artists(lineup):
+    return [a['artist'] for days in lineup.values() for acts in days.values() for a in acts]
+
+def make_library(lineup, artists=10000, playlists=100, match_rate=0.02, seed=0):
+    """A playlist library in all_playlists_artists.json format
+
+    `artists` is the total number of playlist/artist entries across all
+    playlists. About `match_rate` of them are lineup acts, some with the
+    case or 'The' prefix changed so matching has to normalize.
+    """
+    rnd = random.Random(seed)
+    acts = lineup_artists(lineup)
+    pool = [make_name(rnd) for _ in range(max(1, artists // 5))]
+
+    def pick():
+        if acts and rnd.random() < match_rate:
+            name = rnd.choice(acts)
+            variant = rnd.random()
+            if variant < 0.2:
+                return name.upper()
+            if variant < 0.3 and not name.lower().startswith('the '):
+                return 'The ' + name
+            return name
+        return rnd.choice(pool)
+
+    library = {}
+    per_playlist = max(1, artists // playlists)
+    for p in range(playlists):
+        counts = Counter()
+        for _ in range(per_playlist):
+            counts[pick()] += rnd.randint(1, 5)
+        name = f"Synthetic Playlist {p}"
+        library[name] = {
+            'playlist_name': name,
+            'total_tracks': sum(counts.values()),
+            'unique_artists': len(counts),
+            'artist_counts': dict(counts),
+            'all_artists': sorted(counts)
+        }
+    return library
+
+def make_spotify_library(playlists=40, tracks=600, artists=2000, seed=0):
+    """A library for benchmarks/spotify_stub.py: playlists with track items"""
+    rnd = random.Random(seed)
+    names = [make_name(rnd) for _ in range(artists)]
+    library = []
+    for n in range(playlists):
+        items = []
+        for t in range(rnd.randint(1, tracks)):
+            credits = [{'name': names[i], 'id': f"artist{i}"}
+                       for i in rnd.sample(range(artists), rnd.randint(1, 2))]
+            items.append({'track': {'name': f"Track {t}", 'artists': credits}})
+        library.append({'id': f"pl{n}", 'name': f"Playlist {n}", 'snapshot_id': f"s{n}",
+                        'owner': {'id': 'me'}, 'items': items})
+    return {'playlists': library}
+
+def make_related(artist_ids, degree=20, reach=200, seed=0):
+    """A related-artists graph {id: [ids]} with neighbours drawn from nearby ids
+
+    Artists are related to others within `reach` places of them in
+    artist_ids, so the graph has local clusters like the real one.
+    """
+    rnd = random.Random(seed)
+    related = {}
+    for i, artist_id in enumerate(artist_ids):
+        nearby = [artist_ids[(i + offset) % len(artist_ids)] for offset in range(-reach, reach + 1) if offset]
+        related[artist_id] = rnd.sample(nearby, min(degree, len(nearby)))
+    return related
+
+def write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic lineup and playlist library")
+    parser.add_argument('--out', required=True, help="directory to write the JSON files to")
+    parser.add_argument('--artists', type=int, default=10000, help="total playlist/artist entries")
+    parser.add_argument('--playlists', type=int, default=100)
+    parser.add_argument('--stages', type=int, default=9)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--slots', type=int, default=8, help="acts per stage per day")
+    parser.add_argument('--match-rate', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    lineup = make_lineup(args.stages, args.days, args.slots, seed=args.seed)
+    library = make_library(lineup, args.artists, args.playlists, args.match_rate, seed=args.seed)
+    write_json(lineup, os.path.join(args.out, 'glastonbury_2025_lineup.json'))
+    write_json(library, os.path.join(args.out, 'all_playlists_artists.json'))
+
+    print(f"Wrote {len(lineup_artists(lineup))} lineup acts and "
+          f"{sum(p['unique_artists'] for p in library.values())} playlist artist entries to {args.out}")
+
+if __name__ == "__main__":
+    main()
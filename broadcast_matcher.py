@@ -1,86 +1,104 @@
-import json
+import os
+import argparse
+import metrics
+from artist_matching import load_library
+from lineup_model import CompiledLineup
+from fuzzy_matching import DEFAULT_THRESHOLD
+from cli import add_match_arguments
+from artist_store import ArtistStore
+from artist_resolver import load_act_ids
+from schedule_export import (SCHEDULE_EXPORT_NAME, BroadcastTextWriter, CompleteTextWriter, add_export_argument,
+                             export_schedule, export_targets)
 
-def load_all_playlists():
-    """Load all playlist data"""
-    with open('all_playlists_artists.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+BROADCAST_SCHEDULE_FILE = 'broadcast_schedule.txt'
+COMPLETE_SCHEDULE_FILE = 'complete_festival_schedule.txt'
 
-def load_glastonbury_lineup():
-    """Load Glastonbury lineup from JSON file"""
-    with open('glastonbury_2025_lineup.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+@metrics.timed('match')
+def find_library_matches(library, lineup_index, fuzzy_index=None, threshold=DEFAULT_THRESHOLD, spotify_index=None):
+    """Broadcast and non-broadcast matches of a CompactLibrary, matching each artist id once"""
+    if fuzzy_index is not None:
+        matched = library.fuzzy_match(fuzzy_index, threshold, spotify_index)
+    else:
+        matched = {artist_id: (slots, 1.0) for artist_id, slots in library.match(lineup_index, spotify_index).items()}
+    
+    # Ties go to the first artist in sorted order
+    names = library.names
+    ordered = sorted(matched, key=names.__getitem__)
+    return split_by_broadcast([(names[i], *matched[i]) for i in ordered], fuzzy_index is not None)
 
-def normalize_name(name):
-    """Simple normalization - just lowercase and remove 'the' prefix"""
-    name = name.lower().strip()
-    if name.startswith('the '):
-        name = name[4:]
-    return name
+@metrics.timed('match')
+def find_store_matches(store, lineup, fuzzy_index=None, threshold=DEFAULT_THRESHOLD):
+    """find_library_matches over an ArtistStore, with exact matching as one indexed join"""
+    store.sync_lineup(lineup)
+    if fuzzy_index is not None:
+        matched = fuzzy_index.match_artists(sorted(store.iter_artist_names()), threshold)
+    else:
+        matched = [(artist, [lineup.slots[order]], 1.0) for order, artist in store.matched_slots()]
+    return split_by_broadcast(matched, fuzzy_index is not None)
 
-def find_exact_matches(playlists_data, lineup_data):
-    """Find exact matches and separate by broadcast status"""
-    # Get all unique artists from playlists
-    all_your_artists = set()
-    for playlist_data in playlists_data.values():
-        all_your_artists.update(playlist_data['all_artists'])
+def split_by_broadcast(matched, with_scores=False):
+    """Broadcast and non-broadcast match lists from (artist, slots, score) triples
+    
+    The best scoring artist for a slot wins, ties going to the earlier one.
+    Matches come out in lineup order, with a 'score' if with_scores.
+    """
+    matched_slots = {}
+    for playlist_artist, slots, score in matched:
+        for slot in slots:
+            if slot['order'] not in matched_slots or score > matched_slots[slot['order']][2]:
+                matched_slots[slot['order']] = (playlist_artist, slot, score)
     
     broadcast_matches = []
     non_broadcast_matches = []
     
-    for stage, days in lineup_data.items():
-        is_broadcast = "(broadcast)" in stage
+    for order in sorted(matched_slots):
+        playlist_artist, slot, score = matched_slots[order]
+        match_info = {
+            'playlist_artist': playlist_artist,
+            'lineup_artist': slot['artist'],
+            'stage': slot['stage'].replace(' (broadcast)', ''),
+            'day': slot['day'],
+            'time': slot['time'],
+            'broadcast': slot['broadcast'],
+            'day_index': slot['day_index'],
+            'start': slot['start'],
+            'end': slot['end']
+        }
+        if with_scores:
+            match_info['score'] = score
         
-        for day, artists in days.items():
-            for artist_info in artists:
-                lineup_artist = artist_info['artist']
-                norm_lineup = normalize_name(lineup_artist)
-                
-                for playlist_artist in all_your_artists:
-                    norm_playlist = normalize_name(playlist_artist)
-                    
-                    if norm_playlist == norm_lineup:
-                        match_info = {
-                            'playlist_artist': playlist_artist,
-                            'lineup_artist': lineup_artist,
-                            'stage': stage.replace(' (broadcast)', ''),
-                            'day': day,
-                            'time': artist_info['time'],
-                            'broadcast': is_broadcast
-                        }
-                        
-                        if is_broadcast:
-                            broadcast_matches.append(match_info)
-                        else:
-                            non_broadcast_matches.append(match_info)
-                        break
+        if slot['broadcast']:
+            broadcast_matches.append(match_info)
+        else:
+            non_broadcast_matches.append(match_info)
     
     return broadcast_matches, non_broadcast_matches
 
-def main():
-    print("=== GLASTONBURY 2025 - BROADCAST vs NON-BROADCAST MATCHES ===\n")
-    
-    # Load data
-    playlists_data = load_all_playlists()
-    lineup_data = load_glastonbury_lineup()
-    
-    # Find matches
-    broadcast_matches, non_broadcast_matches = find_exact_matches(playlists_data, lineup_data)
-    
-    total_matches = len(broadcast_matches) + len(non_broadcast_matches)
-    
-    print(f"Found {total_matches} total exact matches!")
-    print(f"  - {len(broadcast_matches)} will be broadcast on TV/iPlayer")
-    print(f"  - {len(non_broadcast_matches)} are not being broadcast\n")
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match your playlists against the Glastonbury lineup by broadcast status")
+    add_match_arguments(parser)
+    parser.add_argument('--store', metavar='DB',
+                        help="match from an SQLite store (see artist_store.py) instead of all_playlists_artists.json")
+    add_export_argument(parser)
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def sort_by_time(matches):
+    """Sort matches by day and time in place (sets after midnight stay on their night)"""
+    matches.sort(key=lambda x: (x['day_index'], x['start'], x['end']))
+    return matches
+
+def print_matches(matches):
+    """Print matches the way the matcher reports them, broadcast acts first"""
+    broadcast_matches = [match for match in matches if match['broadcast']]
+    non_broadcast_matches = [match for match in matches if not match['broadcast']]
     if broadcast_matches:
         print("=== BROADCAST ACTS (TV/iPlayer Coverage) ===")
         
-        # Sort by day and time
-        day_order = ['Friday', 'Saturday', 'Sunday']
-        broadcast_matches.sort(key=lambda x: (day_order.index(x['day']) if x['day'] in day_order else 99, x['time']))
-        
         for match in broadcast_matches:
             print(f"* {match['lineup_artist']}")
+            if match.get('score', 1.0) < 1.0:
+                print(f"   Fuzzy match for '{match['playlist_artist']}' ({match['score']:.0%})")
             print(f"   {match['stage']} - {match['day']} at {match['time']}")
             print(f"   [BROADCAST] Will be on TV/iPlayer")
             print()
@@ -90,67 +108,74 @@ def main():
         
         for match in non_broadcast_matches:
             print(f"* {match['lineup_artist']}")
+            if match.get('score', 1.0) < 1.0:
+                print(f"   Fuzzy match for '{match['playlist_artist']}' ({match['score']:.0%})")
             print(f"   {match['stage']} - {match['day']} at {match['time']}")
             print(f"   [FESTIVAL ONLY] Not broadcast")
             print()
+
+def write_schedules(matches, out_dir='', export=()):
+    """Write the schedule files for matches in schedule order, in one pass
+    
+    The broadcast schedule (if anything is broadcast), the complete
+    schedule and each export format are all streamed from the one sorted
+    list. Returns the paths written.
+    """
+    if not matches:
+        return []
+    
+    targets = []
+    if any(match['broadcast'] for match in matches):
+        targets.append((BroadcastTextWriter, os.path.join(out_dir, BROADCAST_SCHEDULE_FILE)))
+    targets.append((CompleteTextWriter, os.path.join(out_dir, COMPLETE_SCHEDULE_FILE)))
+    targets += export_targets(os.path.join(out_dir, SCHEDULE_EXPORT_NAME), export)
+    return export_schedule(matches, targets, ordered=True)
+
+def run(args):
+    """Match the library and write the broadcast and complete schedules"""
+    print("=== GLASTONBURY 2025 - BROADCAST vs NON-BROADCAST MATCHES ===\n")
+    
+    # Load data
+    lineup = CompiledLineup.load()
+    fuzzy_index = lineup.fuzzy_index if args.fuzzy else None
+    # The artist store keeps names only, so ids can't help it
+    act_ids = {} if args.no_ids or args.store else load_act_ids()
+    spotify_index = lineup.spotify_index(act_ids) if act_ids else None
+    if spotify_index:
+        print(f"Matching {len(act_ids)} acts by Spotify id, the rest by name\n")
+    
+    # Find matches
+    if args.store:
+        with ArtistStore(args.store) as store:
+            broadcast_matches, non_broadcast_matches = find_store_matches(store, lineup, fuzzy_index, args.threshold)
+    else:
+        library = load_library()
+        broadcast_matches, non_broadcast_matches = find_library_matches(library, lineup.index, fuzzy_index, args.threshold,
+                                                                        spotify_index)
+    
+    total_matches = len(broadcast_matches) + len(non_broadcast_matches)
+    
+    print(f"Found {total_matches} total {'fuzzy' if args.fuzzy else 'exact'} matches!")
+    print(f"  - {len(broadcast_matches)} will be broadcast on TV/iPlayer")
+    print(f"  - {len(non_broadcast_matches)} are not being broadcast\n")
+    
+    # Sorted once; the report and every schedule file follow this order
+    matches = sort_by_time(broadcast_matches + non_broadcast_matches)
+    print_matches(matches)
     
     # Create summary files
-    if broadcast_matches or non_broadcast_matches:
-        # Broadcast schedule
-        if broadcast_matches:
-            with open('broadcast_schedule.txt', 'w', encoding='utf-8') as f:
-                f.write("GLASTONBURY 2025 - YOUR BROADCAST SCHEDULE\\n")
-                f.write("=" * 50 + "\\n\\n")
-                
-                current_day = None
-                for match in broadcast_matches:
-                    if match['day'] != current_day:
-                        f.write(f"\\n{match['day'].upper()}\\n")
-                        f.write("-" * len(match['day']) + "\\n")
-                        current_day = match['day']
-                    
-                    f.write(f"{match['time']} - {match['lineup_artist']} @ {match['stage']}\\n")
-            
-            print(f"Broadcast schedule saved to: broadcast_schedule.txt")
-        
-        # Complete schedule
-        all_matches = broadcast_matches + non_broadcast_matches
-        with open('complete_festival_schedule.txt', 'w', encoding='utf-8') as f:
-            f.write("GLASTONBURY 2025 - COMPLETE SCHEDULE\\n")
-            f.write("=" * 50 + "\\n\\n")
-            
-            f.write("BROADCAST ACTS (TV/iPlayer)\\n")
-            f.write("-" * 30 + "\\n")
-            for match in broadcast_matches:
-                f.write(f"{match['day']} {match['time']} - {match['lineup_artist']} @ {match['stage']}\\n")
-            
-            f.write("\\nNON-BROADCAST ACTS (Festival Only)\\n")
-            f.write("-" * 35 + "\\n")
-            for match in non_broadcast_matches:
-                f.write(f"{match['day']} {match['time']} - {match['lineup_artist']} @ {match['stage']}\\n")
-        
-        print(f"Complete schedule saved to: complete_festival_schedule.txt")
-        
-        # Fix any literal \n characters in the files
-        fix_file_formatting('broadcast_schedule.txt')
-        fix_file_formatting('complete_festival_schedule.txt')
+    for path in write_schedules(matches, export=args.export):
+        if path.endswith(BROADCAST_SCHEDULE_FILE):
+            print(f"Broadcast schedule saved to: {path}")
+        elif path.endswith(COMPLETE_SCHEDULE_FILE):
+            print(f"Complete schedule saved to: {path}")
+        else:
+            print(f"Schedule exported to: {path}")
 
-def fix_file_formatting(filename):
-    """Fix literal \n characters in text files"""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Replace literal \n with actual line breaks
-        if '\\n' in content:
-            fixed_content = content.replace('\\n', '\n')
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(fixed_content)
-            
-            print(f"Fixed formatting in {filename}")
-    except Exception as e:
-        print(f"Could not fix {filename}: {e}")
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('broadcast_matcher', args):
+        run(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,28 @@
+import argparse
+import metrics
+from fuzzy_matching import DEFAULT_THRESHOLD
+
+def parse_threshold(value):
+    """argparse type for --threshold: a confidence in (0, 1]"""
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+    if not 0 < threshold <= 1:
+        raise argparse.ArgumentTypeError(f"must be above 0 and at most 1, not {value}")
+    return threshold
+
+def add_match_arguments(parser, fuzzy_help="also match name variants, e.g. 'Neil Young' or "
+                                            "'Lewis Capaldi (secret slot)'"):
+    """Add --fuzzy, --threshold and --no-ids to a matcher's argument parser"""
+    parser.add_argument('--fuzzy', action='store_true', help=fuzzy_help)
+    parser.add_argument('--threshold', type=parse_threshold, default=DEFAULT_THRESHOLD,
+                        help=f"minimum fuzzy match confidence, above 0 and at most 1 (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--no-ids', action='store_true',
+                        help="match on names only, without the lineup's Spotify artist ids (see artist_resolver.py)")
+
+@metrics.timed('write')
+def write_text(path, text):
+    """Write a rendered file in one buffered write"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
@@ -0,0 +1,172 @@
+import json
+from array import array
+from artist_matching import normalize_name
+
+# Marks a library file written in the compact format
+COMPACT_FORMAT = 'glastonbury-compact-artists'
+COMPACT_VERSION = 1
+
+# Unsigned 32-bit columns: artist ids and per-playlist track counts
+ID_TYPECODE = 'I'
+
+class CompactLibrary:
+    """Playlist artists with every artist name stored once
+
+    A global artist table holds each distinct artist's name, normalized
+    name and Spotify id (None when unknown), addressed by an integer id.
+    Each playlist is a (name, ids, counts) row whose ids and counts are
+    parallel arrays in the playlist's artist order (sorted by name, like
+    'all_artists' in the extractor output). Matching therefore looks up
+    every distinct artist once and then only tests integer ids.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.normalized = []
+        self.spotify_ids = []
+        self.playlists = []
+        self._ids = {}
+
+    def name_ids(self):
+        """The name -> id map, rebuilt on first use after unpickling"""
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids
+
+    def intern(self, name, spotify_id=None):
+        """The id of an artist name, adding it to the table if new"""
+        ids = self.name_ids()
+        artist_id = ids.get(name)
+        if artist_id is None:
+            artist_id = len(self.names)
+            ids[name] = artist_id
+            self.names.append(name)
+            self.normalized.append(normalize_name(name))
+            self.spotify_ids.append(spotify_id)
+        elif spotify_id and not self.spotify_ids[artist_id]:
+            self.spotify_ids[artist_id] = spotify_id
+        return artist_id
+
+    def add_playlist(self, playlist_name, artist_counts, spotify_ids=None):
+        """Add a playlist from an {artist name: track count} mapping"""
+        spotify_ids = spotify_ids or {}
+        ids = array(ID_TYPECODE)
+        counts = array(ID_TYPECODE)
+        for artist in sorted(artist_counts):
+            ids.append(self.intern(artist, spotify_ids.get(artist)))
+            counts.append(artist_counts[artist])
+        self.playlists.append((playlist_name, ids, counts))
+
+    @classmethod
+    def from_playlists_data(cls, playlists_data, spotify_ids=None):
+        """Build from the extractor's {playlist name: summary} structure"""
+        library = cls()
+        for playlist_name, playlist_data in playlists_data.items():
+            library.add_playlist(playlist_name, playlist_data['artist_counts'], spotify_ids)
+        return library
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from either file format (see to_json)"""
+        if data.get('format') != COMPACT_FORMAT:
+            return cls.from_playlists_data(data)
+        if data.get('version') != COMPACT_VERSION:
+            raise ValueError(f"Unsupported compact library version: {data.get('version')!r}")
+
+        library = cls()
+        library.names = data['artists']
+        library.normalized = [normalize_name(name) for name in library.names]
+        library.spotify_ids = data['spotify_ids']
+        library._ids = None
+        for playlist in data['playlists']:
+            library.playlists.append((playlist['name'],
+                                      array(ID_TYPECODE, playlist['ids']),
+                                      array(ID_TYPECODE, playlist['counts'])))
+        return library
+
+    def to_json(self):
+        """The compact file structure: the artist table plus id/count columns"""
+        return {
+            'format': COMPACT_FORMAT,
+            'version': COMPACT_VERSION,
+            'artists': self.names,
+            'spotify_ids': self.spotify_ids,
+            'playlists': [{'name': name, 'ids': ids.tolist(), 'counts': counts.tolist()}
+                          for name, ids, counts in self.playlists]
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+
+    def __getstate__(self):
+        # Matching never needs the name -> id map, so it is not pickled
+        state = self.__dict__.copy()
+        state['_ids'] = None
+        return state
+
+    def __len__(self):
+        """Number of distinct artists"""
+        return len(self.names)
+
+    def artist_id(self, name):
+        return self.name_ids().get(name)
+
+    def iter_artist_counts(self):
+        """(playlist name, {artist name: track count}) per playlist"""
+        for name, ids, counts in self.playlists:
+            yield name, {self.names[i]: count for i, count in zip(ids, counts)}
+
+    def match(self, lineup_index, spotify_index=None, artist_ids=None):
+        """{artist id: slots} for every artist on the lineup, one lookup each
+
+        With a spotify_index (see CompiledLineup.spotify_index) an artist
+        whose Spotify id is known matches on id equality. Names are the
+        fallback, but an artist with an id never matches an act resolved to
+        a different id by name alone. Pass artist_ids to match only those
+        artists.
+        """
+        resolved_acts = set()
+        if spotify_index:
+            resolved_acts = {slot['artist'] for slots in spotify_index.values() for slot in slots}
+
+        if artist_ids is None:
+            artist_ids = range(len(self.names))
+
+        matched = {}
+        for artist_id in artist_ids:
+            key = self.normalized[artist_id]
+            spotify_id = self.spotify_ids[artist_id]
+            if spotify_id and spotify_index:
+                slots = spotify_index.get(spotify_id)
+                if not slots:
+                    slots = [slot for slot in lineup_index.get(key, ()) if slot['artist'] not in resolved_acts]
+            else:
+                slots = lineup_index.get(key)
+            if slots:
+                matched[artist_id] = slots
+        return matched
+
+    def fuzzy_match(self, fuzzy_index, threshold, spotify_index=None):
+        """{artist id: (slots, score)} for the best fuzzy match of every artist
+
+        Artists matched by Spotify id (see match) score 1.0 without fuzzy
+        scoring.
+        """
+        matched = {}
+        for artist_id, name in enumerate(self.names):
+            spotify_id = self.spotify_ids[artist_id]
+            if spotify_id and spotify_index and spotify_id in spotify_index:
+                matched[artist_id] = (spotify_index[spotify_id], 1.0)
+                continue
+            best = fuzzy_index.best_match(name, threshold)
+            if best:
+                matched[artist_id] = best
+        return matched
+
+    def playlist_matches(self, matched_ids):
+        """(playlist name, [artist id]) for playlists with any id in matched_ids"""
+        for name, ids, counts in self.playlists:
+            hits = [i for i in ids if i in matched_ids]
+            if hits:
+                yield name, hits
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import metrics
+
+# Bump when the shape of any cached structure changes
+CACHE_VERSION = 2
+CACHE_SUFFIX = '.cache'
+
+# Overrides the cache directory, which is otherwise under the user's cache home
+CACHE_DIR_ENV = 'GLASTO_CACHE_DIR'
+CACHE_DIR_NAME = 'glastonbury-matcher'
+
+def cache_dir():
+    """The private directory holding the binary caches, created if missing
+
+    Caches are unpickled, so they must never be read from anywhere another
+    user could write: the directory is made owner-only, and one that is
+    not ours or is group/world-writable is refused with OSError.
+    """
+    path = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), CACHE_DIR_NAME)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        st = os.stat(path)
+        if st.st_uid != os.getuid() or st.st_mode & 0o022:
+            raise OSError(f"{path} is not a private directory")
+    return path
+
+def cache_path(path):
+    """The binary cache file of a source JSON file, named by its absolute path's hash"""
+    key = hashlib.sha256(os.path.abspath(path).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(cache_dir(), key + CACHE_SUFFIX)
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_cached(path, build):
+    """Return build(json data of path), reusing a pickled result when valid
+
+    The cache lives in cache_dir(), never next to the source, so a pickle
+    planted beside an input file is not loaded. The cache file holds a
+    small header (version, source mtime, size and sha256) followed by the
+    pickled value, so checking it never decodes the payload. If the mtime
+    or size changed the source is hashed, and an unchanged hash still
+    counts as a hit. Only on a miss is the JSON decoded and build() run,
+    and the cache rewritten.
+    """
+    stat = os.stat(path)
+    try:
+        cache = cache_path(path)
+    except OSError as e:
+        print(f"Not caching {path}: {e}")
+        with open(path, 'rb') as f:
+            return build(json.loads(f.read()))
+
+    try:
+        with open(cache, 'rb') as f:
+            header = pickle.load(f)
+            if header['version'] == CACHE_VERSION:
+                if header['mtime_ns'] == stat.st_mtime_ns and header['size'] == stat.st_size:
+                    metrics.count('data_cache.hits')
+                    return pickle.load(f)
+                if file_digest(path) == header['sha256']:
+                    metrics.count('data_cache.hits')
+                    value = pickle.load(f)
+                    save_cache(cache, stat, header['sha256'], value)
+                    return value
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError) as e:
+        print(f"Ignoring unreadable cache {cache}: {e}")
+
+    metrics.count('data_cache.misses')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    value = build(json.loads(raw))
+    save_cache(cache, stat, hashlib.sha256(raw).hexdigest(), value)
+    return value
+
+def save_cache(cache, stat, digest, value):
+    header = {
+        'version': CACHE_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': digest
+    }
+    # A temporary file of its own, so processes writing the same cache at
+    # once (batch_matcher --cache workers) never write into each other's
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(cache), suffix='.tmp', delete=False) as f:
+            tmp = f.name
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError as e:
+        print(f"Could not write cache {cache}: {e}")
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,186 @@
+import re
+import unicodedata
+import math
+from collections import defaultdict
+from itertools import chain
+
+# Default minimum confidence for a fuzzy match (0-1)
+DEFAULT_THRESHOLD = 0.8
+
+# Matching one half of a collaboration counts for a little less
+PART_WEIGHT = 0.9
+
+# Decimal places kept in a match's confidence score
+SCORE_DIGITS = 3
+
+PARENTHETICAL = re.compile(r'\s*[\(\[][^\)\]]*[\)\]]')
+COLLABORATION = re.compile(r'\s+(?:&|\+|and|x|vs\.?|with|feat\.?|ft\.?|featuring)\s+|\s*[,/]\s*')
+PUNCTUATION = re.compile(r"[^\w\s]")
+SPACES = re.compile(r'\s+')
+PLAIN = re.compile(r'[a-z0-9 ]*\Z')
+COLLABORATION_WORDS = {'and', 'x', 'vs', 'with', 'feat', 'ft', 'featuring'}
+
+def fold(name):
+    """Lowercase, strip accents and parentheticals like '(secret slot)'"""
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = name.lower()
+    if '(' in name or '[' in name:
+        name = PARENTHETICAL.sub('', name)
+    return name
+
+def clean_name(name):
+    """Normalize one act name for fuzzy matching
+
+    '&' and '+' read as 'and', punctuation is dropped and a leading 'the'
+    is removed, so "The Chrome Hearts" and "chrome hearts" are equal.
+    """
+    name = name.replace('&', ' and ').replace('+', ' and ')
+    name = SPACES.sub(' ', PUNCTUATION.sub('', name)).strip()
+    if name.startswith('the '):
+        name = name[4:]
+    return name
+
+def name_variants(name):
+    """(cleaned name, weight) for the whole name and each collaborator"""
+    lowered = name.lower()
+    if PLAIN.match(lowered):
+        # Fast path for the common plain-ASCII, single-act name
+        words = lowered.split()
+        if COLLABORATION_WORDS.isdisjoint(words):
+            if words and words[0] == 'the':
+                del words[0]
+            return {' '.join(words): 1.0} if words else {}
+
+    folded = fold(name)
+    variants = {clean_name(folded): 1.0}
+    parts = [part for part in COLLABORATION.split(folded) if part.strip()]
+    if len(parts) > 1:
+        for part in parts:
+            variants.setdefault(clean_name(part), PART_WEIGHT)
+    variants.pop('', None)
+    return variants
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FuzzyIndex:
+    """Trigram inverted index over lineup act names
+
+    Every act is indexed under its cleaned full name and, for
+    collaborations such as "Neil Young & The Chrome Hearts", under each
+    collaborator. A query only scores the variants that share enough
+    trigrams with it to reach the threshold, using the Dice coefficient of
+    the two trigram sets, so cost depends on the index hits rather than on
+    the size of the lineup.
+    """
+
+    def __init__(self, slots):
+        self.variants = []  # (cleaned name, weight, trigrams, act name)
+        self.exact = {}
+        self.postings = defaultdict(list)
+        self.act_slots = {}
+
+        for slot in slots:
+            act = slot['artist']
+            if act in self.act_slots:
+                self.act_slots[act].append(slot)
+                continue
+            self.act_slots[act] = [slot]
+
+            for variant, weight in name_variants(act).items():
+                variant_id = len(self.variants)
+                grams = trigrams(variant)
+                self.variants.append((variant, weight, grams, act))
+                self.exact.setdefault(variant, []).append(variant_id)
+                for gram in grams:
+                    self.postings[gram].append(variant_id)
+
+        self.known_grams = set(self.postings)
+        self.gram_frequency = {gram: len(ids) for gram, ids in self.postings.items()}
+
+    def score_acts(self, artist_name, threshold=DEFAULT_THRESHOLD, stop_at_exact=False):
+        """{act name: score} for the acts an artist may match, in the order found
+
+        Scores below the threshold can be included. With stop_at_exact, an
+        exact match on the full name returns straight away, since no other
+        act can then rank above it.
+        """
+        scores = {}
+        for query, query_weight in name_variants(artist_name).items():
+            exact = self.exact.get(query)
+            if exact:
+                exact_score = 0.0
+                for variant_id in exact:
+                    variant, weight, grams, act = self.variants[variant_id]
+                    exact_score = max(exact_score, weight * query_weight)
+                    scores[act] = max(scores.get(act, 0.0), weight * query_weight)
+                if exact_score == 1.0:
+                    # Nothing can beat an exact match on the full name
+                    if stop_at_exact:
+                        return scores
+                    continue
+
+            query_grams = trigrams(query)
+            size = len(query_grams)
+            known = query_grams & self.known_grams
+            missing = size - len(known)
+            # With m query trigrams missing from the index the best possible
+            # Dice score is 2(size - m) / (2 size - m); most names stop here
+            if 2 * (size - missing) < threshold * (2 * size - missing):
+                continue
+
+            # A variant weighs at most 1, so it needs Dice >= threshold /
+            # query_weight, which takes at least min_common shared trigrams
+            # (one even at a threshold of 0): any such variant shares one of
+            # the `len(known) - min_common + 1` rarest known query trigrams.
+            # The epsilon stops float error rounding a whole number up.
+            dice = threshold / query_weight
+            min_common = max(math.ceil(dice * size / (2 - dice) - 1e-9), 1)
+            rarest = sorted(known, key=self.gram_frequency.__getitem__)
+            probes = map(self.postings.__getitem__, rarest[:max(len(known) - min_common + 1, 0)])
+
+            # In index order, so the earlier act in the lineup wins a tie
+            for variant_id in sorted(set(chain.from_iterable(probes))):
+                variant, weight, grams, act = self.variants[variant_id]
+                score = weight * query_weight * 2 * len(query_grams & grams) / (size + len(grams))
+                if score >= threshold and score > scores.get(act, 0.0):
+                    scores[act] = score
+        return scores
+
+    def _ranked(self, artist_name, threshold, stop_at_exact=False):
+        """[(score, act name)] at or above the threshold, best first
+
+        Acts are ranked on their exact scores, the first found winning a
+        tie, and the scores then rounded to SCORE_DIGITS places.
+        """
+        scores = self.score_acts(artist_name, threshold, stop_at_exact)
+        ranked = sorted((act for act, score in scores.items() if score >= threshold), key=lambda act: -scores[act])
+        return [(round(scores[act], SCORE_DIGITS), act) for act in ranked]
+
+    def candidates(self, artist_name, threshold=DEFAULT_THRESHOLD):
+        """Ranked [(score, act name)] for an artist, best first"""
+        return self._ranked(artist_name, threshold)
+
+    def best_match(self, artist_name, threshold=DEFAULT_THRESHOLD):
+        """(slots, score) of the best candidate for an artist, or None"""
+        ranked = self._ranked(artist_name, threshold, stop_at_exact=True)
+        if not ranked:
+            return None
+        score, act = ranked[0]
+        return self.act_slots[act], score
+
+    def match_artists(self, artist_names, threshold=DEFAULT_THRESHOLD):
+        """Best fuzzy match per artist, like artist_matching.match_artists
+
+        Returns (artist_name, slots, score) triples in input order, skipping
+        artists with no candidate at or above the threshold.
+        """
+        matches = []
+        for artist_name in artist_names:
+            best = self.best_match(artist_name, threshold)
+            if best:
+                matches.append((artist_name, *best))
+        return matches
@@ -0,0 +1,190 @@
+import json
+import heapq
+import argparse
+from bisect import bisect_right
+from artist_matching import load_library
+from lineup_model import CompiledLineup, format_minutes
+from cli import add_match_arguments, write_text
+from artist_resolver import load_act_ids
+import broadcast_matcher
+
+ITINERARY_FILE = 'festival_itinerary.txt'
+
+# Room for any set to run past midnight without touching the next day
+DAY_MINUTES = 2 * 24 * 60
+
+def timeline(match):
+    """(start, end) of a match on one clock across the whole festival"""
+    offset = match['day_index'] * DAY_MINUTES
+    return offset + match['start'], offset + match['end']
+
+def find_clashes(matches):
+    """Each set that overlaps a set already under way, with one sweep over start times
+
+    Sets are taken in start order while a heap keeps the sets still
+    playing, by end time; sets that have ended by a set's start are dropped
+    first, and whatever is left clashes with it. Every overlapping pair is
+    reported once, under its later starting set. Returns (match, clashing
+    matches in start order) pairs, in start order.
+    """
+    ordered = sorted(matches, key=lambda m: (timeline(m), m['stage']))
+    clashes = []
+    playing = []
+    for i, match in enumerate(ordered):
+        start, end = timeline(match)
+        while playing and playing[0][0] <= start:
+            heapq.heappop(playing)
+        if playing:
+            clashes.append((match, [ordered[j] for other_end, j in sorted(playing, key=lambda entry: entry[1])]))
+        heapq.heappush(playing, (end, i))
+    return clashes
+
+def load_walk_times(path):
+    """{(stage, stage): minutes} from a JSON {"Stage A": {"Stage B": 15}} file
+
+    Times apply in both directions unless the reverse is given too.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    walk_times = {}
+    for stage, targets in data.items():
+        for target, minutes in targets.items():
+            walk_times[(stage, target)] = minutes
+            walk_times.setdefault((target, stage), minutes)
+    return walk_times
+
+def best_itinerary(matches, weight, walk=0, walk_times=None):
+    """The set of non-overlapping matches with the highest total weight(match)
+
+    Classic weighted interval scheduling: sets are taken in end order and
+    each one's best plan is its weight plus the best plan finishing early
+    enough to get to its stage, found by binary search over the plans
+    built so far. Changing stage costs `walk` minutes, or the time in
+    walk_times for that pair of stages. With no walk_times only two
+    searches per set are needed (same stage / any stage); otherwise one per
+    stage that has a match. Returns (total weight, matches in time order).
+    """
+    ordered = sorted(matches, key=lambda m: (timeline(m)[1], timeline(m)[0], m['stage']))
+
+    # Plans so far in end order: ends, and prefix (best total, last set)
+    ends = []
+    best = [(0, -1)]
+    stage_ends = {}
+    stage_best = {}
+    previous = []
+
+    for j, match in enumerate(ordered):
+        start, end = timeline(match)
+        stage = match['stage']
+
+        if walk_times is None:
+            candidates = [best[bisect_right(ends, start - walk)]]
+            if stage in stage_ends:
+                candidates.append(stage_best[stage][bisect_right(stage_ends[stage], start)])
+        else:
+            candidates = [(0, -1)]
+            for other, other_ends in stage_ends.items():
+                gap = 0 if other == stage else walk_times.get((other, stage), walk)
+                candidates.append(stage_best[other][bisect_right(other_ends, start - gap)])
+
+        total, last = max(candidates)
+        total += weight(match)
+        previous.append(last)
+
+        ends.append(end)
+        best.append(max(best[-1], (total, j)))
+        stage_ends.setdefault(stage, []).append(end)
+        stage_best.setdefault(stage, [(0, -1)])
+        stage_best[stage].append(max(stage_best[stage][-1], (total, j)))
+
+    total, j = best[-1]
+    chosen = []
+    while j != -1:
+        chosen.append(ordered[j])
+        j = previous[j]
+    chosen.reverse()
+    return total, chosen
+
+def track_weights(library):
+    """weight(match) giving a match the playlist artist's total track count"""
+    totals = [0] * len(library)
+    for name, ids, counts in library.playlists:
+        for artist_id, count in zip(ids, counts):
+            totals[artist_id] += count
+    name_ids = library.name_ids()
+
+    def weight(match):
+        artist_id = name_ids.get(match['playlist_artist'])
+        return max(1, totals[artist_id]) if artist_id is not None else 1
+    return weight
+
+def render_itinerary(plan, total, clashes, weight):
+    """The itinerary file as a single string"""
+    lines = ["GLASTONBURY 2025 - YOUR BEST ITINERARY", "=" * 50, ""]
+    lines.append(f"{len(plan)} sets, {total} of your tracks covered")
+
+    current_day = None
+    for match in plan:
+        if match['day'] != current_day:
+            lines.append("")
+            lines.append(match['day'].upper())
+            lines.append("-" * len(match['day']))
+            current_day = match['day']
+        lines.append(f"{format_minutes(match['start'])}-{format_minutes(match['end'])} "
+                     f"{match['lineup_artist']} @ {match['stage']} ({weight(match)} tracks)")
+
+    lines.append("")
+    lines.append(f"CLASHES ({sum(len(others) for match, others in clashes)})")
+    lines.append("-" * 30)
+    chosen = {id(match) for match in plan}
+    for match, others in clashes:
+        mark = "*" if id(match) in chosen else " "
+        lines.append(f"{mark} {match['day']} {match['time']} {match['lineup_artist']} @ {match['stage']} clashes with:")
+        for other in others:
+            mark = "*" if id(other) in chosen else " "
+            lines.append(f"    {mark} {other['time']} {other['lineup_artist']} @ {other['stage']}")
+
+    return "\n".join(lines) + "\n"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find clashes between your matched acts and plan the best itinerary")
+    parser.add_argument('--walk', type=int, default=0, help="minutes to walk between different stages (default: 0)")
+    parser.add_argument('--walk-times', metavar='JSON',
+                        help='per-stage-pair walking minutes, e.g. {"Pyramid Stage": {"Park Stage": 20}}')
+    add_match_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=== GLASTONBURY 2025 - ITINERARY PLANNER ===\n")
+
+    library = load_library()
+    lineup = CompiledLineup.load()
+    fuzzy_index = lineup.fuzzy_index if args.fuzzy else None
+    act_ids = {} if args.no_ids else load_act_ids()
+    spotify_index = lineup.spotify_index(act_ids) if act_ids else None
+
+    broadcast_matches, non_broadcast_matches = broadcast_matcher.find_library_matches(
+        library, lineup.index, fuzzy_index, args.threshold, spotify_index)
+    matches = broadcast_matches + non_broadcast_matches
+    if not matches:
+        print("No matches found, nothing to plan.")
+        return
+
+    weight = track_weights(library)
+    walk_times = load_walk_times(args.walk_times) if args.walk_times else None
+    clashes = find_clashes(matches)
+    total, plan = best_itinerary(matches, weight, args.walk, walk_times)
+
+    print(f"{len(matches)} matched sets, {sum(len(others) for match, others in clashes)} clashes")
+    for match, others in clashes:
+        names = ", ".join(f"{m['lineup_artist']} ({m['time']}, {m['stage']})" for m in others)
+        print(f"* {match['day']}: {match['lineup_artist']} ({match['time']}, {match['stage']}) clashes with {names}")
+
+    print(f"\nBest itinerary: {len(plan)} sets covering {total} of your tracks")
+    write_text(ITINERARY_FILE, render_itinerary(plan, total, clashes, weight))
+    print(f"Itinerary saved to: {ITINERARY_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,171 @@
 import json
+import os
 import re
+import argparse
+import metrics
+from lineup_model import LINEUP_FILE, DAY_ORDER, CompiledLineup, format_minutes, parse_time_range
 
-def parse_lineup_to_json(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    lineup = {}
-    current_stage = None
-    current_day = None
-    
-    lines = content.strip().split('\n')
-    
-    for line in lines:
+LINEUP_SOURCE = '2025lineup.md'
+
+DAY_NAMES = '|'.join(DAY_ORDER + ['Monday', 'Tuesday'])
+
+# Optional markdown heading or list marker in front of a header or set
+MARKDOWN_PREFIX = r'^(?:(?:#+|[-*+])\s+)?'
+
+# "Pyramid Stage - Friday" (hyphen or en-dash between stage and day)
+STAGE_HEADER = re.compile(rf'{MARKDOWN_PREFIX}(?P<stage>.+?)\s+[-–]\s+(?P<day>[^-–]*\b(?:{DAY_NAMES})\b[^-–]*?)\s*$')
+
+# "Artist Name: 12:00 - 13:00" or "Artist Name: 12:00–13:00"
+SET_ENTRY = re.compile(MARKDOWN_PREFIX + r'(?P<artist>.+?):\s*(?P<time>\d{1,2}:\d{2}\s*[-–]\s*\d{1,2}:\d{2})')
+
+def format_time_range(time_range):
+    """'HH:MM–HH:MM', the lineup JSON's own format, checked by parse_time_range"""
+    start, end = parse_time_range(time_range)
+    return f"{format_minutes(start)}–{format_minutes(end)}"
+
+def iter_lineup_entries(lines, source='<lineup>'):
+    """Stream (stage, day, {'artist', 'time'}) from lineup markdown lines
+
+    Lines are parsed one at a time, so the input can be an open file of
+    any size. Sets before the first stage header, and sets with an impossible
+    time, are reported and skipped.
+    """
+    stage = day = None
+    for line_number, line in enumerate(lines, 1):
         line = line.strip()
         if not line:
             continue
-            
-        # Check if it's a stage/day header
-        if ' - ' in line and ('Friday' in line or 'Saturday' in line or 'Sunday' in line or 'Thursday' in line):
-            parts = line.split(' - ')
-            if len(parts) == 2:
-                current_stage = parts[0].strip()
-                current_day = parts[1].strip()
-                
-                if current_stage not in lineup:
-                    lineup[current_stage] = {}
-                if current_day not in lineup[current_stage]:
-                    lineup[current_stage][current_day] = []
-        
-        # Check if it's an artist/time entry
-        elif ':' in line and ' - ' in line and current_stage and current_day:
-            # Match pattern like "Artist Name: 12:00 - 13:00"
-            match = re.match(r'^(.+?):\s*(\d{2}:\d{2}\s*-\s*\d{2}:\d{2}).*$', line)
-            if match:
-                artist = match.group(1).strip()
-                time = match.group(2).strip()
-                
-                lineup[current_stage][current_day].append({
-                    'artist': artist,
-                    'time': time
-                })
-    
+
+        # Sets far outnumber headers, so they are tried first; a header
+        # never has a time range after a colon
+        entry = SET_ENTRY.match(line)
+        if not entry:
+            header = STAGE_HEADER.match(line)
+            if header:
+                stage, day = header.group('stage').strip(), header.group('day').strip()
+            continue
+        if stage is None:
+            print(f"Skipping {source}:{line_number}, set before any stage header: {line}")
+            metrics.count('skipped_lines')
+            continue
+
+        try:
+            time_range = format_time_range(entry.group('time'))
+        except ValueError as e:
+            print(f"Skipping {source}:{line_number}: {e}")
+            metrics.count('skipped_lines')
+            continue
+        yield stage, day, {'artist': entry.group('artist').strip(), 'time': time_range}
+
+def parse_lineup_to_json(file_path):
+    """The lineup dict (stage -> day -> [{'artist', 'time'}]) of one markdown file"""
+    lineup = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for stage, day, entry in iter_lineup_entries(f, file_path):
+            lineup.setdefault(stage, {}).setdefault(day, []).append(entry)
+    return lineup
+
+def output_paths(sources, out_dir):
+    """out_dir/<source path>.json for each source, in order
+
+    Paths are kept relative to the sources' common directory, so
+    y1/lineup.md and y2/lineup.md do not both become out_dir/lineup.json.
+    Raises ValueError if two sources would still share an output, such as
+    lineup.md and lineup.txt.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(source)) for source in sources])
+    destinations = {}
+    for source in sources:
+        relative = os.path.relpath(os.path.abspath(source), root)
+        destination = os.path.join(out_dir, os.path.splitext(relative)[0] + '.json')
+        key = os.path.normcase(destination)
+        if key in destinations:
+            raise ValueError(f"{destinations[key][0]} and {source} would both be written to {destination}")
+        destinations[key] = (source, destination)
+    return [destination for source, destination in destinations.values()]
+
+@metrics.timed('convert')
+def convert_file(source, destination):
+    """Convert one markdown lineup to a lineup JSON file; the lineup dict
+
+    The lineup is compiled as the matchers will load it before anything is
+    written, so a lineup they would reject fails the conversion instead.
+    """
+    lineup = parse_lineup_to_json(source)
+    CompiledLineup(lineup)
+    with open(destination, 'w', encoding='utf-8') as f:
+        json.dump(lineup, f, indent=2, ensure_ascii=False)
+    metrics.count('bytes_read', os.path.getsize(source))
+    metrics.count('sets', sum(len(entries) for days in lineup.values() for entries in days.values()))
     return lineup
 
-# Convert the lineup
-lineup_json = parse_lineup_to_json('2025lineup.md')
+@metrics.timed('convert')
+def convert_to_jsonl(sources, destination):
+    """Stream every set of every source into one JSON Lines file
+
+    Each line is {'source', 'stage', 'day', 'artist', 'time'}, written as
+    it is parsed, so memory stays flat however large the archive is.
+    Returns the number of sets written.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    written = 0
+    with open(destination, 'w', encoding='utf-8') as out:
+        for source in sources:
+            with open(source, 'r', encoding='utf-8') as f:
+                for stage, day, entry in iter_lineup_entries(f, source):
+                    record = {'source': source, 'stage': stage, 'day': day, **entry}
+                    out.write(encode(record) + '\n')
+                    written += 1
+            metrics.count('bytes_read', os.path.getsize(source))
+    metrics.count('sets', written)
+    return written
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert lineup markdown files to lineup JSON")
+    parser.add_argument('sources', nargs='*', default=[LINEUP_SOURCE],
+                        help=f"lineup markdown files, e.g. one per year or festival (default: {LINEUP_SOURCE})")
+    parser.add_argument('--output', default=LINEUP_FILE,
+                        help=f"JSON file for a single source (default: {LINEUP_FILE})")
+    parser.add_argument('--out-dir', metavar='DIR',
+                        help="write each source to DIR/<name>.json instead, keeping the sources' subdirectories")
+    parser.add_argument('--jsonl', metavar='PATH',
+                        help="stream every set of every source into one JSON Lines file instead")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if len(args.sources) > 1 and not (args.out_dir or args.jsonl):
+        parser.error("several sources need --out-dir or --jsonl")
+    if args.out_dir and not args.jsonl:
+        # Checked up front, so a clash fails the run before anything is written
+        try:
+            args.destinations = output_paths(args.sources, args.out_dir)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+def run(args):
+    """Convert the sources to JSON files or one JSON Lines file"""
+    if args.jsonl:
+        written = convert_to_jsonl(args.sources, args.jsonl)
+        print(f"Streamed {written} sets from {len(args.sources)} lineups to {args.jsonl}")
+        return
+
+    destinations = args.destinations if args.out_dir else [args.output]
+    for source, destination in zip(args.sources, destinations):
+        if args.out_dir:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+        lineup = convert_file(source, destination)
+
+        sets = sum(len(entries) for days in lineup.values() for entries in days.values())
+        print(f"{source} -> {destination}: {len(lineup)} stages, {sets} sets")
+        if len(args.sources) == 1:
+            for stage, days in lineup.items():
+                total_artists = sum(len(artists) for artists in days.values())
+                print(f"  {stage}: {len(days)} days, {total_artists} artists")
 
-# Save to JSON file
-with open('glastonbury_2025_lineup.json', 'w', encoding='utf-8') as f:
-    json.dump(lineup_json, f, indent=2, ensure_ascii=False)
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('lineup_converter', args):
+        run(args)
 
-print("Lineup converted to JSON format!")
-print(f"Found {len(lineup_json)} stages")
-for stage, days in lineup_json.items():
-    total_artists = sum(len(artists) for artists in days.values())
-    print(f"  {stage}: {len(days)} days, {total_artists} artists")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import re
+import metrics
+from artist_matching import normalize_name, iter_lineup_slots
+from data_cache import load_cached
+from fuzzy_matching import FuzzyIndex
+
+LINEUP_FILE = 'glastonbury_2025_lineup.json'
+
+# Festival days in running order; unknown days sort after these
+DAY_ORDER = ['Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Sets starting before this hour belong to the previous night
+NIGHT_ENDS = 6 * 60
+
+TIME_RANGE = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*[-–]\s*(\d{1,2}):(\d{2})\s*$')
+
+def parse_time_range(time_range):
+    """Parse 'HH:MM–HH:MM' (en-dash or hyphen) into start/end minutes
+
+    Minutes count from midnight at the start of the festival day, so a set
+    starting at 00:30 is 24:30 (1470) and sorts after the evening's sets,
+    and an end time past midnight is always after its start. Raises
+    ValueError for anything else, including impossible clock times.
+    """
+    match = TIME_RANGE.match(time_range)
+    if not match:
+        raise ValueError(f"Unrecognised time range: {time_range!r}")
+
+    start_hour, start_minute, end_hour, end_minute = (int(g) for g in match.groups())
+    if start_hour > 23 or end_hour > 23 or start_minute > 59 or end_minute > 59:
+        raise ValueError(f"Impossible time range: {time_range!r}")
+    start = start_hour * 60 + start_minute
+    end = end_hour * 60 + end_minute
+    if start < NIGHT_ENDS:
+        start += 24 * 60
+    while end <= start:
+        end += 24 * 60
+    return start, end
+
+def format_minutes(minutes):
+    """Format festival-day minutes back to a 'HH:MM' clock time"""
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+class CompiledLineup:
+    """A lineup parsed once, with every per-artist lookup O(1)
+
+    Each slot is the dict from artist_matching.iter_lineup_slots plus
+    'start' and 'end' minutes (see parse_time_range), a 'day_index' from
+    DAY_ORDER and a ready-made 'sort_key'.
+    """
+
+    def __init__(self, lineup_data):
+        self.data = lineup_data
+        self.slots = []
+        self.index = {}
+        self.artist_slots = {}
+        self.day_index = {day: i for i, day in enumerate(DAY_ORDER)}
+
+        for slot in iter_lineup_slots(lineup_data):
+            day = slot['day']
+            if day not in self.day_index:
+                self.day_index[day] = len(self.day_index)
+            slot['start'], slot['end'] = parse_time_range(slot['time'])
+            slot['day_index'] = self.day_index[day]
+            slot['sort_key'] = (slot['day_index'], slot['start'], slot['end'], slot['order'])
+
+            self.slots.append(slot)
+            self.index.setdefault(normalize_name(slot['artist']), []).append(slot)
+            self.artist_slots.setdefault(slot['artist'], []).append(slot)
+
+    @classmethod
+    @metrics.timed('load lineup')
+    def load(cls, path=LINEUP_FILE, use_cache=True):
+        """Load and compile a lineup JSON file, reusing the binary cache"""
+        if use_cache:
+            return load_cached(path, cls)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @property
+    def artists(self):
+        """Every lineup act name, in lineup order"""
+        return [slot['artist'] for slot in self.slots]
+
+    @property
+    def fuzzy_index(self):
+        """Trigram index for fuzzy matching, built on first use"""
+        if getattr(self, '_fuzzy_index', None) is None:
+            self._fuzzy_index = FuzzyIndex(self.slots)
+        return self._fuzzy_index
+
+    def spotify_index(self, act_ids):
+        """{Spotify artist id: slots} for the acts in an {act: id} mapping
+
+        See artist_resolver. Slots keep lineup order, like the name index.
+        """
+        index = {}
+        for slot in self.slots:
+            spotify_id = act_ids.get(slot['artist'])
+            if spotify_id:
+                index.setdefault(spotify_id, []).append(slot)
+        return index
+
+    def lookup(self, artist_name):
+        """Slots whose act normalizes to the same name as artist_name"""
+        return self.index.get(normalize_name(artist_name), [])
+
+    def slots_for(self, lineup_artist):
+        """Slots for an exact lineup act name"""
+        return self.artist_slots.get(lineup_artist, [])
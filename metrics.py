@@ -0,0 +1,215 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not on Windows; peak memory is then left out of the report
+    resource = None
+
+# Hottest functions printed after a --profile run
+PROFILE_TOP = 25
+
+# Counter names ending in these make up the cache hit rates in a report
+HITS_SUFFIX = '.hits'
+MISSES_SUFFIX = '.misses'
+
+# The Metrics of the running script, if it was asked for any
+_active = None
+
+class Metrics:
+    """Stage timings, counters and peak memory for one script run
+
+    Stages are named wall-clock timers; a stage entered more than once (or
+    from several threads) adds up its time and counts its calls. Stages may
+    nest, so their times need not add up to the run's. Counters are plain
+    named totals, such as pages fetched or bytes downloaded. With profile,
+    the whole run is also recorded by cProfile.
+    """
+
+    def __init__(self, script, options=None, profile=False):
+        self.script = script
+        self.options = options or {}
+        self.stages = {}
+        self.counters = Counter()
+        self.sections = {}
+        self.lock = threading.Lock()
+        self.profiler = cProfile.Profile() if profile else None
+        self.started_at = None
+        self.started = None
+        self.wall_seconds = None
+
+    def start(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.wall_seconds = time.perf_counter() - self.started
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                seconds, calls = self.stages.get(name, (0.0, 0))
+                self.stages[name] = (seconds + elapsed, calls + 1)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def section(self, name, values):
+        """Attach a dict of figures gathered elsewhere, e.g. RequestScheduler.stats()"""
+        with self.lock:
+            self.sections[name] = dict(values)
+
+    def hit_rates(self):
+        """{cache: hit rate} for every '<cache>.hits' / '<cache>.misses' counter pair"""
+        caches = {name[:-len(suffix)] for name in self.counters
+                  for suffix in (HITS_SUFFIX, MISSES_SUFFIX) if name.endswith(suffix)}
+        rates = {}
+        for cache in sorted(caches):
+            hits = self.counters[cache + HITS_SUFFIX]
+            lookups = hits + self.counters[cache + MISSES_SUFFIX]
+            rates[cache] = round(hits / lookups, 4) if lookups else None
+        return rates
+
+    def report(self):
+        """The run as a JSON-ready dict"""
+        report = {
+            'script': self.script,
+            'options': self.options,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started_at)),
+            'python': sys.version.split()[0],
+            'wall_seconds': round(self.wall_seconds, 6),
+            'stages': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                       for name, (seconds, calls) in self.stages.items()},
+            'counters': dict(sorted(self.counters.items())),
+            'cache_hit_rates': self.hit_rates(),
+            'peak_memory_bytes': peak_memory(),
+            'peak_child_memory_bytes': peak_memory(children=True)
+        }
+        report.update(self.sections)
+        return report
+
+    def write_json(self, path):
+        """Write the report to path, or append it as one line if path ends in .jsonl"""
+        report = self.report()
+        if path.endswith('.jsonl'):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(report, ensure_ascii=False) + '\n')
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+    def write_profile(self, path, top=PROFILE_TOP):
+        """Dump the cProfile stats to path; the hottest functions as text"""
+        self.profiler.dump_stats(path)
+        out = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=out)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        return out.getvalue()
+
+def peak_memory(children=False):
+    """Peak resident set size in bytes, or None where unknown
+
+    With children, the largest of any finished child process instead, such
+    as batch_matcher's workers.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@contextmanager
+def stage(name):
+    """Time a block as a stage of the current run; free when nothing is collected"""
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+def timed(name):
+    """Decorator form of stage(), for a whole function"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, n=1):
+    """Add to a counter of the current run, if any"""
+    metrics = _active
+    if metrics is not None:
+        metrics.count(name, n)
+
+def section(name, values):
+    metrics = _active
+    if metrics is not None:
+        metrics.section(name, values)
+
+def record_response(response, *args, **kwargs):
+    """requests response hook: counts HTTP responses and their body bytes"""
+    metrics = _active
+    if metrics is not None:
+        metrics.count('http_responses')
+        metrics.count('bytes_downloaded', len(response.content))
+
+def add_arguments(parser):
+    """Add --metrics-json and --profile to a script's argument parser"""
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="write stage timings, API and cache counters and peak memory as JSON "
+                             "(appended as one line if PATH ends in .jsonl)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="also run under cProfile, print the hottest functions and dump the stats to PATH")
+
+@contextmanager
+def collect(script, args):
+    """Collect metrics for a script run if its args ask for them
+
+    Yields the Metrics (None if neither --metrics-json nor --profile was
+    given). The report and profile are written however the run ends.
+    """
+    global _active
+    if not (args.metrics_json or args.profile):
+        yield None
+        return
+
+    metrics = Metrics(script, vars(args), profile=bool(args.profile))
+    _active = metrics
+    metrics.start()
+    try:
+        yield metrics
+    finally:
+        metrics.stop()
+        _active = None
+        if args.profile:
+            path = args.profile
+            print(f"\n=== PROFILE ({metrics.wall_seconds:.3f}s) ===")
+            print(metrics.write_profile(path), end='')
+            print(f"Profile saved to: {path} (open with python -m pstats {path})")
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            print(f"Metrics saved to: {args.metrics_json}")
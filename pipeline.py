@@ -0,0 +1,139 @@
+import os
+import json
+import argparse
+import metrics
+import all_playlists_extractor
+import all_playlists_matcher
+import broadcast_matcher
+from all_playlists_extractor import CACHE_FILE
+from artist_matching import LIBRARY_FILE
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup, LINEUP_FILE
+from fuzzy_matching import DEFAULT_THRESHOLD
+from cli import add_match_arguments
+from request_scheduler import RequestScheduler, report_stats
+from artist_store import ArtistStore
+from artist_resolver import resolve_lineup
+from schedule_export import add_export_argument
+
+def run_pipeline(sp, lineup, workers=1, cache=None, fuzzy=False, threshold=DEFAULT_THRESHOLD,
+                 out_dir='.', save_json=False, all_playlists=False, store=None, compact=False,
+                 spotify_index=None, export=()):
+    """Extract -> match -> render in one process, with no files in between
+
+    The extracted playlists go straight into the matchers, and the
+    schedules are streamed to their files in one sorted pass. The intermediate
+    all_playlists_artists.json is only written with save_json (in the
+    compact format with compact). With a store, playlists are upserted into
+    it as they are fetched. With a spotify_index (see
+    CompiledLineup.spotify_index) artists match on Spotify id where both
+    ids are known. Each format in export (see schedule_export) is written
+    in the same pass as the schedules. Returns the matches in schedule
+    order.
+    """
+    spotify_ids = {}
+    playlists_data = all_playlists_extractor.get_all_playlists_artists(sp, workers=workers, cache=cache, store=store,
+                                                                       spotify_ids=spotify_ids)
+    library = CompactLibrary.from_playlists_data(playlists_data, spotify_ids)
+
+    if save_json:
+        if compact:
+            library.save(os.path.join(out_dir, LIBRARY_FILE))
+        else:
+            with open(os.path.join(out_dir, LIBRARY_FILE), 'w', encoding='utf-8') as f:
+                json.dump(playlists_data, f, indent=2, ensure_ascii=False)
+
+    fuzzy_index = lineup.fuzzy_index if fuzzy else None
+    broadcast_matches, non_broadcast_matches = broadcast_matcher.find_library_matches(
+        library, lineup.index, fuzzy_index, threshold, spotify_index)
+    matches = broadcast_matcher.sort_by_time(broadcast_matches + non_broadcast_matches)
+    broadcast_matcher.write_schedules(matches, out_dir, export)
+
+    if all_playlists:
+        all_matches = all_playlists_matcher.find_library_matches(library, lineup.index, fuzzy_index, threshold,
+                                                                 spotify_index)
+        if all_matches:
+            all_playlists_matcher.write_schedules(all_playlists_matcher.schedule_entries(all_matches, lineup), out_dir)
+
+    return matches
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract your playlists, match them against the Glastonbury lineup "
+                                                 "and write your schedules in one run")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of playlists to fetch concurrently (default: 1)")
+    parser.add_argument('--cache-file', default=CACHE_FILE,
+                        help=f"snapshot cache used to skip unchanged playlists (default: {CACHE_FILE})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-download every playlist and leave the cache untouched")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    parser.add_argument('--out', default='.', help="directory for the schedule files (default: current directory)")
+    parser.add_argument('--save-json', action='store_true',
+                        help=f"also write the extracted playlists to {LIBRARY_FILE}")
+    parser.add_argument('--compact', action='store_true',
+                        help="write the --save-json file in the compact format")
+    parser.add_argument('--store', metavar='DB',
+                        help="also upsert the playlists into an SQLite store (see artist_store.py)")
+    parser.add_argument('--all-playlists', action='store_true',
+                        help=f"also write the per-playlist {all_playlists_matcher.SCHEDULE_FILE}")
+    add_match_arguments(parser)
+    add_export_argument(parser)
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Resolve, extract, match and write in one run"""
+    print("=== GLASTONBURY 2025 - PLAYLIST PIPELINE ===\n")
+
+    try:
+        scheduler = RequestScheduler()
+        sp = all_playlists_extractor.setup_spotify_client(scheduler)
+        lineup = CompiledLineup.load(args.lineup)
+        os.makedirs(args.out, exist_ok=True)
+
+        cache = None if args.no_cache else all_playlists_extractor.load_extraction_cache(args.cache_file)
+
+        spotify_index = None
+        if not args.no_ids:
+            print("Resolving lineup acts to Spotify artist ids...")
+            act_ids, resolver = resolve_lineup(sp, lineup)
+            spotify_index = lineup.spotify_index(act_ids)
+            print(f"Resolved {len(act_ids)} acts ({resolver.searched} searched)\n")
+
+        store = ArtistStore(args.store) if args.store else None
+
+        print("Extracting artists from all your playlists...")
+        try:
+            matches = run_pipeline(
+                sp, lineup, args.workers, cache, args.fuzzy, args.threshold,
+                args.out, args.save_json, args.all_playlists, store, args.compact, spotify_index,
+                args.export or ())
+        finally:
+            if store is not None:
+                store.close()
+
+        if cache is not None:
+            all_playlists_extractor.save_extraction_cache(cache, args.cache_file)
+
+        total_matches = len(matches)
+        broadcast_count = sum(1 for match in matches if match['broadcast'])
+        print(f"\nFound {total_matches} total {'fuzzy' if args.fuzzy else 'exact'} matches!")
+        print(f"  - {broadcast_count} will be broadcast on TV/iPlayer")
+        print(f"  - {total_matches - broadcast_count} are not being broadcast\n")
+
+        broadcast_matcher.print_matches(matches)
+
+        if total_matches:
+            print(f"Schedules saved to: {args.out}/")
+        report_stats(scheduler)
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('pipeline', args):
+        run(args)
+
+if __name__ == "__main__":
+    main()
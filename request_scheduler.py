@@ -0,0 +1,198 @@
+import threading
+import time
+
+import requests
+from urllib3.util.retry import Retry
+import metrics
+
+# Spotify answers with HTTP 429 when a client goes over its rate limit
+TOO_MANY_REQUESTS = 429
+
+# Statuses the HTTP session may still retry by itself. 429 is left out on
+# purpose so it reaches the scheduler, which backs off for every thread at once.
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+
+def build_requests_session(retries=3, backoff_factor=0.3):
+    """A requests session that retries server errors but never 429s
+
+    urllib3 normally sleeps through any 429 carrying Retry-After on its own,
+    per connection, which is exactly the uncoordinated backoff we want to
+    avoid. Pass the session to spotipy.Spotify(requests_session=...).
+    Responses are counted, with their size, in the run's metrics.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=SERVER_ERROR_STATUSES,
+        respect_retry_after_header=False)
+    adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.hooks['response'].append(metrics.record_response)
+    return session
+
+class TokenBucket:
+    """Classic token bucket: `rate` requests per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class RequestScheduler:
+    """Coordinates every API request made by one or more clients
+
+    Requests pass through a token bucket and a concurrency limit. A 429
+    response pauses *all* requests for the server's Retry-After, halves the
+    concurrency limit and retries the call. Fast successful calls grow the
+    limit back one slot at a time; slow ones shrink it.
+    """
+
+    def __init__(self, rate=10.0, burst=10, concurrency=4, min_concurrency=1,
+                 max_concurrency=16, max_retries=5, target_latency=1.0,
+                 default_retry_after=1.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.target_latency = target_latency
+        self.default_retry_after = default_retry_after
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.success_streak = 0
+
+        self.requests = 0
+        self.retries = 0
+        self.throttled_responses = 0
+        self.throttled_seconds = 0.0
+        self.bucket_wait_seconds = 0.0
+        self.total_latency = 0.0
+
+    def call(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) under the scheduler, retrying on 429"""
+        attempt = 0
+        while True:
+            self._acquire_slot()
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                latency = time.monotonic() - start
+                if getattr(e, 'http_status', None) != TOO_MANY_REQUESTS or attempt >= self.max_retries:
+                    self._release_slot(latency, None)
+                    raise
+                self._release_slot(latency, self._retry_after(e))
+                attempt += 1
+                continue
+            self._release_slot(time.monotonic() - start, None)
+            return result
+
+    def stats(self):
+        """Counters describing how the run went so far"""
+        with self.condition:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttled_responses': self.throttled_responses,
+                'throttled_seconds': round(self.throttled_seconds, 3),
+                'bucket_wait_seconds': round(self.bucket_wait_seconds, 3),
+                'mean_latency': round(self.total_latency / self.requests, 4) if self.requests else 0.0,
+                'concurrency': self.concurrency
+            }
+
+    def _retry_after(self, error):
+        headers = getattr(error, 'headers', None) or {}
+        try:
+            return max(0.0, float(headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return self.default_retry_after
+
+    def _acquire_slot(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    self.condition.wait(self.blocked_until - now)
+                elif self.in_flight >= self.concurrency:
+                    self.condition.wait()
+                else:
+                    self.in_flight += 1
+                    break
+        waited = self.bucket.acquire()
+        if waited:
+            with self.condition:
+                self.bucket_wait_seconds += waited
+
+    def _release_slot(self, latency, retry_after):
+        with self.condition:
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_latency += latency
+
+            if retry_after is not None:
+                self.retries += 1
+                self.throttled_responses += 1
+                self.success_streak = 0
+                now = time.monotonic()
+                if now >= self.blocked_until:
+                    # Halve once per throttling episode, not once per thread hit
+                    self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                if now + retry_after > self.blocked_until:
+                    # Count wall time paused, not time summed over threads
+                    self.throttled_seconds += now + retry_after - max(self.blocked_until, now)
+                    self.blocked_until = now + retry_after
+            elif latency > 2 * self.target_latency:
+                self.success_streak = 0
+                self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+            elif latency <= self.target_latency:
+                self.success_streak += 1
+                if self.success_streak >= self.concurrency:
+                    self.success_streak = 0
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+
+            self.condition.notify_all()
+
+class ScheduledClient:
+    """Wraps a client (e.g. spotipy.Spotify) so every method call is scheduled"""
+
+    def __init__(self, client, scheduler):
+        self._client = client
+        self._scheduler = scheduler
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def scheduled(*args, **kwargs):
+            return self._scheduler.call(attr, *args, **kwargs)
+        return scheduled
+
+def report_stats(scheduler):
+    """Print a run's API request summary and add it to the metrics as 'api'"""
+    stats = scheduler.stats()
+    print(f"API requests: {stats['requests']} ({stats['retries']} retries after 429, "
+          f"{stats['throttled_seconds']}s throttled)")
+    metrics.section('api', stats)
@@ -0,0 +1,313 @@
+import csv
+import hashlib
+import html
+import io
+import json
+import argparse
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+import metrics
+from lineup_model import format_minutes
+
+SCHEDULE_EXPORT_NAME = 'festival_schedule'
+SCHEDULE_TITLE = 'GLASTONBURY 2025 - YOUR SCHEDULE'
+
+# Wednesday, the first day in DAY_ORDER; later days follow by day_index
+FESTIVAL_START = date(2025, 6, 25)
+
+# Set times are British Summer Time; calendars get them in UTC
+FESTIVAL_UTC_OFFSET = timedelta(hours=1)
+
+# Columns of the CSV and JSON exports, in order
+EXPORT_FIELDS = ('day', 'date', 'start', 'end', 'artist', 'stage', 'broadcast', 'playlist_artist', 'playlist')
+
+# Bytes buffered per export file before it is written out
+WRITE_BUFFER = 1 << 16
+
+def schedule_order(matches):
+    """Matches sorted by day and time (sets after midnight stay on their night)"""
+    return sorted(matches, key=lambda match: (match['day_index'], match['start'], match['end']))
+
+def export_row(match, first_day=FESTIVAL_START):
+    """A match's EXPORT_FIELDS plus its lineup 'time', 'starts_at' and 'ends_at'
+
+    The datetimes are naive festival (BST) times; sets after midnight fall
+    on the next calendar date but stay on their night's 'day'.
+    """
+    night = datetime.combine(first_day + timedelta(days=match['day_index']), datetime.min.time())
+    starts_at = night + timedelta(minutes=match['start'])
+    return {
+        'day': match['day'],
+        'date': starts_at.date().isoformat(),
+        'start': format_minutes(match['start']),
+        'end': format_minutes(match['end']),
+        'artist': match['lineup_artist'],
+        'stage': match['stage'],
+        'broadcast': match['broadcast'],
+        'playlist_artist': match.get('playlist_artist', ''),
+        'playlist': match.get('playlist', ''),
+        'time': match['time'],
+        'starts_at': starts_at,
+        'ends_at': night + timedelta(minutes=match['end'])
+    }
+
+class ScheduleWriter(ABC):
+    """Streams one schedule file to an open text file, a set at a time
+
+    begin() writes any header, write() one set (a row from export_row) and
+    end() any footer. Sets arrive in schedule order.
+    """
+
+    extension = None
+
+    def __init__(self, out, title=SCHEDULE_TITLE):
+        self.out = out
+        self.title = title
+
+    def begin(self):
+        pass
+
+    @abstractmethod
+    def write(self, row):
+        pass
+
+    def end(self):
+        pass
+
+class DayHeadings:
+    """Mixin for text layouts that open each festival day with a heading"""
+
+    def day_heading(self, row):
+        if row['day'] != self.day:
+            self.day = row['day']
+            self.out.write(f"\n{self.day.upper()}\n{'-' * len(self.day)}\n")
+
+class BroadcastTextWriter(DayHeadings, ScheduleWriter):
+    """broadcast_schedule.txt: the broadcast sets only, by day"""
+
+    def begin(self):
+        self.day = None
+        self.out.write(f"GLASTONBURY 2025 - YOUR BROADCAST SCHEDULE\n{'=' * 50}\n\n")
+
+    def write(self, row):
+        if row['broadcast']:
+            self.day_heading(row)
+            self.out.write(f"{row['time']} - {row['artist']} @ {row['stage']}\n")
+
+class CompleteTextWriter(ScheduleWriter):
+    """complete_festival_schedule.txt: broadcast sets, then festival-only ones
+
+    Broadcast lines are written as they arrive. Festival-only lines come
+    second in the file, so they are kept, as lines, until end().
+    """
+
+    def begin(self):
+        self.festival_only = []
+        self.out.write(f"GLASTONBURY 2025 - COMPLETE SCHEDULE\n{'=' * 50}\n\n"
+                       f"BROADCAST ACTS (TV/iPlayer)\n{'-' * 30}\n")
+
+    def write(self, row):
+        line = f"{row['day']} {row['time']} - {row['artist']} @ {row['stage']}\n"
+        if row['broadcast']:
+            self.out.write(line)
+        else:
+            self.festival_only.append(line)
+
+    def end(self):
+        self.out.write(f"\nNON-BROADCAST ACTS (Festival Only)\n{'-' * 35}\n")
+        self.out.writelines(self.festival_only)
+
+class PlaylistTextWriter(DayHeadings, ScheduleWriter):
+    """all_playlists_glastonbury_schedule.txt: every set by day, with its playlist"""
+
+    def begin(self):
+        self.day = None
+        self.out.write(f"GLASTONBURY 2025 - ALL PLAYLISTS SCHEDULE\n{'=' * 50}\n\n")
+
+    def write(self, row):
+        self.day_heading(row)
+        stage = f"{row['stage']} (broadcast)" if row['broadcast'] else row['stage']
+        self.out.write(f"{row['start']} - {row['artist']} @ {stage} (from '{row['playlist']}')\n")
+
+class CsvWriter(ScheduleWriter):
+    """One spreadsheet row per set, with a header row"""
+
+    extension = 'csv'
+
+    def begin(self):
+        self.writer = csv.writer(self.out)
+        self.writer.writerow(EXPORT_FIELDS)
+
+    def write(self, row):
+        self.writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+class JsonWriter(ScheduleWriter):
+    """{'title', 'sets': [row, ...]}, each set encoded as it arrives"""
+
+    extension = 'json'
+
+    def begin(self):
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+        self.separator = "\n  "
+        self.out.write(f'{{"title": {self.encode(self.title)}, "sets": [')
+
+    def write(self, row):
+        self.out.write(self.separator + self.encode({field: row[field] for field in EXPORT_FIELDS}))
+        self.separator = ",\n  "
+
+    def end(self):
+        self.out.write("\n]}\n")
+
+class HtmlWriter(ScheduleWriter):
+    """A standalone page with one table, a heading row per day"""
+
+    extension = 'html'
+
+    def begin(self):
+        self.day = None
+        title = html.escape(self.title)
+        self.out.write(
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{title}</title>\n'
+            '<style>body{font-family:sans-serif}table{border-collapse:collapse}'
+            'td,th{padding:2px 8px;text-align:left}th.day{padding-top:1em}'
+            'tr.broadcast td{font-weight:bold}</style>\n'
+            f'</head>\n<body>\n<h1>{title}</h1>\n<table>\n'
+            '<tr><th>Time</th><th>Artist</th><th>Stage</th><th>TV/iPlayer</th><th>From</th></tr>\n')
+
+    def write(self, row):
+        if row['day'] != self.day:
+            self.day = row['day']
+            self.out.write(f'<tr><th class="day" colspan="5">{html.escape(self.day)}</th></tr>\n')
+        source = row['playlist'] or row['playlist_artist']
+        css = ' class="broadcast"' if row['broadcast'] else ''
+        self.out.write(
+            f'<tr{css}>'
+            f'<td>{row["start"]}–{row["end"]}</td><td>{html.escape(row["artist"])}</td>'
+            f'<td>{html.escape(row["stage"])}</td><td>{"yes" if row["broadcast"] else ""}</td>'
+            f'<td>{html.escape(source)}</td></tr>\n')
+
+    def end(self):
+        self.out.write('</table>\n</body>\n</html>\n')
+
+def ics_text(value):
+    """Escape a value for an iCalendar TEXT property"""
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+def ics_line(line):
+    """An iCalendar content line, folded at 75 octets"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        # Never split a UTF-8 sequence across a fold
+        cut = limit
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+        # Continuation lines lose one octet to their leading space
+        limit = 74
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+def ics_time(moment):
+    """A festival time as an iCalendar UTC date-time"""
+    return (moment - FESTIVAL_UTC_OFFSET).strftime('%Y%m%dT%H%M%SZ')
+
+class IcsWriter(ScheduleWriter):
+    """An iCalendar (RFC 5545) file with one event per set, for calendar apps"""
+
+    extension = 'ics'
+
+    def begin(self):
+        self.stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Glastonbury Playlist Matcher//EN',
+                     'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', f'X-WR-CALNAME:{ics_text(self.title)}'):
+            self.out.write(ics_line(line))
+
+    def write(self, row):
+        # Stable across exports, so re-importing updates events instead of duplicating them
+        key = f"{row['date']}|{row['start']}|{row['stage']}|{row['artist']}|{row['playlist']}"
+        uid = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        description = "Broadcast on TV/iPlayer" if row['broadcast'] else "Festival only"
+        if row['playlist']:
+            description += f"\nFrom your playlist '{row['playlist']}'"
+        elif row['playlist_artist']:
+            description += f"\nMatched from {row['playlist_artist']}"
+        for line in ('BEGIN:VEVENT', f'UID:{uid}@glastonbury-2025', f'DTSTAMP:{self.stamp}',
+                     f'DTSTART:{ics_time(row["starts_at"])}', f'DTEND:{ics_time(row["ends_at"])}',
+                     f'SUMMARY:{ics_text(row["artist"])} @ {ics_text(row["stage"])}',
+                     f'LOCATION:{ics_text(row["stage"])}', f'DESCRIPTION:{ics_text(description)}',
+                     'END:VEVENT'):
+            self.out.write(ics_line(line))
+
+    def end(self):
+        self.out.write(ics_line('END:VCALENDAR'))
+
+# Formats for --export; the text schedules are written on every run
+EXPORT_FORMATS = {writer.extension: writer for writer in (CsvWriter, JsonWriter, HtmlWriter, IcsWriter)}
+
+def parse_formats(value):
+    """argparse type for --export: 'ics,csv' or 'all' -> ['ics', 'csv']"""
+    formats = list(EXPORT_FORMATS) if value == 'all' else [f.strip().lower() for f in value.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"unknown format(s) {', '.join(unknown) or value!r}; choose from {', '.join(EXPORT_FORMATS)} or all")
+    return list(dict.fromkeys(formats))
+
+def add_export_argument(parser, base=SCHEDULE_EXPORT_NAME):
+    parser.add_argument('--export', type=parse_formats, default=[], metavar='FORMATS',
+                        help=f"also export the schedule as {base}.<format> for each of "
+                             f"{','.join(EXPORT_FORMATS)} (comma-separated, or all)")
+
+def export_targets(base_path, formats):
+    """(writer class, path) for each --export format, at base_path.<extension>"""
+    return [(EXPORT_FORMATS[name], f"{base_path}.{EXPORT_FORMATS[name].extension}") for name in formats]
+
+def stream_schedule(matches, writers, first_day=FESTIVAL_START):
+    """Feed matches, already in schedule order, through every writer at once
+
+    Each set's row is built once and handed to all the writers.
+    """
+    for writer in writers:
+        writer.begin()
+    for match in matches:
+        row = export_row(match, first_day)
+        for writer in writers:
+            writer.write(row)
+    for writer in writers:
+        writer.end()
+
+@metrics.timed('export')
+def export_schedule(matches, targets, title=SCHEDULE_TITLE, ordered=False, first_day=FESTIVAL_START):
+    """Write matches to every (writer class, path) target in one pass
+
+    The matches are sorted once (unless already ordered, see
+    schedule_order) and streamed through one writer per target, each on
+    its own buffered file. Returns the paths written.
+    """
+    if not ordered:
+        matches = schedule_order(matches)
+
+    with ExitStack() as stack:
+        writers = []
+        for writer, path in targets:
+            # newline='' so CSV and iCalendar keep their CRLFs everywhere
+            out = stack.enter_context(open(path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER))
+            writers.append(writer(out, title))
+        stream_schedule(matches, writers, first_day)
+
+    metrics.count('sets_exported', len(matches) * len(writers))
+    return [path for writer, path in targets]
+
+def render_schedules(matches, writer_classes, title=SCHEDULE_TITLE, first_day=FESTIVAL_START):
+    """{writer class: text} for matches already in schedule order, in one pass"""
+    outs = {writer: io.StringIO() for writer in writer_classes}
+    stream_schedule(matches, [writer(out, title) for writer, out in outs.items()], first_day)
+    return {writer: out.getvalue() for writer, out in outs.items()}
@@ -0,0 +1,264 @@
+import json
+import time
+import argparse
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from artist_matching import LIBRARY_FILE, load_library
+from lineup_model import CompiledLineup, LINEUP_FILE, NIGHT_ENDS, format_minutes
+from cli import add_match_arguments
+from artist_resolver import load_act_ids
+from watch_matcher import LiveSchedule, POLL_INTERVAL, apply_changes, open_watcher
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8025
+DEFAULT_NEXT = 5
+
+def parse_clock(clock):
+    """'HH:MM' -> festival-day minutes, early hours counting as the night before"""
+    hour, minute = (int(part) for part in clock.split(':'))
+    minutes = hour * 60 + minute
+    return minutes + 24 * 60 if minutes < NIGHT_ENDS else minutes
+
+def festival_now(now=None):
+    """(day name, festival-day minutes) for a wall-clock time (default now)"""
+    now = now or datetime.now()
+    minutes = now.hour * 60 + now.minute
+    if minutes < NIGHT_ENDS:
+        return (now - timedelta(days=1)).strftime('%A'), minutes + 24 * 60
+    return now.strftime('%A'), minutes
+
+def slot_entry(slot):
+    """A lineup slot in the same shape as a broadcast_matcher match"""
+    return {
+        'lineup_artist': slot['artist'],
+        'stage': slot['stage'].replace(' (broadcast)', ''),
+        'day': slot['day'],
+        'time': slot['time'],
+        'broadcast': slot['broadcast'],
+        'day_index': slot['day_index'],
+        'start': slot['start'],
+        'end': slot['end']
+    }
+
+def public(entry):
+    """The JSON view of a match or slot entry"""
+    view = {key: entry[key] for key in ('lineup_artist', 'stage', 'day', 'time', 'broadcast')}
+    if 'playlist_artist' in entry:
+        view['playlist_artist'] = entry['playlist_artist']
+    return view
+
+class SlotIndex:
+    """Sets by day, sorted by start, for interval queries with bisect
+
+    Entries are match dicts (see broadcast_matcher.split_by_broadcast) or
+    slot_entry dicts. Each day keeps its start times in a list beside the
+    entries and the length of its longest set, so every set overlapping a
+    time lies in one bisected window of the list.
+    """
+
+    def __init__(self, entries):
+        by_day = {}
+        for entry in entries:
+            by_day.setdefault(entry['day_index'], []).append(entry)
+        self.days = {}
+        for day_index, day_entries in by_day.items():
+            day_entries.sort(key=lambda entry: (entry['start'], entry['end']))
+            starts = [entry['start'] for entry in day_entries]
+            longest = max(entry['end'] - entry['start'] for entry in day_entries)
+            self.days[day_index] = (starts, day_entries, longest)
+        self.day_order = sorted(self.days)
+
+    def __len__(self):
+        return sum(len(entries) for starts, entries, longest in self.days.values())
+
+    def overlapping(self, day_index, start, end):
+        """Entries on a day running at any point in [start, end), by start"""
+        if day_index not in self.days:
+            return []
+        starts, entries, longest = self.days[day_index]
+        lo = bisect_right(starts, start - longest)
+        hi = bisect_left(starts, end)
+        return [entry for entry in entries[lo:hi] if entry['end'] > start]
+
+    def playing(self, day_index, minute):
+        """Entries on stage at a minute"""
+        return self.overlapping(day_index, minute, minute + 1)
+
+    def upcoming(self, day_index, minute, count, broadcast_only=False):
+        """The next `count` entries starting at or after a minute, on to later days"""
+        found = []
+        for other in self.day_order[bisect_left(self.day_order, day_index):]:
+            starts, entries, longest = self.days[other]
+            first = bisect_left(starts, minute) if other == day_index else 0
+            for entry in entries[first:]:
+                if broadcast_only and not entry['broadcast']:
+                    continue
+                found.append(entry)
+                if len(found) == count:
+                    return found
+        return found
+
+    def free(self, day_index, start, end, min_length=0):
+        """[(start, end)] gaps of at least min_length minutes with no entry on"""
+        gaps = []
+        cursor = start
+        for entry in self.overlapping(day_index, start, end):
+            if entry['start'] - cursor >= max(min_length, 1):
+                gaps.append((cursor, entry['start']))
+            cursor = max(cursor, entry['end'])
+        if end - cursor >= max(min_length, 1):
+            gaps.append((cursor, end))
+        return gaps
+
+class ScheduleService:
+    """The lineup and your matches held in memory, queried through SlotIndexes
+
+    Indexes are rebuilt from a LiveSchedule (see watch_matcher) after every
+    change and swapped in as one tuple, so a query never sees half an
+    update and needs no lock.
+    """
+
+    def __init__(self, live):
+        self.live = live
+        self.loaded_at = None
+        self.rebuild()
+
+    def rebuild(self):
+        lineup = self.live.lineup
+        mine = SlotIndex(self.live.matches)
+        everything = SlotIndex(slot_entry(slot) for slot in lineup.slots)
+        self.state = (lineup.day_index, {'mine': mine, 'all': everything})
+        self.loaded_at = time.time()
+
+    def index(self, scope):
+        day_index, indexes = self.state
+        if scope not in indexes:
+            raise ValueError(f"scope must be one of {', '.join(indexes)}")
+        return day_index, indexes[scope]
+
+    def when(self, query):
+        """(day index, minutes) from the 'day' and 'time' parameters, default now"""
+        day_index, indexes = self.state
+        day, minute = festival_now()
+        if 'time' in query:
+            minute = parse_clock(query['time'])
+        day = query.get('day', day)
+        if day not in day_index:
+            raise ValueError(f"Unknown day {day!r}")
+        return day_index[day], minute
+
+    def now(self, query):
+        day_index, index = self.index(query.get('scope', 'mine'))
+        day, minute = self.when(query)
+        return {'time': format_minutes(minute), 'playing': [public(e) for e in index.playing(day, minute)]}
+
+    def next(self, query):
+        day_index, index = self.index(query.get('scope', 'mine'))
+        day, minute = self.when(query)
+        count = int(query.get('n', DEFAULT_NEXT))
+        broadcast_only = query.get('broadcast', '') in ('1', 'true', 'yes')
+        return {'time': format_minutes(minute),
+                'next': [public(e) for e in index.upcoming(day, minute, count, broadcast_only)]}
+
+    def free(self, query):
+        day_index, index = self.index(query.get('scope', 'mine'))
+        day, minute = self.when(query)
+        start = parse_clock(query['from']) if 'from' in query else minute
+        end = parse_clock(query['to']) if 'to' in query else 24 * 60 + NIGHT_ENDS
+        if end <= start:
+            raise ValueError("'to' must be after 'from'")
+        gaps = index.free(day, start, end, int(query.get('min', 0)))
+        return {'free': [{'from': format_minutes(a), 'to': format_minutes(b), 'minutes': b - a} for a, b in gaps]}
+
+    def status(self, query):
+        day_index, indexes = self.state
+        return {'sets': len(indexes['all']), 'matches': len(indexes['mine']),
+                'days': list(day_index), 'loaded_at': time.strftime('%H:%M:%S', time.localtime(self.loaded_at))}
+
+    def handle(self, path, query):
+        """(HTTP status, JSON body) for a request"""
+        routes = {'/': self.status, '/now': self.now, '/next': self.next, '/free': self.free}
+        route = routes.get(path.rstrip('/') or '/')
+        if route is None:
+            return 404, {'error': f"Unknown path {path}; try {', '.join(routes)}"}
+        try:
+            return 200, route(query)
+        except (ValueError, KeyError) as e:
+            return 400, {'error': str(e)}
+
+    def reload_forever(self, watcher, lineup_path, library_path):
+        """Rebuild after every change to the lineup or library files"""
+        while True:
+            changed = watcher.wait()
+            try:
+                removed, added = apply_changes(self.live, changed, lineup_path, library_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring change to {', '.join(sorted(changed))}: {e}")
+                continue
+            self.rebuild()
+            print(f"{time.strftime('%H:%M:%S')} reloaded: {len(removed)} matches removed, {len(added)} added")
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, body = service.handle(url.path, query)
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve what's on now and next among your Glastonbury matches")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    parser.add_argument('--library', default=LIBRARY_FILE, help=f"playlist library (default: {LIBRARY_FILE})")
+    parser.add_argument('--poll', action='store_true', help="poll for changes even where inotify is available")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f"seconds between polls (default: {POLL_INTERVAL})")
+    add_match_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=== GLASTONBURY 2025 - SCHEDULE SERVER ===\n")
+
+    act_ids = {} if args.no_ids else load_act_ids()
+    live = LiveSchedule(load_library(args.library), CompiledLineup.load(args.lineup), act_ids,
+                        args.fuzzy, args.threshold)
+    service = ScheduleService(live)
+    status = service.status({})
+    print(f"Loaded {status['sets']} sets, {status['matches']} of them yours")
+
+    watcher = open_watcher([args.lineup, args.library], args.poll, args.interval)
+    threading.Thread(target=service.reload_forever, args=(watcher, args.lineup, args.library), daemon=True).start()
+
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port}/ (/now, /next?n=5&broadcast=1, /free?day=Saturday&from=15:00&to=18:00)")
+    print("Ctrl+C to stop\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving.")
+    finally:
+        server.server_close()
+        watcher.close()
+
+if __name__ == "__main__":
+    main()
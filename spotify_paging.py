@@ -0,0 +1,87 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import metrics
+
+# Spotify paging endpoints cap how many items one request may return
+PLAYLIST_TRACKS_LIMIT = 100
+USER_PLAYLISTS_LIMIT = 50
+
+# Default number of page requests in flight at once
+PAGE_WORKERS = 4
+
+# Only the parts of a playlist track page the extractors read. Everything
+# else (album art, markets, external urls...) is dropped by the API.
+TRACK_FIELDS = 'items(track(name,artists(name,id))),total,limit,offset,next'
+
+def iter_pages(fetch_page, limit, workers=PAGE_WORKERS):
+    """Yield every page of a Spotify paging endpoint, in order
+
+    fetch_page(offset, limit) must return one page object. The first page
+    reports 'total', so the remaining offsets are fanned out over a pool of
+    at most `workers` threads instead of following 'next' links one
+    by one. Pages are still yielded in offset order, and only a window of
+    2 * workers pages is fetched ahead of the consumer, so memory stays flat
+    however long the playlist is. Closing the generator early cancels any
+    pages that have not started yet.
+    """
+    first_page = fetch_page(0, limit)
+    metrics.count('pages')
+    yield first_page
+
+    page_size = first_page.get('limit') or limit
+    offsets = range(page_size, first_page.get('total') or 0, page_size)
+    if not offsets:
+        return
+
+    if workers <= 1:
+        for offset in offsets:
+            page = fetch_page(offset, page_size)
+            metrics.count('pages')
+            yield page
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        remaining = iter(offsets)
+        for offset in islice(remaining, 2 * workers):
+            pending.append(pool.submit(fetch_page, offset, page_size))
+        while pending:
+            page = pending.popleft().result()
+            for offset in islice(remaining, 1):
+                pending.append(pool.submit(fetch_page, offset, page_size))
+            metrics.count('pages')
+            yield page
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def iter_items(fetch_page, limit, workers=PAGE_WORKERS):
+    """Yield the items of every page, in order"""
+    for page in iter_pages(fetch_page, limit, workers):
+        yield from page['items']
+
+def playlist_track_items(sp, playlist_id, workers=PAGE_WORKERS, fields=TRACK_FIELDS):
+    """Yield every track item of a playlist, projected to `fields`"""
+    def fetch_page(offset, limit):
+        return sp.playlist_tracks(playlist_id, fields=fields, limit=limit, offset=offset)
+
+    return iter_items(fetch_page, PLAYLIST_TRACKS_LIMIT, workers)
+
+def iter_playlist_artists(sp, playlist_id, workers=PAGE_WORKERS):
+    """Yield (track name, artist) for every artist credit in a playlist
+
+    Pages are processed as they arrive rather than collected first.
+    """
+    for item in playlist_track_items(sp, playlist_id, workers):
+        track = item['track']
+        if track and track['artists']:
+            for artist in track['artists']:
+                yield track['name'], artist
+
+def user_playlist_items(sp, workers=PAGE_WORKERS):
+    """Yield every playlist of the current user"""
+    def fetch_page(offset, limit):
+        return sp.current_user_playlists(limit=limit, offset=offset)
+
+    return iter_items(fetch_page, USER_PLAYLISTS_LIMIT, workers)
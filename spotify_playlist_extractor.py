@@ -1,15 +1,25 @@
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import json
-import sys
+import argparse
 from collections import Counter
-from secrets import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+import metrics
+from spotify_paging import iter_playlist_artists, user_playlist_items, PAGE_WORKERS
+from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session, report_stats
 
 # Spotify API scopes needed
 SCOPE = "playlist-read-private playlist-read-collaborative"
 
-def setup_spotify_client():
-    """Initialize Spotify client with authentication"""
+def setup_spotify_client(scheduler=None):
+    """Initialize Spotify client with authentication
+    
+    Every call goes through a RequestScheduler, so 429s are retried after
+    Retry-After with a shared backoff instead of aborting the run.
+    """
+    # Imported here so the module can be used (e.g. by benchmarks against
+    # a stub API) without credentials
+    from secrets import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI
+    
     auth_manager = SpotifyOAuth(
         client_id=CLIENT_ID,
         client_secret=CLIENT_SECRET,
@@ -17,54 +27,48 @@ def setup_spotify_client():
         scope=SCOPE
     )
     
-    return spotipy.Spotify(auth_manager=auth_manager)
+    sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=build_requests_session())
+    return ScheduledClient(sp, scheduler or RequestScheduler())
 
 def find_playlist_by_name(sp, playlist_name):
     """Find a specific playlist by name"""
-    results = sp.current_user_playlists(limit=50)
-    
-    while results:
-        for playlist in results['items']:
+    playlists = user_playlist_items(sp)
+    try:
+        for playlist in playlists:
             if playlist['name'].lower() == playlist_name.lower():
                 return playlist
-        
-        if results['next']:
-            results = sp.next(results)
-        else:
-            break
+    finally:
+        # Stop any page requests still queued behind the match
+        playlists.close()
     
     return None
 
-def extract_artists_from_playlist(sp, playlist_id):
+def extract_artists_from_playlist(sp, playlist_id, page_workers=PAGE_WORKERS):
     """Extract all artists from a specific playlist"""
     artists = []
     
-    # Get all tracks from playlist
-    results = sp.playlist_tracks(playlist_id)
-    tracks = results['items']
-    
-    # Handle pagination
-    while results['next']:
-        results = sp.next(results)
-        tracks.extend(results['items'])
-    
-    # Extract artist information
-    for item in tracks:
-        if item['track'] and item['track']['artists']:
-            for artist in item['track']['artists']:
-                artists.append({
-                    'name': artist['name'],
-                    'id': artist['id'],
-                    'track_name': item['track']['name']
-                })
+    # Stream artist credits page by page, fetching pages concurrently
+    for track_name, artist in iter_playlist_artists(sp, playlist_id, page_workers):
+        artists.append({
+            'name': artist['name'],
+            'id': artist['id'],
+            'track_name': track_name
+        })
     
     return artists
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract artists from one of your Spotify playlists")
+    parser.add_argument('playlist', nargs='*', help="playlist name (asked for if not given)")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def run(args):
+    """Extract one playlist's artists to JSON and text files"""
     try:
         # Get playlist name from command line or user input
-        if len(sys.argv) > 1:
-            playlist_name = " ".join(sys.argv[1:])
+        if args.playlist:
+            playlist_name = " ".join(args.playlist)
         else:
             playlist_name = input("Enter playlist name: ").strip()
         
@@ -73,7 +77,8 @@ def main():
             return
         
         # Initialize Spotify client
-        sp = setup_spotify_client()
+        scheduler = RequestScheduler()
+        sp = setup_spotify_client(scheduler)
         
         # Find the specific playlist
         print(f"Looking for playlist: '{playlist_name}'...")
@@ -136,6 +141,7 @@ def main():
                 f.write(f"{artist}\n")
         
         print(f"Artist list also saved to: {text_file}")
+        report_stats(scheduler)
         
     except ImportError:
         print("Error: secrets.py file not found!")
@@ -144,5 +150,10 @@ def main():
         print(f"Error: {e}")
         print("Make sure you've set your credentials correctly in secrets.py")
 
+def main(argv=None):
+    args = parse_args(argv)
+    with metrics.collect('spotify_playlist_extractor', args):
+        run(args)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The scripts are plain modules at the repository root, as the benchmarks use
+# them; the local Spotify stub lives with the benchmarks
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep data_cache's binary caches out of the user's cache home"""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('GLASTO_CACHE_DIR', str(path))
+    return path
+
+@pytest.fixture
+def write_json(tmp_path):
+    """Write data as JSON under tmp_path and return the path"""
+    def write(name, data):
+        path = tmp_path / name
+        path.write_text(json.dumps(data), encoding='utf-8')
+        return str(path)
+    return write
+
+def playlist(name, artist_counts):
+    """A playlist entry in all_playlists_artists.json format"""
+    return {
+        'playlist_name': name,
+        'total_tracks': sum(artist_counts.values()),
+        'unique_artists': len(artist_counts),
+        'artist_counts': artist_counts,
+        'all_artists': sorted(artist_counts)
+    }
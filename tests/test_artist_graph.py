@@ -0,0 +1,67 @@
+import pytest
+
+from artist_graph import RelatedArtistGraph, discover, load_graph_cache, save_graph_cache
+from compact_library import CompactLibrary
+from lineup_model import CompiledLineup
+from request_scheduler import build_requests_session
+from spotify_stub import SpotifyStub
+
+LINEUP = {
+    'Other Stage (broadcast)': {
+        'Saturday': [
+            {'artist': 'Near Act', 'time': '14:00–15:00'},
+            {'artist': 'Far Act', 'time': '16:00–17:00'},
+            {'artist': 'Mine A', 'time': '18:00–19:00'}
+        ]
+    }
+}
+
+ARTISTS = [
+    {'id': 'me1', 'name': 'Mine A'},
+    {'id': 'me2', 'name': 'Mine B'},
+    {'id': 'x1', 'name': 'Bridge'},
+    {'id': 'x2', 'name': 'Elsewhere'},
+    {'id': 'act1', 'name': 'Near Act'},
+    {'id': 'act2', 'name': 'Far Act'}
+]
+
+RELATED = {'me1': ['x1', 'me2'], 'me2': ['x2'], 'x1': ['act1'], 'x2': ['me2'], 'act2': ['x2']}
+
+ACT_IDS = {'Near Act': 'act1', 'Far Act': 'act2', 'Mine A': 'me1'}
+
+def make_library():
+    library = CompactLibrary()
+    library.add_playlist('Mine', {'Mine A': 5, 'Mine B': 1}, {'Mine A': 'me1', 'Mine B': 'me2'})
+    return library
+
+# spotipy warns that Spotify has deprecated the related-artists endpoint
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_discovers_related_acts_and_reuses_cache(write_json, tmp_path):
+    lineup = CompiledLineup.load(write_json('lineup.json', LINEUP))
+    library = make_library()
+    cache_file = str(tmp_path / 'related.json')
+
+    with SpotifyStub({'playlists': [], 'artists': ARTISTS, 'related': RELATED}) as stub:
+        sp = stub.client(requests_session=build_requests_session())
+
+        graph = RelatedArtistGraph(sp, load_graph_cache(cache_file), workers=2)
+        discoveries = discover(library, lineup, ACT_IDS, graph)
+        save_graph_cache(graph.cache, cache_file)
+        # Your artists, then the artists one hop away
+        assert stub.related == 4
+        assert graph.failed == 0
+
+        # Matched acts are left out, as are acts the crawl never reached
+        assert [(act, path) for score, act, path in discoveries] == [('Near Act', ['Near Act', 'Bridge', 'Mine A'])]
+        assert discoveries[0][0] > 0
+
+        # A repeat run is answered from the cache alone
+        graph = RelatedArtistGraph(sp, load_graph_cache(cache_file), workers=2)
+        assert discover(library, lineup, ACT_IDS, graph) == discoveries
+        assert stub.related == 4
+        assert graph.fetched == 0
+
+        # Until the cached entries expire
+        graph = RelatedArtistGraph(sp, load_graph_cache(cache_file), ttl=0)
+        assert discover(library, lineup, ACT_IDS, graph) == discoveries
+        assert stub.related == 8
@@ -0,0 +1,74 @@
+import json
+import time
+
+from artist_resolver import ArtistResolver, load_act_ids, resolve_lineup
+from lineup_model import CompiledLineup
+from request_scheduler import build_requests_session
+from spotify_stub import SpotifyStub
+
+LINEUP = {
+    'Pyramid Stage (broadcast)': {
+        'Friday': [
+            {'artist': 'Pulp', 'time': '21:30–23:00'},
+            {'artist': 'Beyoncé', 'time': '19:00–20:30'},
+            {'artist': 'Nobody Knows Us', 'time': '13:00–13:45'}
+        ]
+    },
+    'Woodsies': {
+        'Saturday': [
+            {'artist': 'Wet Leg (DJ set)', 'time': '16:00–17:00'}
+        ]
+    }
+}
+
+ARTISTS = [
+    {'id': 'pulp', 'name': 'Pulp', 'popularity': 70},
+    {'id': 'pulpcover', 'name': 'Pulp', 'popularity': 5},
+    {'id': 'pulpfiction', 'name': 'Pulp Fiction Soundtrack', 'popularity': 90},
+    {'id': 'beyonce', 'name': 'BEYONCÉ', 'popularity': 95},
+    {'id': 'wetleg', 'name': 'Wet Leg', 'popularity': 60}
+]
+
+def stub_library():
+    return {'playlists': [], 'artists': ARTISTS}
+
+def test_resolves_lineup_against_search_stub(write_json, tmp_path):
+    lineup = CompiledLineup.load(write_json('lineup.json', LINEUP))
+    cache_path = str(tmp_path / 'ids.json')
+    with SpotifyStub(stub_library()) as stub:
+        sp = stub.client(requests_session=build_requests_session())
+        act_ids, resolver = resolve_lineup(sp, lineup, cache_path, workers=2)
+
+        # The most popular same-named artist wins; case and the
+        # parenthetical are ignored; an unknown act stays unresolved
+        assert act_ids == {'Pulp': 'pulp', 'Beyoncé': 'beyonce', 'Wet Leg (DJ set)': 'wetleg'}
+        assert stub.searches == 4
+        assert resolver.failed == 0
+
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+        assert cache['Nobody Knows Us']['id'] is None
+        assert load_act_ids(cache_path) == act_ids
+
+        # A second run is answered from the cache
+        assert resolve_lineup(sp, lineup, cache_path)[0] == act_ids
+        assert stub.searches == 4
+
+def test_searches_expired_entries_again():
+    old = time.time() - 10
+    cache = {'Pulp': {'id': 'pulpcover', 'name': 'Pulp', 'resolved_at': old},
+             'Wet Leg': {'id': None, 'name': None, 'resolved_at': old}}
+    with SpotifyStub(stub_library()) as stub:
+        resolver = ArtistResolver(stub.client(), cache, ttl=5, miss_ttl=5)
+        assert resolver.resolve(['Pulp', 'Wet Leg']) == {'Pulp': 'pulp', 'Wet Leg': 'wetleg'}
+        assert stub.searches == 2
+
+def test_keeps_cached_entry_when_search_fails(capsys):
+    cache = {'Pulp': {'id': 'pulp', 'name': 'Pulp', 'resolved_at': 0}}
+    with SpotifyStub(stub_library()) as stub:
+        sp = stub.client()
+        stub.stop()
+        resolver = ArtistResolver(sp, cache, ttl=1)
+        assert resolver.resolve(['Pulp']) == {'Pulp': 'pulp'}
+    assert resolver.failed == 1
+    assert "Could not resolve 'Pulp'" in capsys.readouterr().out
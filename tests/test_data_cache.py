@@ -0,0 +1,42 @@
+import os
+import pickle
+
+import pytest
+
+import data_cache
+from data_cache import cache_path, load_cached
+
+def test_reuses_cache_until_source_changes(write_json):
+    path = write_json('data.json', {'a': 1})
+    builds = []
+
+    def build(data):
+        builds.append(data)
+        return dict(data)
+
+    assert load_cached(path, build) == {'a': 1}
+    assert load_cached(path, build) == {'a': 1}
+    assert len(builds) == 1
+
+    # A different size, so the change shows even within the mtime's resolution
+    write_json('data.json', {'a': 22})
+    assert load_cached(path, build) == {'a': 22}
+    assert len(builds) == 2
+    assert not [name for name in os.listdir(os.path.dirname(cache_path(path))) if name.endswith('.tmp')]
+
+def test_ignores_pickle_next_to_source(write_json, tmp_path):
+    path = write_json('data.json', {'a': 1})
+    with open(path + data_cache.CACHE_SUFFIX, 'wb') as f:
+        pickle.dump({'version': data_cache.CACHE_VERSION, 'mtime_ns': 0, 'size': 0, 'sha256': ''}, f)
+        pickle.dump('planted', f)
+    assert os.path.dirname(cache_path(path)) != str(tmp_path)
+    assert load_cached(path, dict) == {'a': 1}
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="POSIX permissions only")
+def test_refuses_shared_cache_directory(write_json, cache_dir, capsys):
+    path = write_json('data.json', {'a': 1})
+    cache_dir.mkdir()
+    cache_dir.chmod(0o777)
+    assert load_cached(path, dict) == {'a': 1}
+    assert 'not a private directory' in capsys.readouterr().out
+    assert not os.listdir(cache_dir)
@@ -0,0 +1,49 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from spotipy.exceptions import SpotifyException
+
+import metrics
+from request_scheduler import RequestScheduler, ScheduledClient, build_requests_session, report_stats
+from spotify_stub import SpotifyStub
+
+LIBRARY = {'playlists': [], 'artists': [{'id': f"a{i}", 'name': f"Artist {i}"} for i in range(20)]}
+
+def search(sp, i):
+    return sp.search(q=f'artist:"Artist {i}"', type='artist', limit=1)['artists']['items'][0]['id']
+
+def test_retries_after_429_for_every_thread(tmp_path, capsys):
+    with SpotifyStub(LIBRARY, rate_limit=10, retry_after=1) as stub:
+        scheduler = RequestScheduler(rate=1000, burst=100, concurrency=8)
+        sp = ScheduledClient(stub.client(requests_session=build_requests_session()), scheduler)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda i: search(sp, i), range(20)))
+
+    assert ids == [f"a{i}" for i in range(20)]
+    assert stub.throttled > 0
+    stats = scheduler.stats()
+    assert stats['retries'] == stats['throttled_responses'] == stub.throttled
+    assert stats['requests'] == stub.requests == 20 + stub.throttled
+    assert stats['throttled_seconds'] >= 1
+    assert stats['concurrency'] < 8
+
+    path = str(tmp_path / 'metrics.json')
+    with metrics.collect('test', argparse.Namespace(metrics_json=path, profile=None)):
+        report_stats(scheduler)
+    assert f"({stats['retries']} retries after 429" in capsys.readouterr().out
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['api'] == scheduler.stats()
+
+def test_429_reaches_the_scheduler():
+    # The session must not sleep through a 429 itself, or the scheduler
+    # never hears of it
+    with SpotifyStub(LIBRARY, rate_limit=1, retry_after=30) as stub:
+        scheduler = RequestScheduler(max_retries=0)
+        sp = ScheduledClient(stub.client(requests_session=build_requests_session()), scheduler)
+        search(sp, 0)
+        with pytest.raises(SpotifyException) as error:
+            search(sp, 1)
+    assert error.value.http_status == 429
+    assert stub.requests == 2
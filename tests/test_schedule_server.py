@@ -0,0 +1,97 @@
+import json
+import threading
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+import pytest
+
+from artist_matching import load_library
+from lineup_model import CompiledLineup
+from schedule_server import ScheduleService, make_server
+from watch_matcher import LiveSchedule
+from conftest import playlist
+
+LINEUP = {
+    'Pyramid Stage (broadcast)': {
+        'Friday': [
+            {'artist': 'The Alpha', 'time': '13:00–14:00'},
+            {'artist': 'Beta', 'time': '15:00–16:00'},
+            {'artist': 'Epsilon', 'time': '23:30–01:00'}
+        ]
+    },
+    'Woodsies': {
+        'Friday': [
+            {'artist': 'Gamma', 'time': '13:30–14:30'},
+            {'artist': 'Delta', 'time': '17:00–18:00'}
+        ]
+    }
+}
+
+LIBRARY = {'Mine': playlist('Mine', {'the alpha': 3, 'Gamma': 1, 'Delta': 2, 'Epsilon': 1, 'Zeta': 4})}
+
+@pytest.fixture
+def server(write_json):
+    """A running schedule server over LINEUP and LIBRARY, and its base URL"""
+    lineup = CompiledLineup.load(write_json('lineup.json', LINEUP))
+    library = load_library(write_json('library.json', LIBRARY))
+    server = make_server(ScheduleService(LiveSchedule(library, lineup)), port=0)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+def get(url):
+    with urlopen(url) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+def artists(entries):
+    return [entry['lineup_artist'] for entry in entries]
+
+def test_status(server):
+    status = get(f"{server}/")
+    assert status['sets'] == 5
+    assert status['matches'] == 4
+    assert 'Friday' in status['days']
+
+def test_now(server):
+    body = get(f"{server}/now?day=Friday&time=13:45")
+    assert body['time'] == '13:45'
+    assert artists(body['playing']) == ['The Alpha', 'Gamma']
+    assert body['playing'][0]['broadcast'] is True
+    assert body['playing'][0]['stage'] == 'Pyramid Stage'
+
+    assert artists(get(f"{server}/now?day=Friday&time=15:30")['playing']) == []
+    assert artists(get(f"{server}/now?day=Friday&time=15:30&scope=all")['playing']) == ['Beta']
+    # Early hours belong to the night before
+    assert artists(get(f"{server}/now?day=Friday&time=00:30")['playing']) == ['Epsilon']
+
+def test_next(server):
+    assert artists(get(f"{server}/next?day=Friday&time=14:00")['next']) == ['Delta', 'Epsilon']
+    assert artists(get(f"{server}/next?day=Friday&time=14:00&n=1")['next']) == ['Delta']
+    assert artists(get(f"{server}/next?day=Friday&time=14:00&broadcast=1")['next']) == ['Epsilon']
+    assert artists(get(f"{server}/next?day=Friday&time=14:00&scope=all")['next']) == ['Beta', 'Delta', 'Epsilon']
+
+def test_free(server):
+    body = get(f"{server}/free?day=Friday&from=12:00&to=19:00")
+    assert body['free'] == [
+        {'from': '12:00', 'to': '13:00', 'minutes': 60},
+        {'from': '14:30', 'to': '17:00', 'minutes': 150},
+        {'from': '18:00', 'to': '19:00', 'minutes': 60}
+    ]
+    assert get(f"{server}/free?day=Friday&from=12:00&to=19:00&min=90")['free'] == [
+        {'from': '14:30', 'to': '17:00', 'minutes': 150}
+    ]
+
+@pytest.mark.parametrize('path', ['/now?day=Monday&time=12:00', '/free?day=Friday&from=18:00&to=12:00',
+                                  '/now?scope=theirs&day=Friday&time=12:00'])
+def test_bad_queries(server, path):
+    with pytest.raises(HTTPError) as error:
+        get(server + path)
+    assert error.value.code == 400
+
+def test_unknown_path(server):
+    with pytest.raises(HTTPError) as error:
+        get(f"{server}/later")
+    assert error.value.code == 404
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+from watch_matcher import INOTIFY_EVENT, IN_Q_OVERFLOW, InotifyWatcher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+
+@pytest.fixture
+def watcher(tmp_path):
+    watcher = InotifyWatcher([tmp_path / 'lineup.json', tmp_path / 'library.json'])
+    yield watcher
+    watcher.close()
+
+def test_ignores_other_files_with_undecodable_names(tmp_path, watcher):
+    (tmp_path / os.fsdecode(b'\xff\xfe.json')).write_text('{}')
+    (tmp_path / 'lineup.json').write_text('{}')
+    assert watcher.wait(timeout=1) == {str(tmp_path / 'lineup.json')}
+
+def test_queue_overflow_changes_every_file(tmp_path, watcher):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, INOTIFY_EVENT.pack(-1, IN_Q_OVERFLOW, 0, 0))
+    os.close(write_fd)
+    inotify_fd, watcher.fd = watcher.fd, read_fd
+    try:
+        assert watcher.read_events() == {str(tmp_path / 'lineup.json'), str(tmp_path / 'library.json')}
+    finally:
+        watcher.fd = inotify_fd
+        os.close(read_fd)
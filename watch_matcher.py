@@ -0,0 +1,365 @@
+import os
+import time
+import select
+import struct
+import argparse
+from artist_matching import LIBRARY_FILE, normalize_name, load_library
+from lineup_model import CompiledLineup, LINEUP_FILE
+from fuzzy_matching import DEFAULT_THRESHOLD
+from cli import add_match_arguments, write_text
+from artist_resolver import load_act_ids
+from schedule_export import BroadcastTextWriter, CompleteTextWriter, render_schedules
+import broadcast_matcher
+
+# Seconds between stat() calls when inotify is not available
+POLL_INTERVAL = 0.5
+
+# Events arriving this soon after the first are handled with it, so an
+# editor's write-then-rename counts as one change
+DEBOUNCE = 0.02
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+class PollingWatcher:
+    """Report changes to a set of files by comparing their mtime and size"""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self.signatures = {path: self.signature(path) for path in self.paths}
+
+    @staticmethod
+    def signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self):
+        changed = set()
+        for path in self.paths:
+            signature = self.signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """Block until some of the files change; the set of changed paths
+
+        Returns an empty set if timeout seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.changed()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Report changes to a set of files as the kernel announces them (Linux)
+
+    The files' directories are watched rather than the files, so a file
+    replaced by rename (as editors and json.dump-then-move do) keeps being
+    seen. Raises OSError where inotify is not available.
+    """
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        self.paths = {os.path.abspath(path) for path in paths}
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+            self.directories[wd] = directory
+
+    def read_events(self):
+        """The watched paths named by the pending events
+
+        If the kernel's queue overflowed, events were lost, so every
+        watched path counts as changed.
+        """
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            # Other files in the directories may have names that are not UTF-8
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed |= self.paths
+                continue
+            path = os.path.join(self.directories.get(wd, ''), name)
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """Block until some of the files change; the set of changed paths
+
+        Returns an empty set if timeout seconds pass first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        while not changed:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not select.select([self.fd], [], [], remaining)[0]:
+                return changed
+            changed = self.read_events()
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self.read_events()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def open_watcher(paths, poll=False, interval=POLL_INTERVAL):
+    """An InotifyWatcher where the platform has inotify, else a PollingWatcher"""
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, interval)
+
+def slot_key(slot):
+    return slot['stage'], slot['day'], slot['artist'], slot['time']
+
+def match_key(match):
+    return match['lineup_artist'], match['stage'], match['day'], match['time']
+
+def diff_lineups(old, new):
+    """(removed slots, added slots) between two CompiledLineups
+
+    A set that moved stage or time shows up as one of each.
+    """
+    old_slots = {slot_key(slot): slot for slot in old.slots}
+    new_slots = {slot_key(slot): slot for slot in new.slots}
+    removed = [slot for key, slot in old_slots.items() if key not in new_slots]
+    added = [slot for key, slot in new_slots.items() if key not in old_slots]
+    return removed, added
+
+class LiveSchedule:
+    """Matches and schedule files kept up to date as the inputs change
+
+    `matched` maps each playlist artist name on the lineup to its
+    (slots, score), as in broadcast_matcher.find_library_matches. A lineup
+    change only re-matches the artists already matched and those whose
+    normalized name or Spotify id belongs to an added or removed set. A
+    library change only matches the artists that are new. Fuzzy matching
+    re-matches everything, since any artist may be closest to a new act.
+    """
+
+    def __init__(self, library, lineup, act_ids=None, fuzzy=False, threshold=DEFAULT_THRESHOLD, out_dir='.'):
+        self.act_ids = act_ids or {}
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.out_dir = out_dir
+        self.written = {}
+        self.set_lineup(lineup)
+        self.set_library(library)
+        self.matched = self.match_artists()
+        self.matches = self.split()
+
+    def set_lineup(self, lineup):
+        self.lineup = lineup
+        self.spotify_index = lineup.spotify_index(self.act_ids) if self.act_ids else None
+
+    def set_library(self, library):
+        self.library = library
+        self.by_key = {}
+        self.by_spotify_id = {}
+        for artist_id, key in enumerate(library.normalized):
+            self.by_key.setdefault(key, []).append(artist_id)
+            spotify_id = library.spotify_ids[artist_id]
+            if spotify_id:
+                self.by_spotify_id.setdefault(spotify_id, []).append(artist_id)
+
+    def match_artists(self, artist_ids=None):
+        """{playlist artist: (slots, score)} for the given artists (default all)"""
+        names = self.library.names
+        if self.fuzzy:
+            matched = self.library.fuzzy_match(self.lineup.fuzzy_index, self.threshold, self.spotify_index)
+        else:
+            matched = {artist_id: (slots, 1.0) for artist_id, slots
+                       in self.library.match(self.lineup.index, self.spotify_index, artist_ids).items()}
+        return {names[artist_id]: result for artist_id, result in matched.items()}
+
+    def split(self):
+        """The matches, broadcast and festival-only, in schedule order"""
+        ordered = sorted(self.matched)
+        broadcast_matches, non_broadcast_matches = broadcast_matcher.split_by_broadcast(
+            [(name, *self.matched[name]) for name in ordered], self.fuzzy)
+        return broadcast_matcher.sort_by_time(broadcast_matches + non_broadcast_matches)
+
+    def update_lineup(self, lineup):
+        """Switch to a new lineup; the (removed, added) matches"""
+        removed, added = diff_lineups(self.lineup, lineup)
+        self.set_lineup(lineup)
+
+        if self.fuzzy:
+            self.matched = self.match_artists()
+        else:
+            changed_acts = {slot['artist'] for slot in removed + added}
+            affected = set()
+            for act in changed_acts:
+                affected.update(self.by_key.get(normalize_name(act), ()))
+                affected.update(self.by_spotify_id.get(self.act_ids.get(act), ()))
+            # Current matches are looked up again too, to point at the new
+            # lineup's slots (and order); a few hundred lookups, not the library
+            affected.update(self.library.artist_id(name) for name in self.matched)
+            self.matched = self.match_artists(sorted(affected))
+
+        return self.refresh()
+
+    def update_library(self, library):
+        """Switch to a new library; the (removed, added) matches"""
+        old_artists = set(zip(self.library.names, self.library.spotify_ids))
+        self.set_library(library)
+
+        if self.fuzzy:
+            self.matched = self.match_artists()
+        else:
+            new_artists = set(zip(library.names, library.spotify_ids))
+            for name, spotify_id in old_artists - new_artists:
+                self.matched.pop(name, None)
+            added = [library.artist_id(name) for name, spotify_id in new_artists - old_artists]
+            self.matched.update(self.match_artists(sorted(added)))
+
+        return self.refresh()
+
+    def refresh(self):
+        """Re-split the matches; the (removed, added) matches since last time"""
+        old = {match_key(match): match for match in self.matches}
+        self.matches = self.split()
+        new = {match_key(match): match for match in self.matches}
+        removed = [match for key, match in old.items() if key not in new]
+        added = [match for key, match in new.items() if key not in old]
+        return removed, added
+
+    def write(self):
+        """Rewrite the schedule files whose contents changed; the paths written"""
+        files = {
+            broadcast_matcher.BROADCAST_SCHEDULE_FILE: BroadcastTextWriter,
+            broadcast_matcher.COMPLETE_SCHEDULE_FILE: CompleteTextWriter
+        }
+        texts = render_schedules(self.matches, files.values())
+        written = []
+        for name, writer in files.items():
+            text = texts[writer]
+            path = os.path.join(self.out_dir, name)
+            if self.written.get(path) != text:
+                write_text(path, text)
+                self.written[path] = text
+                written.append(path)
+        return written
+
+def print_changes(removed, added):
+    for sign, matches in (('-', removed), ('+', added)):
+        for match in matches:
+            tag = "BROADCAST" if match['broadcast'] else "FESTIVAL ONLY"
+            print(f"  {sign} {match['lineup_artist']}: {match['stage']} - {match['day']} at {match['time']} [{tag}]")
+
+def apply_changes(live, changed, lineup_path, library_path):
+    """Reload whichever of the lineup and library files changed into live
+
+    Both files are read before either is applied, so a change is taken
+    whole or not at all. Returns the (removed, added) matches. Raises
+    OSError, ValueError or KeyError for a file that cannot be read, usually
+    one caught half-written, leaving live as it was.
+    """
+    lineup = CompiledLineup.load(lineup_path) if os.path.abspath(lineup_path) in changed else None
+    library = load_library(library_path) if os.path.abspath(library_path) in changed else None
+
+    removed, added = [], []
+    if lineup is not None:
+        removed, added = live.update_lineup(lineup)
+    if library is not None:
+        library_removed, library_added = live.update_library(library)
+        removed += library_removed
+        added += library_added
+    return removed, added
+
+def watch(live, watcher, lineup_path, library_path):
+    """Apply every change to the lineup or library files until interrupted"""
+    while True:
+        changed = watcher.wait()
+        start = time.perf_counter()
+        try:
+            removed, added = apply_changes(live, changed, lineup_path, library_path)
+        except (OSError, ValueError, KeyError) as e:
+            # The next write retries
+            print(f"Ignoring change to {', '.join(sorted(changed))}: {e}")
+            continue
+        written = live.write()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        names = ', '.join(os.path.basename(path) for path in sorted(changed))
+        print(f"{time.strftime('%H:%M:%S')} {names} changed: {len(removed)} removed, {len(added)} added, "
+              f"{len(written)} files rewritten in {elapsed:.1f}ms")
+        print_changes(removed, added)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep your Glastonbury schedules up to date as the lineup or "
+                                                 "your library changes")
+    parser.add_argument('--lineup', default=LINEUP_FILE, help=f"lineup JSON (default: {LINEUP_FILE})")
+    parser.add_argument('--library', default=LIBRARY_FILE, help=f"playlist library (default: {LIBRARY_FILE})")
+    parser.add_argument('--out', default='.', help="directory for the schedule files (default: current directory)")
+    parser.add_argument('--poll', action='store_true', help="poll for changes even where inotify is available")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f"seconds between polls (default: {POLL_INTERVAL})")
+    add_match_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=== GLASTONBURY 2025 - LIVE SCHEDULE ===\n")
+
+    os.makedirs(args.out, exist_ok=True)
+    act_ids = {} if args.no_ids else load_act_ids()
+    live = LiveSchedule(load_library(args.library), CompiledLineup.load(args.lineup), act_ids,
+                        args.fuzzy, args.threshold, args.out)
+    live.write()
+    broadcast_count = sum(1 for match in live.matches if match['broadcast'])
+    print(f"{broadcast_count} broadcast and {len(live.matches) - broadcast_count} festival-only matches, "
+          f"schedules in {args.out}/")
+
+    watcher = open_watcher([args.lineup, args.library], args.poll, args.interval)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {args.interval}s"
+    print(f"Watching {args.lineup} and {args.library} ({mode}), Ctrl+C to stop\n")
+    try:
+        watch(live, watcher, args.lineup, args.library)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+
+if __name__ == "__main__":
+    main()